@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Stand-in pkexec, wg, wg-quick, ip and resolvconf for the benchmarks.
+
+The fakes are tiny /bin/sh scripts so their own start-up cost stays close
+to a real binary's.  Behaviour is tuned through environment variables read
+at call time:
+
+    FAKE_LATENCY          seconds every fake sleeps before answering
+    FAKE_WG_QUICK_FORKS   processes wg-quick spawns per call (default 30,
+                          roughly what the real script forks for a connect)
+    FAKE_WG_INTERFACES    output of `wg show interfaces`
+    FAKE_WG_DUMP          file whose contents `wg show all dump` prints
+    FAKE_WG_SHOW          directory of scripts: `wg show NAME` runs NAME
+                          from it if there is one (see fake_show())
+    FAKE_WG_QUICK_DELAY   file holding seconds wg-quick sleeps per call, the
+                          time a real one waits on netlink, resolvconf and
+                          DNS; a file because the helper's environment is
+                          fixed when it starts (see delay_wg_quick())
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+_LATENCY = 'if [ -n "$FAKE_LATENCY" ]; then sleep "$FAKE_LATENCY"; fi\n'
+
+SCRIPTS: dict[str, str] = {
+    # drop the privilege escalation, run the command as-is
+    "pkexec": 'exec "$@"\n',
+    "wg": _LATENCY
+    + """case "$1 $2" in
+  "show interfaces") echo "$FAKE_WG_INTERFACES" ;;
+  "show all") if [ -n "$FAKE_WG_DUMP" ]; then cat "$FAKE_WG_DUMP"; fi ;;
+  "show "*) if [ -x "$FAKE_WG_SHOW/$2" ]; then exec "$FAKE_WG_SHOW/$2"; fi
+    printf 'interface: %s\\n  listening port: 51820\\n' "$2" ;;
+  "setconf "* | "syncconf "* | "addconf "*) cat >/dev/null ;;
+esac
+""",
+    "wg-quick": """i=0
+while [ "$i" -lt "${FAKE_WG_QUICK_FORKS:-30}" ]; do /bin/true; i=$((i + 1)); done
+if [ -s "$FAKE_WG_QUICK_DELAY" ]; then sleep "$(cat "$FAKE_WG_QUICK_DELAY")"; fi
+"""
+    + _LATENCY,
+    # only drain stdin where the real tool reads it: the helper's own stdin
+    # is its request pipe
+    "ip": _LATENCY + 'case " $* " in *" -batch "*) cat >/dev/null ;; esac\n',
+    "resolvconf": _LATENCY + '[ "$1" = -a ] && cat >/dev/null\nexit 0\n',
+}
+
+
+def install(bin_dir: Path) -> Path:
+    """Write the fakes into *bin_dir* and return it (prepend it to PATH)."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, body in SCRIPTS.items():
+        path = bin_dir / name
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+
+def activate(bin_dir: Path, config_dir: Path) -> None:
+    """Point this process (and its children) at the fakes and *config_dir*."""
+    install(bin_dir)
+    config_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ["WIREGUARD_UI_CONFIG_DIR"] = str(config_dir)
+    os.environ["FAKE_WG_QUICK_DELAY"] = str(bin_dir / "wg-quick.delay")
+    os.environ["FAKE_WG_SHOW"] = str(bin_dir / "wg-show")
+
+
+def fake_show(name: str, script: str) -> list[str]:
+    """Make `wg show *name*` run the sh *script*; return that command.
+
+    The helper only runs `wg show` for its clients, so a benchmark that
+    needs a slow or chatty privileged command fakes an interface.
+    """
+    path = Path(os.environ["FAKE_WG_SHOW"]) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("#!/bin/sh\n" + script + "\n")
+    path.chmod(0o755)
+    return ["wg", "show", name]
+
+
+def delay_wg_quick(seconds: float) -> None:
+    """Make every later wg-quick call sleep *seconds* (0: not at all)."""
+    path = Path(os.environ["FAKE_WG_QUICK_DELAY"])
+    path.write_text(f"{seconds}\n" if seconds else "")
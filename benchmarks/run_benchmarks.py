@@ -0,0 +1,862 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""wireguard-ui benchmark suite.
+
+Runs against stand-in pkexec/wg/wg-quick/ip binaries (see fakebin.py) and a
+temporary directory in place of /etc/wireguard, so it needs neither root nor
+WireGuard.  Results are written as JSON for comparison between commits:
+
+    python3 benchmarks/run_benchmarks.py -o after.json --compare before.json
+
+Benchmarks that need PyQt6 or pyxdg are reported as skipped when those are
+not installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import contextlib
+import datetime
+import fnmatch
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(ROOT / "src"), str(BENCH_DIR)]
+
+import fakebin  # noqa: E402
+
+WORK = Path(tempfile.mkdtemp(prefix="wgui-bench-"))
+CONFIG_DIR = WORK / "wireguard"
+fakebin.activate(WORK / "bin", CONFIG_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# after activate(): the config dir is read when wireguard_core is imported
+import wireguard_core as core  # noqa: E402
+
+Result = dict[str, Any]
+_BENCHMARKS: list[tuple[str, Callable[[argparse.Namespace], list[Result]]]] = []
+
+
+def benchmark(name: str):
+    def register(fn):
+        _BENCHMARKS.append((name, fn))
+        return fn
+
+    return register
+
+
+class Skip(Exception):
+    """Raised by a benchmark whose optional dependencies are missing."""
+
+
+def _stats(name: str, params: dict, samples_ms: list[float], **extra) -> Result:
+    ordered = sorted(samples_ms)
+    return {
+        "name": name,
+        "params": params,
+        "unit": "ms",
+        "samples": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "max": ordered[-1],
+        **extra,
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return samples
+
+
+def _key() -> str:
+    return base64.b64encode(os.urandom(32)).decode()
+
+
+_PEER_KEY = _key()
+
+
+def _config_text(i: int) -> str:
+    return (
+        "[Interface]\n"
+        f"PrivateKey = {_key()}\n"
+        f"Address = 10.{i // 250 % 250}.{i % 250}.2/32\n"
+        "[Peer]\n"
+        f"PublicKey = {_PEER_KEY}\n"
+        f"AllowedIPs = 10.{i // 250 % 250}.{i % 250}.0/24\n"
+        f"Endpoint = pop{i}.example.net:51820\n"
+    )
+
+
+def write_configs(count: int, directory: Path = CONFIG_DIR) -> list[str]:
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir()
+    names = [f"site{i:05d}" for i in range(count)]
+    for i, name in enumerate(names):
+        (directory / f"{name}.conf").write_text(_config_text(i))
+    # written behind the helper's back: the shared query cache would keep
+    # answering with the previous set for up to 10 s
+    core.WireGuard().invalidate_configs()
+    return names
+
+
+def _sizes(args: argparse.Namespace, full: list[int]) -> list[int]:
+    return full[:-1] if args.quick else full
+
+
+# ───────── root-helper IPC ───────── #
+@benchmark("ipc")
+def bench_ipc(args: argparse.Namespace) -> list[Result]:
+    write_configs(1)
+    listing = ["wg", "show", "interfaces"]
+    results = [
+        _stats(
+            "ipc.run_roundtrip",
+            {"cmd": "wg show interfaces"},
+            measure(lambda: core._run_command(listing, use_root=True), 200, 5),
+        ),
+        _stats(
+            "ipc.op_roundtrip",
+            {"op": "stat"},
+            measure(lambda: core._helper_call("stat", name="site00000"), 500, 5),
+        ),
+    ]
+    calls = 2000 if not args.quick else 400
+    for threads in (1, 4, 16):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(
+                pool.map(
+                    lambda _: core._helper_call("stat", name="site00000"),
+                    range(calls),
+                )
+            )
+        elapsed = time.perf_counter() - start
+        results.append(
+            _stats(
+                "ipc.throughput",
+                {"threads": threads, "calls": calls},
+                [elapsed * 1000],
+                ops_per_s=calls / elapsed,
+            )
+        )
+    # a slow privileged command must not hold up unrelated requests
+    slow = threading.Thread(
+        target=core._run_command,
+        args=(fakebin.fake_show("slow", "sleep 2"),),
+        kwargs={"use_root": True},
+    )
+    slow.start()
+    time.sleep(0.05)
+    results.append(
+        _stats(
+            "ipc.op_roundtrip_during_slow_command",
+            {"op": "stat", "slow": "sleep 2"},
+            measure(lambda: core._helper_call("stat", name="site00000"), 100),
+        )
+    )
+    slow.join()
+
+    # large output (`wg show` with thousands of peers): one reply vs chunks
+    wg = core.WireGuard()
+    lines = 1_000_000 if not args.quick else 200_000
+    big = fakebin.fake_show("big", f"seq 1 {lines}")
+    results.append(
+        _stats(
+            "ipc.large_output",
+            {"mode": "buffered", "lines": lines},
+            measure(lambda: core._run_command(big, use_root=True), 5),
+        )
+    )
+    results.append(
+        _stats(
+            "ipc.large_output",
+            {"mode": "streamed", "lines": lines},
+            measure(lambda: sum(len(t) for _, t in wg.stream_command(big)), 5),
+        )
+    )
+
+    # progress of a slow command: first output vs the end of the command
+    progress = fakebin.fake_show("progress", "echo up; sleep 0.2")
+
+    def first_chunk_ms() -> float:
+        start = time.perf_counter()
+        chunks = wg.stream_command(progress)
+        next(chunks)
+        elapsed = (time.perf_counter() - start) * 1000
+        for _ in chunks:
+            pass
+        return elapsed
+
+    results.append(
+        _stats(
+            "ipc.first_output",
+            {"cmd": "echo; sleep 0.2", "mode": "streamed"},
+            [first_chunk_ms() for _ in range(10)],
+        )
+    )
+    return results
+
+
+# ───────── config listing ───────── #
+@benchmark("cache")
+def bench_cache(args: argparse.Namespace) -> list[Result]:
+    """Repeated read-only queries, as the GUI makes them, with and without
+    the query cache (TTLs of 0 turn it off)."""
+    results = []
+    for count in _sizes(args, [10, 1000]):
+        names = write_configs(count)
+        for mode, ttl in (("uncached", 0.0), ("cached", None)):
+            wg = core.WireGuard()
+            wg.cache = core.QueryCache(
+                None if ttl is None else dict.fromkeys(core._QUERY_TTL_S, ttl)
+            )
+
+            def queries(w=wg, n=names) -> None:
+                w.scan_configs()  # refresh
+                w.config_exists(n[0])  # edit/delete check
+                w.active_interfaces()
+                w.active_interfaces()  # e.g. a profile menu right after
+                w.tunnel_info(n[0])
+
+            samples = measure(queries, 20)
+            stats = wg.cache_stats()
+            results.append(
+                _stats(
+                    "cache.queries",
+                    {"configs": count, "mode": mode},
+                    samples,
+                    hits=sum(c["hits"] for c in stats.values()),
+                    misses=sum(c["misses"] for c in stats.values()),
+                )
+            )
+    return results
+
+
+def _uncached() -> core.WireGuard:
+    """A WireGuard that asks the helper every time (the "cache" group
+    measures the query cache)."""
+    wg = core.WireGuard()
+    wg.cache = core.QueryCache(dict.fromkeys(core._QUERY_TTL_S, 0.0))
+    return wg
+
+
+@benchmark("configs")
+def bench_configs(args: argparse.Namespace) -> list[Result]:
+    results = []
+    for count in _sizes(args, [10, 100, 1000, 10_000]):
+        write_configs(count)
+        repeat = 20 if count <= 1000 else 5
+        wg = _uncached()
+        assert len(wg.list_configs()) == count
+        results.append(
+            _stats("configs.list", {"configs": count}, measure(wg.list_configs, repeat))
+        )
+        results.append(
+            _stats(
+                "configs.scan_cold",
+                {"configs": count},
+                measure(lambda: _uncached().scan_configs(), repeat, 0),
+            )
+        )
+        wg.scan_configs()
+        results.append(
+            _stats("configs.scan_warm", {"configs": count}, measure(wg.scan_configs, repeat))
+        )
+    return results
+
+
+# ───────── bulk import ───────── #
+@benchmark("import")
+def bench_import(args: argparse.Namespace) -> list[Result]:
+    results = []
+    bundle = WORK / "bundle"
+    for count in _sizes(args, [100, 500, 2000]):
+        write_configs(count, bundle)
+        sources = {
+            "dir": bundle,
+            "zip": Path(shutil.make_archive(str(WORK / "bundle"), "zip", bundle)),
+            "tar": Path(shutil.make_archive(str(WORK / "bundle"), "gztar", bundle)),
+        }
+        for kind, source in sources.items():
+            wg = core.WireGuard()
+
+            def run() -> None:
+                write_configs(0)
+                report = wg.check_import(source)
+                assert len(wg.install_import(report)) == count
+
+            results.append(
+                _stats(
+                    "import.check_install",
+                    {"configs": count, "source": kind},
+                    measure(run, 5 if count <= 500 else 2, 0),
+                )
+            )
+    return results
+
+
+# ───────── connect engines ───────── #
+@benchmark("engine")
+def bench_engine(args: argparse.Namespace) -> list[Result]:
+    write_configs(1)
+    wg = core.WireGuard()
+    repeat = 10 if args.quick else 30
+    return [
+        _stats(
+            "engine.connect",
+            {"engine": engine, "wg_quick_forks": os.environ.get("FAKE_WG_QUICK_FORKS", "30")},
+            measure(lambda e=engine: wg.connect("site00000", engine=e), repeat),
+        )
+        for engine in core.WireGuard.ENGINES
+    ]
+
+
+# ───────── provisioning ───────── #
+@benchmark("provision")
+def bench_provision(args: argparse.Namespace) -> list[Result]:
+    """Keypairs and rendered client configs, minted in-process."""
+    import provisioning  # pylint: disable=import-outside-toplevel
+    from wg_config import parse_config  # pylint: disable=import-outside-toplevel
+
+    server = parse_config(
+        "[Interface]\nPrivateKey = "
+        + provisioning.generate_keypairs(1)[0].private_key
+        + "\nAddress = 10.64.0.1/16, fd64::1/64\nListenPort = 51820\n",
+        "server",
+    )
+    results = []
+    for count in _sizes(args, [10, 100, 1000]):
+        names = [f"peer{i}" for i in range(count)]
+        results.append(
+            _stats(
+                "provision.keypairs",
+                {"peers": count},
+                measure(lambda c=count: provisioning.generate_keypairs(c), 5),
+            )
+        )
+        results.append(
+            _stats(
+                "provision.configs",
+                {"peers": count},
+                measure(
+                    lambda n=names: provisioning.provision(
+                        server, n, "vpn.example.com:51820", keepalive=25
+                    ),
+                    5,
+                ),
+            )
+        )
+    return results
+
+
+# ───────── profiles ───────── #
+@benchmark("profile")
+def bench_profile(args: argparse.Namespace) -> list[Result]:
+    """Switch from N tunnels to N others: one at a time vs profiles.apply().
+
+    wg-quick is made to wait 100 ms per call, like a real one does on
+    netlink and DNS; the fake's forks alone would only measure the CPU.
+    """
+    import profiles  # pylint: disable=import-outside-toplevel
+
+    results = []
+    wg = core.WireGuard()
+    fakebin.delay_wg_quick(0.1)
+    for count in _sizes(args, [2, 4, 8]):
+        names = write_configs(2 * count)
+        old, new = names[:count], names[count:]
+        profile = profiles.Profile("bench", new)
+
+        def run(step: profiles.Step, cancel: threading.Event) -> None:
+            getattr(wg, step.action)(step.name, cancel)
+
+        def sequential() -> None:
+            for step in profiles.plan(profile, old, {}):
+                run(step, threading.Event())
+
+        def parallel() -> None:
+            assert profiles.apply(profiles.plan(profile, old, {}), run).ok
+
+        for mode, fn in (("sequential", sequential), ("parallel", parallel)):
+            results.append(
+                _stats(
+                    "profile.switch",
+                    {"tunnels": count, "mode": mode},
+                    measure(fn, 3 if args.quick else 10),
+                    helper_workers=core._HELPER_WORKERS,
+                )
+            )
+    fakebin.delay_wg_quick(0)
+    return results
+
+
+# ───────── Qt-dependent ───────── #
+def _qt_app():
+    try:
+        from PyQt6.QtWidgets import QApplication  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise Skip(f"PyQt6 not available: {exc}") from None
+    return QApplication.instance() or QApplication([])
+
+
+class _OfflineResolver:
+    """EndpointResolver stand-in: the popN.example.net endpoints do not exist."""
+
+    def stale(self, hosts) -> list[str]:
+        return []
+
+    def refresh(self, hosts) -> set[str]:
+        return set()
+
+    def addresses(self, hosts) -> dict[str, list[str]]:
+        return {}
+
+    def pinned(self, config, resolve: bool = True) -> dict[str, str]:
+        return {}
+
+
+class _OfflineProber:
+    """EndpointProber stand-in: nothing is pinged."""
+
+    def __init__(self, ttl: float = 0.0) -> None:
+        pass
+
+    def cached(self, hosts) -> dict:
+        return {}
+
+    def stale(self, hosts) -> list[str]:
+        return []
+
+    def probe(self, hosts, *args, **kwargs) -> dict:
+        return {}
+
+
+@contextlib.contextmanager
+def _offline_endpoints():
+    """No DNS lookups or ICMP probes from windows created inside."""
+    import endpoint_dns  # pylint: disable=import-outside-toplevel
+    import endpoint_probe  # pylint: disable=import-outside-toplevel
+
+    saved = endpoint_dns.EndpointResolver, endpoint_probe.EndpointProber
+    endpoint_dns.EndpointResolver = _OfflineResolver  # type: ignore[misc]
+    endpoint_probe.EndpointProber = _OfflineProber  # type: ignore[misc]
+    try:
+        yield
+    finally:
+        endpoint_dns.EndpointResolver, endpoint_probe.EndpointProber = saved
+
+
+def _dump(peers: int) -> str:
+    lines = ["wg0\tpriv\tpub\t51820\toff"]
+    lines += [
+        f"wg0\tpeer{i}\t(none)\t192.0.2.{i % 250}:51820\t10.0.{i % 250}.0/24"
+        f"\t{int(time.time())}\t{i * 1000}\t{i * 500}\t25"
+        for i in range(peers)
+    ]
+    return "\n".join(lines)
+
+
+@benchmark("telemetry")
+def bench_telemetry(args: argparse.Namespace) -> list[Result]:
+    app = _qt_app()
+    from telemetry import TelemetryStore  # pylint: disable=import-outside-toplevel
+
+    results = []
+    for peers in _sizes(args, [10, 100, 1000, 10_000]):
+        store, dump, now = TelemetryStore(), _dump(peers), [time.time()]
+
+        def ingest() -> None:
+            now[0] += 1
+            store.ingest(dump, now[0])
+
+        results.append(
+            _stats("telemetry.ingest", {"peers": peers}, measure(ingest, 50))
+        )
+    del app  # held until here, not collected right after _qt_app()
+    return results
+
+
+@benchmark("history")
+def bench_history(args: argparse.Namespace) -> list[Result]:
+    """Traffic history: queueing samples, the batched flush, chart reads."""
+    import traffic_history as th  # pylint: disable=import-outside-toplevel
+
+    directory = WORK / "history"
+    per_flush = int(th.FLUSH_INTERVAL_S / th.SAMPLE_INTERVAL_S)
+    results = []
+    for peers in _sizes(args, [1, 10, 100]):
+        samples = [(f"peer{i}", i * 1000, i * 500, 0) for i in range(peers)]
+        history, now = th.TunnelHistory(f"bench{peers}", directory), [time.time()]
+
+        def record(h=history, s=samples) -> None:
+            now[0] += th.SAMPLE_INTERVAL_S
+            h.record(now[0], s)
+
+        def flush(h=history) -> None:
+            for _ in range(per_flush):
+                record(h)
+            h.flush()
+
+        results.append(
+            _stats("history.record", {"peers": peers}, measure(record, 200))
+        )
+        results.append(
+            _stats(
+                "history.flush",
+                {"peers": peers, "samples": per_flush},
+                measure(flush, 10),
+                records=per_flush * peers + 3,  # + the open rollup buckets
+                flushes_per_hour=3600 / th.FLUSH_INTERVAL_S,
+            )
+        )
+        history.close()
+
+    # ten days at one sample a minute: the raw and minute rings wrap
+    history = th.TunnelHistory("full", directory)
+    start = int(time.time()) - 60 * th.CAPACITY["minute"] - 86400
+    for t in range(start, start + 86400 * 10, 60):
+        history.record(t, [("peer", t, t, t)])
+    history.close()
+    stat = (directory / "full.ring").stat()
+    for level in th.LEVELS:
+        results.append(
+            _stats(
+                "history.read",
+                {"level": level},
+                measure(lambda lv=level: th.read("full", lv, 0, directory), 20),
+                records=len(th.read("full", level, 0, directory)),
+                file_bytes=stat.st_size,
+                allocated_bytes=stat.st_blocks * 512,
+            )
+        )
+    return results
+
+
+@benchmark("gui")
+def bench_gui(args: argparse.Namespace) -> list[Result]:
+    app = _qt_app()
+    from gui import MainWindow  # pylint: disable=import-outside-toplevel
+
+    with _offline_endpoints():
+        win = MainWindow()
+    results = []
+    for rows in _sizes(args, [100, 1000, 5000]):
+        names = [f"site{i:05d}" for i in range(rows)]
+
+        def rebuild() -> None:
+            win._populate([])
+            win._populate(names)
+
+        results.append(_stats("gui.populate", {"rows": rows}, measure(rebuild, 5)))
+        grown = names + ["zz-new"]
+        flip = [names, grown]
+
+        def add_one() -> None:
+            flip.reverse()
+            win._populate(flip[0])
+
+        results.append(
+            _stats("gui.populate_one_added", {"rows": rows}, measure(add_one, 20))
+        )
+        states = [[names[0], names[-1]], [names[1]]]
+
+        def toggle() -> None:
+            states.reverse()
+            win._apply_status(states[0])
+
+        results.append(
+            _stats("gui.update_status", {"rows": rows}, measure(toggle, 20))
+        )
+    win.shutdown()
+    _spin(app, 30, lambda: not win.ops.busy)  # no worker may outlive the window
+    win.close()
+    return results
+
+
+def _rss_kib() -> int:
+    with open("/proc/self/status", encoding="ascii") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _ctx_switches() -> int:
+    with open("/proc/self/status", encoding="ascii") as fh:
+        return sum(
+            int(line.split()[1]) for line in fh if "ctxt_switches" in line
+        )
+
+
+def _spin(app, seconds: float, until: Callable[[], bool] = lambda: False) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not until():
+        app.processEvents()
+        time.sleep(0.005)
+
+
+@benchmark("tray")
+def bench_tray(args: argparse.Namespace) -> list[Result]:
+    """Idle footprint: window open vs closed to the tray, and status polls.
+
+    Polling is forced (no netlink) and its intervals are scaled down 30×,
+    so each run stands for 30 times its length; "fixed" is the old 3 s
+    timer, the others use the adaptive back-off.
+    """
+    app = _qt_app()
+    with _offline_endpoints():
+        return _bench_tray(args, app)
+
+
+def _bench_tray(args: argparse.Namespace, app) -> list[Result]:
+    import rtnetlink  # pylint: disable=import-outside-toplevel
+    import tray  # pylint: disable=import-outside-toplevel
+
+    results = []
+    write_configs(1000)
+    tray_core = tray.TrayCore()
+    start = time.perf_counter()
+    win = tray_core.show_window()
+    _spin(app, 30, lambda: not win.ops.busy and win.tunnels.rowCount() == 1000)
+    opened = time.perf_counter() - start
+    _spin(app, 0.5)
+    window_rss = _rss_kib()
+    start = time.perf_counter()
+    win.close()
+    _spin(app, 10, lambda: tray_core.window is None)
+    _spin(app, 0.5)  # deleteLater, then release_memory
+    results.append(
+        _stats(
+            "tray.footprint",
+            {"configs": 1000},
+            [(time.perf_counter() - start) * 1000],
+            open_ms=round(opened * 1000, 1),
+            window_rss_kib=window_rss,
+            tray_rss_kib=_rss_kib(),
+        )
+    )
+    tray_core.shutdown()
+    tray_core.monitor.stop()
+    tray_core.tray.hide()
+
+    seconds = 3.0 if args.quick else 8.0
+    scale = 30
+    open_link_events = rtnetlink.open_link_events
+
+    def no_netlink():
+        raise OSError("netlink disabled for the benchmark")
+
+    rtnetlink.open_link_events = no_netlink
+    try:
+        for mode in ("fixed", "window", "tray"):
+            tray_core = tray.TrayCore()
+            monitor = tray_core.monitor
+            monitor.poll_min_ms = 3_000 // scale
+            monitor.poll_max_ms = (
+                monitor.poll_min_ms if mode == "fixed" else 30_000 // scale
+            )
+            monitor.poll_hidden_max_ms = (
+                monitor.poll_max_ms if mode != "tray" else 300_000 // scale
+            )
+            monitor.poke()
+            if mode != "tray":
+                tray_core.show_window()
+                monitor.set_hidden(False)
+            polls: list[int] = []
+            monitor._polled.connect(lambda _names, p=polls: p.append(1))
+            _spin(app, 0.2)
+            polls.clear()
+            switches = _ctx_switches()
+            _spin(app, seconds)
+            simulated_h = seconds * scale / 3600
+            results.append(
+                _stats(
+                    "tray.idle_polls",
+                    {"mode": mode},
+                    [seconds * 1000],
+                    polls_per_hour=round(len(polls) / simulated_h),
+                    ctx_switches_per_hour=round(
+                        (_ctx_switches() - switches) / simulated_h
+                    ),
+                )
+            )
+            if tray_core.window is not None:
+                tray_core.window.close()  # _teardown waits for its operations
+                _spin(app, 30, lambda t=tray_core: t.window is None)
+            tray_core.shutdown()
+            monitor.stop()
+            tray_core.tray.hide()
+            tray_core.deleteLater()
+            _spin(app, 0.2)
+    finally:
+        rtnetlink.open_link_events = open_link_events
+    return results
+
+
+def _desktop_tree(root: Path, count: int) -> None:
+    shutil.rmtree(root, ignore_errors=True)
+    for i in range(count):
+        sub = root / f"vendor{i % 10}"
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"app{i}.desktop").write_text(
+            "[Desktop Entry]\nType=Application\n"
+            f"Name=Application {i} Viewer\nExec=/usr/bin/app{i} %U\nIcon=app{i}\n"
+        )
+
+
+@benchmark("launcher")
+def bench_launcher(args: argparse.Namespace) -> list[Result]:
+    app = _qt_app()
+    if importlib.util.find_spec("xdg") is None:
+        raise Skip("pyxdg not available")
+    # pylint: disable-next=import-outside-toplevel
+    from app_launcher import AppFilterProxy, AppListModel, DesktopIndex
+
+    results = []
+    for count in _sizes(args, [100, 1000, 5000]):
+        tree, cache = WORK / "apps", WORK / f"desktop-{count}.json"
+        _desktop_tree(tree, count)
+
+        def cold() -> None:
+            cache.unlink(missing_ok=True)
+            DesktopIndex([str(tree)], cache).refresh()
+
+        results.append(_stats("launcher.index_cold", {"apps": count}, measure(cold, 3, 0)))
+        results.append(
+            _stats(
+                "launcher.index_cached_load",
+                {"apps": count},
+                measure(lambda: DesktopIndex([str(tree)], cache).load(), 10),
+            )
+        )
+        index = DesktopIndex([str(tree)], cache)
+        index.load()
+        results.append(
+            _stats("launcher.index_warm_refresh", {"apps": count}, measure(index.refresh, 10))
+        )
+        model, proxy = AppListModel(), AppFilterProxy()
+        proxy.setSourceModel(model)
+        model.set_apps(index.apps())
+
+        def type_query() -> None:
+            proxy.reset_query()
+            for i in range(1, len("viewer 42") + 1):
+                proxy.set_query("viewer 42"[:i])
+
+        results.append(
+            _stats("launcher.filter_keystrokes", {"apps": count, "keys": 9}, measure(type_query, 10))
+        )
+    del app  # held until here, not collected right after _qt_app()
+    return results
+
+
+# ───────── driver ───────── #
+def _metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "-C", str(ROOT), "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def _result_key(result: Result) -> str:
+    return result["name"] + json.dumps(result.get("params", {}), sort_keys=True)
+
+
+def compare(base: dict, new: dict, threshold: float) -> int:
+    """Print mean-time deltas; return the number of regressions."""
+    before = {_result_key(r): r for r in base["results"] if "mean" in r}
+    regressions = 0
+    for result in new["results"]:
+        old = before.get(_result_key(result))
+        if old is None or "mean" not in result:
+            continue
+        change = (result["mean"] - old["mean"]) / old["mean"] if old["mean"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{_result_key(result):70} {old['mean']:10.3f} -> "
+            f"{result['mean']:10.3f} ms ({change:+.0%}){flag}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", type=Path, help="write JSON results here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to diff against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="regression threshold (0.2 = +20%%)"
+    )
+    parser.add_argument("--only", default="*", help="glob over benchmark groups")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    args = parser.parse_args()
+
+    report: dict[str, Any] = {"metadata": _metadata(), "results": []}
+    try:
+        for name, fn in _BENCHMARKS:
+            if not fnmatch.fnmatch(name, args.only):
+                continue
+            print(f"running {name}…", file=sys.stderr)
+            try:
+                report["results"].extend(fn(args))
+            except Skip as exc:
+                report["results"].append({"name": name, "skipped": str(exc)})
+    finally:
+        shutil.rmtree(WORK, ignore_errors=True)
+
+    for result in report["results"]:
+        if "skipped" in result:
+            print(f"{result['name']:40} skipped: {result['skipped']}")
+        else:
+            params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+            extra = f"  {result['ops_per_s']:.0f} ops/s" if "ops_per_s" in result else ""
+            print(
+                f"{result['name']:40} {params:32} mean {result['mean']:9.3f} ms"
+                f"  p95 {result['p95']:9.3f} ms{extra}"
+            )
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
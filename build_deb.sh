@@ -19,6 +19,7 @@ install -d \
   "$pkg_dir/DEBIAN" \
   "$pkg_dir/usr/share/${pkg}" \
   "$pkg_dir/usr/bin" \
+  "$pkg_dir/lib/systemd/system" \
   "$pkg_dir/usr/share/applications" \
   "$pkg_dir/usr/share/icons/hicolor/256x256/apps"
 
@@ -88,6 +89,28 @@ fi
 SCRIPT
 chmod 755 "$pkg_dir/usr/bin/${pkg}"
 
+# --------------------------------------------------------------------------- #
+#  общий root-демон (необязательный) и CLI-клиент к нему
+# --------------------------------------------------------------------------- #
+cat > "$pkg_dir/lib/systemd/system/${pkg}-daemon.service" <<UNIT
+[Unit]
+Description=WireGuard UI shared privileged daemon
+After=network.target
+
+[Service]
+ExecStart=/usr/bin/python3 /usr/share/${pkg}/src/wireguard_core.py --daemon
+Restart=on-failure
+
+[Install]
+WantedBy=multi-user.target
+UNIT
+
+cat > "$pkg_dir/usr/bin/${pkg}-ctl" <<'SCRIPT'
+#!/usr/bin/env bash
+exec python3 /usr/share/wireguard-ui/src/wg_ctl.py "$@"
+SCRIPT
+chmod 755 "$pkg_dir/usr/bin/${pkg}-ctl"
+
 # --------------------------------------------------------------------------- #
 #  .desktop‑файл
 # --------------------------------------------------------------------------- #
@@ -35,6 +35,14 @@ if ! $skip_user_setup && ! id -nG "$user" | grep -qw "$group"; then
     gpasswd -a "$user" "$group"
 fi
 
+# members may use the shared daemon (wireguard-ui-daemon.service), which
+# lets them bring tunnels up and install configs as root: nobody is added
+# here, that is for the administrator to decide
+daemon_group=wireguard-ui
+if ! getent group "$daemon_group" >/dev/null; then
+    groupadd --system "$daemon_group"
+fi
+
 gid=$(getent group "$group" | cut -d: -f3)
 
 if ! ip rule list | grep -q "uidrange $gid-$gid"; then
@@ -2,22 +2,39 @@
 # -*- coding: utf-8 -*-
 
 import os
-import glob
-import subprocess
+import json
+import re
+import threading
+from pathlib import Path
 from typing import NamedTuple
 
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSize,
+    QSortFilterProxyModel,
+    Qt,
+    pyqtSignal,
+)
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import (
     QDialog,
     QVBoxLayout,
+    QLabel,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QDialogButtonBox,
+    QMessageBox,
 )
 
-from xdg import DesktopEntry
+from bypass_pool import BypassPool, LaunchResult
+from xdg_paths import cache_dir
+
+APP_DIRS = [
+    "/usr/share/applications",
+    "/usr/local/share/applications",
+    os.path.expanduser("~/.local/share/applications"),
+]
 
 
 class AppInfo(NamedTuple):
@@ -26,13 +43,262 @@ class AppInfo(NamedTuple):
     icon: str | None
 
 
+def _parse_desktop_file(path: str) -> AppInfo | None:
+    """Parse one .desktop file; None if it should not be listed."""
+    from xdg import DesktopEntry  # pylint: disable=import-outside-toplevel
+
+    entry = DesktopEntry.DesktopEntry(path)
+    if entry.getNoDisplay() or entry.get("Hidden") == "true":
+        return None
+    if not entry.getExec() or entry.getTerminal():
+        return None
+    return AppInfo(
+        name=entry.getName(), exec_cmd=entry.getExec(), icon=entry.getIcon()
+    )
+
+
+class DesktopIndex:
+    """On-disk cache of parsed .desktop files keyed by path and mtime.
+
+    Stored as JSON under $XDG_CACHE_HOME/wireguard-ui.  A refresh stats every
+    file but only re-parses the ones that were added or changed.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, app_dirs: list[str] | None = None, cache_file: Path | None = None
+    ):
+        self.app_dirs = app_dirs if app_dirs is not None else APP_DIRS
+        self.cache_file = cache_file or cache_dir() / "desktop-index.json"
+        self._lock = threading.Lock()
+        # path -> (mtime_ns, AppInfo | None), in scan order (first name wins);
+        # None = parsed but not listed
+        self._entries: dict[str, tuple[int, AppInfo | None]] = {}
+
+    def load(self) -> list[AppInfo]:
+        """Read the cache file; returns the cached app list (may be empty)."""
+        try:
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        if data.get("version") != self.VERSION:
+            return []
+        entries = {}
+        for path, (mtime, app) in data.get("entries", {}).items():
+            entries[path] = (mtime, AppInfo(*app) if app else None)
+        with self._lock:
+            self._entries = entries
+        return self.apps()
+
+    def apps(self) -> list[AppInfo]:
+        """Visible apps, de-duplicated by name and sorted case-insensitively."""
+        with self._lock:
+            entries = dict(self._entries)
+        seen: set[str] = set()
+        apps = []
+        for _, app in entries.values():
+            if app is not None and app.name not in seen:
+                seen.add(app.name)
+                apps.append(app)
+        apps.sort(key=lambda x: x.name.lower())
+        return apps
+
+    def refresh(self) -> bool:
+        """Re-scan the app dirs; return True if anything changed."""
+        with self._lock:
+            old = dict(self._entries)
+        entries: dict[str, tuple[int, AppInfo | None]] = {}
+        changed = False
+        for path, mtime in self._scan():
+            cached = old.get(path)
+            if cached is not None and cached[0] == mtime:
+                entries[path] = cached
+                continue
+            changed = True
+            try:
+                entries[path] = (mtime, _parse_desktop_file(path))
+            except Exception:  # pylint: disable=broad-except
+                entries[path] = (mtime, None)
+        changed |= entries.keys() != old.keys()
+        with self._lock:
+            self._entries = entries
+        if changed:
+            self._save(entries)
+        return changed
+
+    def _scan(self):
+        """Yield (path, mtime_ns) of every .desktop file, dirs in APP_DIRS order."""
+        for app_dir in self.app_dirs:
+            stack = [app_dir] if os.path.isdir(app_dir) else []
+            while stack:
+                try:
+                    with os.scandir(stack.pop()) as it:
+                        entries = sorted(it, key=lambda e: e.name)
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            stack.append(entry.path)
+                        elif entry.name.endswith(".desktop"):
+                            yield entry.path, entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+
+    def _save(self, entries) -> None:
+        data = {
+            "version": self.VERSION,
+            "entries": {
+                path: [mtime, list(app) if app else None]
+                for path, (mtime, app) in entries.items()
+            },
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass  # the cache is an optimisation only
+
+
+_INDEX = DesktopIndex()
+
+# theme lookups are the slowest part of showing a row; keep them for the
+# whole session so reopening the dialog costs nothing
+_ICON_CACHE: dict[str, QIcon] = {}
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def match_score(
+    query: str, name: str, tokens: tuple[str, ...], initials: str = ""
+) -> int | None:
+    """Rank *name* against lowercase *query*; lower is better, None = no match.
+
+    0 name prefix, 1 word prefix or acronym ("vsc" → Visual Studio Code),
+    2 substring, 3+ in-order fuzzy match (penalised by how spread out the
+    matched characters are).
+    """
+    if name.startswith(query):
+        return 0
+    if initials.startswith(query) or any(t.startswith(query) for t in tokens):
+        return 1
+    if query in name:
+        return 2
+    pos = first = name.find(query[0])
+    if pos < 0:
+        return None
+    for char in query[1:]:
+        pos = name.find(char, pos + 1)
+        if pos < 0:
+            return None
+    return 3 + (pos - first + 1 - len(query))
+
+
+class AppListModel(QAbstractListModel):
+    """All launchable apps plus a precomputed lowercase/token search index."""
+
+    AppRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.apps: list[AppInfo] = []
+        self.lower: list[str] = []
+        self.tokens: list[tuple[str, ...]] = []
+        self.initials: list[str] = []
+
+    def set_apps(self, apps: list[AppInfo]):
+        self.beginResetModel()
+        self.apps = apps
+        self.lower = [app.name.lower() for app in apps]
+        self.tokens = [tuple(filter(None, _TOKEN_SPLIT.split(n))) for n in self.lower]
+        self.initials = ["".join(t[0] for t in tokens) for tokens in self.tokens]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):  # noqa: N802 (Qt override)
+        return 0 if parent.isValid() else len(self.apps)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        app = self.apps[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return app.name
+        if role == Qt.ItemDataRole.DecorationRole and app.icon:
+            # only asked for rows the view actually paints
+            icon = _ICON_CACHE.get(app.icon)
+            if icon is None:
+                icon = _ICON_CACHE[app.icon] = QIcon.fromTheme(app.icon)
+            return icon
+        if role == self.AppRole:
+            return app
+        return None
+
+
+class AppFilterProxy(QSortFilterProxyModel):
+    """Filters and ranks AppListModel rows by match_score."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._query = ""
+        self._scores: dict[int, int] = {}
+
+    def set_query(self, text: str):
+        query = text.strip().lower()
+        src: AppListModel = self.sourceModel()  # type: ignore[assignment]
+        rows = range(len(src.apps))
+        if query and self._query and query.startswith(self._query):
+            rows = self._scores.keys()  # narrowing: only re-check current hits
+        self._scores = (
+            {
+                row: score
+                for row in rows
+                if (
+                    score := match_score(
+                        query, src.lower[row], src.tokens[row], src.initials[row]
+                    )
+                )
+                is not None
+            }
+            if query
+            else {}
+        )
+        self._query = query
+        self.invalidate()
+        self.sort(0)
+
+    def reset_query(self):
+        """Forget cached hits; call after the source rows changed."""
+        self._query = ""
+        self._scores = {}
+
+    def filterAcceptsRow(self, row, _parent):  # noqa: N802 (Qt override)
+        return not self._query or row in self._scores
+
+    def lessThan(self, left, right):  # noqa: N802 (Qt override)
+        if self._query:
+            ls, rs = self._scores.get(left.row(), 0), self._scores.get(right.row(), 0)
+            if ls != rs:
+                return ls < rs
+        return left.row() < right.row()  # source order is alphabetical
+
+
+# one keeper sandbox per uplink, shared by every dialog of this process
+_POOL = BypassPool()
+
+
 class AppLauncherDialog(QDialog):
+    _apps_refreshed = pyqtSignal(list)
+    _pool_changed = pyqtSignal()  # from BypassPool threads
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Launch app outside VPN")
         self.setMinimumSize(400, 500)
 
         self.apps: list[AppInfo] = []
+        self.launched: LaunchResult | None = None
 
         # --- Layout & Widgets ---
         layout = QVBoxLayout(self)
@@ -42,10 +308,21 @@ class AppLauncherDialog(QDialog):
         self.search_input.textChanged.connect(self._filter_apps)
         layout.addWidget(self.search_input)
 
-        self.list_widget = QListWidget()
-        self.list_widget.setIconSize(QSize(32, 32))
-        self.list_widget.itemDoubleClicked.connect(self.accept)
-        layout.addWidget(self.list_widget)
+        self.model = AppListModel(self)
+        self.proxy = AppFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        self.list_view.setIconSize(QSize(32, 32))
+        # uniform rows: Qt sizes one item instead of asking every row (and icon)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.doubleClicked.connect(self.accept)
+        layout.addWidget(self.list_view)
+
+        self.pool_label = QLabel()
+        self.pool_label.setEnabled(False)  # rendered dimmed
+        self.pool_label.setWordWrap(True)
+        layout.addWidget(self.pool_label)
 
         button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok
@@ -55,110 +332,75 @@ class AppLauncherDialog(QDialog):
         button_box.rejected.connect(self.reject)
         layout.addWidget(button_box)
 
+        self._apps_refreshed.connect(self._on_apps_refreshed)
+        self._pool_changed.connect(self._show_pool_state)
+        _POOL.add_listener(self._forward_pool_change)
+        _POOL.start()  # warms the sandbox up while the user picks an app
+        self._show_pool_state()
         self._load_apps()
 
-    def _load_apps(self):
-        """Finds and loads all valid .desktop applications by scanning standard directories."""
-        self.apps = []
-        seen_apps = set()
-
-        app_dirs = [
-            "/usr/share/applications",
-            "/usr/local/share/applications",
-            os.path.expanduser("~/.local/share/applications"),
-        ]
-
-        desktop_files = []
-        for app_dir in app_dirs:
-            if not os.path.isdir(app_dir):
-                continue
+    def _forward_pool_change(self):
+        self._pool_changed.emit()  # into the GUI thread
 
-            pattern = os.path.join(app_dir, "**", "*.desktop")
-            desktop_files.extend(glob.glob(pattern, recursive=True))
+    def _show_pool_state(self):
+        self.pool_label.setText(_POOL.describe())
 
-        for path in desktop_files:
-            try:
-                entry = DesktopEntry.DesktopEntry(path)
-                name = entry.getName()
+    def done(self, result):
+        _POOL.remove_listener(self._forward_pool_change)
+        super().done(result)
 
-                if entry.getNoDisplay() or entry.get("Hidden") == "true":
-                    continue
-                if not entry.getExec():
-                    continue
-                if entry.getTerminal():
-                    continue
-                if name in seen_apps:
-                    continue
+    def _load_apps(self):
+        """Shows the cached app list at once and refreshes it in the background."""
+        self.apps = _INDEX.apps() or _INDEX.load()
+        self._populate_list(self.apps)
+        threading.Thread(
+            target=self._refresh_index, name="desktop-index", daemon=True
+        ).start()
 
-                seen_apps.add(name)
-                app_info = AppInfo(
-                    name=name,
-                    exec_cmd=entry.getExec(),
-                    icon=entry.getIcon(),
-                )
-                self.apps.append(app_info)
-            except Exception:
-                continue
+    def _refresh_index(self):
+        if _INDEX.refresh() or not self.apps:
+            try:
+                self._apps_refreshed.emit(_INDEX.apps())
+            except RuntimeError:
+                pass  # dialog already closed
 
-        self.apps.sort(key=lambda x: x.name.lower())
-        self._populate_list(self.apps)
+    def _on_apps_refreshed(self, apps: list[AppInfo]):
+        self.apps = apps
+        self._populate_list(apps)
 
-    def _populate_list(self, apps_to_show: list[AppInfo]):
-        """Clears and fills the list widget with given apps."""
-        self.list_widget.clear()
-        for app in apps_to_show:
-            item = QListWidgetItem(app.name)
-            item.setData(Qt.ItemDataRole.UserRole, app)
-            if app.icon:
-                item.setIcon(QIcon.fromTheme(app.icon))
-            self.list_widget.addItem(item)
+    def _populate_list(self, apps: list[AppInfo]):
+        """Replaces the model contents and re-applies the current search."""
+        self.proxy.reset_query()
+        self.model.set_apps(apps)
+        self._filter_apps(self.search_input.text())
 
     def _filter_apps(self, text: str):
-        """Filters the list widget based on the search input."""
-        query = text.lower()
-        if not query:
-            self._populate_list(self.apps)
-            return
-
-        filtered_apps = [app for app in self.apps if query in app.name.lower()]
-        self._populate_list(filtered_apps)
+        """Filters and ranks the list based on the search input."""
+        self.proxy.set_query(text)
+        if self.proxy.rowCount():
+            self.list_view.setCurrentIndex(self.proxy.index(0, 0))
 
     def _get_selected_app_command(self) -> str | None:
         """Returns the cleaned command of the selected application."""
-        selected_items = self.list_widget.selectedItems()
-        if not selected_items:
+        index = self.list_view.currentIndex()
+        if not index.isValid():
             return None
 
-        app_info: AppInfo = selected_items[0].data(Qt.ItemDataRole.UserRole)
+        app_info: AppInfo = index.data(AppListModel.AppRole)
         # Clean up the exec command, removing placeholders like %U, %f, etc.
         # We just take the first part of the command, which is usually the executable.
         base_command = app_info.exec_cmd.split(" ")[0]
         return base_command
 
     @staticmethod
-    def launch_app(app_command: str) -> None:
+    def launch_app(app_command: str) -> LaunchResult | None:
         """
-        Launches the given application command outside the VPN using a predefined
-        shell command structure.
+        Launches the given application command outside the VPN: joined into
+        the pool's ready sandbox, or in a fresh firejail one while it warms up.
         """
         if not app_command:
-            return
-
-        # Using the command structure you provided
-        command = f"""
-        sg novpn -c '
-        IF=$(ip -o -4 route show default table main | awk "{{print \$5}}"); \
-        firejail --noprofile --net=$IF --dns=1.1.1.1 {app_command}
-        '
-        """
-        # We use Popen to run in the background without blocking the GUI
-        # shell=True is required for the complex command with pipes and command substitution
-        subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+            return None
+        return _POOL.launch([app_command])
 
     def exec(self) -> int:
         """
@@ -167,6 +409,10 @@ class AppLauncherDialog(QDialog):
         if super().exec() == QDialog.DialogCode.Accepted:
             app_command = self._get_selected_app_command()
             if app_command:
-                self.launch_app(app_command)
+                try:
+                    self.launched = self.launch_app(app_command)
+                except (OSError, RuntimeError) as exc:
+                    QMessageBox.warning(self, "Launch app outside VPN", str(exc))
+                    return QDialog.DialogCode.Rejected
                 return QDialog.DialogCode.Accepted
         return QDialog.DialogCode.Rejected
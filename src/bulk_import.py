@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Bulk import of config bundles: a directory, a .zip or a tar archive.
+
+collect() pulls every *.conf out of the bundle, check() validates them all
+and cross-checks them against each other and the installed configs, and
+the caller installs ImportReport.installable() in one privileged
+transaction (the helper's "install_configs" op).
+
+Parsing is cheap (~0.1 ms per config), so small bundles are checked on the
+calling thread; only large ones are spread over a process pool, which
+costs more to start than it saves below a few thousand configs.  Its
+workers are spawned, not forked: a fork of the threaded GUI process could
+inherit a lock held by another thread and hang.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Final, Iterable, Iterator
+
+from wg_config import ConfigError, ConfigIndex, parse_config
+
+MAX_CONFIG_BYTES: Final[int] = 64 * 1024
+MAX_CONFIGS: Final[int] = 10_000
+# wg-quick's own rule: the interface name must fit IFNAMSIZ
+_IMPORT_NAME: Final[re.Pattern[str]] = re.compile(r"^[A-Za-z0-9_.-]{1,15}$")
+_PARALLEL_MIN: Final[int] = 2_000
+_CHUNK: Final[int] = 256
+# (name, origin, raw bytes); None or the read error instead of unusable bytes
+Member = tuple[str, str, "bytes | str | None"]
+
+
+class ImportCandidate:
+    """One config from the bundle that parsed cleanly."""
+
+    __slots__ = ("name", "origin", "text", "private_key", "addresses")
+
+    def __init__(
+        self,
+        name: str,
+        origin: str,
+        text: str,
+        private_key: str | None,
+        addresses: tuple[str, ...],
+    ) -> None:
+        self.name = name
+        self.origin = origin  # path inside the bundle, for messages
+        self.text = text
+        self.private_key = private_key
+        self.addresses = addresses
+
+
+class ImportReport:
+    """Outcome of check(): what can be installed and what cannot, and why."""
+
+    def __init__(self) -> None:
+        self.accepted: list[ImportCandidate] = []
+        self.conflicts: list[ImportCandidate] = []  # name already installed
+        self.rejected: list[tuple[str, str]] = []  # (origin, reason)
+        self.warnings: list[str] = []
+
+    def installable(self, overwrite: bool = False) -> list[ImportCandidate]:
+        return self.accepted + self.conflicts if overwrite else list(self.accepted)
+
+    def summary(self) -> str:
+        parts = [f"{len(self.accepted)} new config(s) ready to install"]
+        if self.conflicts:
+            parts.append(f"{len(self.conflicts)} already installed")
+        if self.rejected:
+            parts.append(f"{len(self.rejected)} rejected")
+        if self.warnings:
+            parts.append(f"{len(self.warnings)} warning(s)")
+        return ", ".join(parts) + "."
+
+    def details(self) -> str:
+        lines = []
+        if self.conflicts:
+            lines.append("Already installed:")
+            lines += [f"  {c.name} ({c.origin})" for c in self.conflicts]
+        if self.rejected:
+            lines.append("Rejected:")
+            lines += [f"  {origin}: {reason}" for origin, reason in self.rejected]
+        if self.warnings:
+            lines.append("Warnings:")
+            lines += [f"  {w}" for w in self.warnings]
+        return "\n".join(lines)
+
+
+# ───────── reading bundles ───────── #
+def _wanted(member: str) -> str | None:
+    """Tunnel name for a bundle member, or None to skip it silently."""
+    path = PurePosixPath(member.replace("\\", "/"))
+    if path.suffix != ".conf" or path.name.startswith(".") or "__MACOSX" in path.parts:
+        return None
+    return path.stem
+
+
+def _from_dir(root: Path) -> Iterator[Member]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            name = _wanted(filename)
+            if name is None:
+                continue
+            path = Path(dirpath) / filename
+            origin = str(path.relative_to(root))
+            try:
+                if path.is_symlink() or not path.is_file():
+                    yield name, origin, None
+                elif path.stat().st_size > MAX_CONFIG_BYTES:
+                    yield name, origin, None
+                else:
+                    yield name, origin, path.read_bytes()
+            except OSError as exc:  # e.g. not readable: reject just this one
+                yield name, origin, exc.strerror or str(exc)
+
+
+def _from_zip(archive: Path) -> Iterator[Member]:
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = _wanted(info.filename)
+            if name is None or info.is_dir():
+                continue
+            if info.file_size > MAX_CONFIG_BYTES:
+                yield name, info.filename, None
+            else:
+                yield name, info.filename, zf.read(info)
+
+
+def _from_tar(archive: Path) -> Iterator[Member]:
+    with tarfile.open(archive) as tf:
+        for member in tf:
+            name = _wanted(member.name)
+            if name is None or member.isdir():
+                continue
+            if not member.isreg() or member.size > MAX_CONFIG_BYTES:
+                yield name, member.name, None  # links, devices, oversized
+                continue
+            fh = tf.extractfile(member)
+            yield name, member.name, fh.read() if fh else None
+
+
+def collect(source: Path) -> list[Member]:
+    """(name, origin, raw bytes) for each *.conf in *source*; instead of the
+    bytes, None for a member that is not a regular file or too large, or the
+    reason it could not be read.
+
+    Only the file name of a member is used, never its path, so archives
+    cannot write outside /etc/wireguard.
+    """
+    if source.is_dir():
+        reader = _from_dir(source)
+    elif zipfile.is_zipfile(source):
+        reader = _from_zip(source)
+    elif tarfile.is_tarfile(source):
+        reader = _from_tar(source)
+    else:
+        raise ValueError(f"{source.name}: not a directory, zip or tar archive")
+    items = []
+    for item in reader:
+        items.append(item)
+        if len(items) > MAX_CONFIGS:
+            raise ValueError(f"More than {MAX_CONFIGS} configs in {source.name}")
+    return items
+
+
+# ───────── validation ───────── #
+def _check_one(item: Member) -> ImportCandidate | tuple[str, str]:
+    """Parse one member; return a candidate or (origin, reason)."""
+    name, origin, raw = item
+    if raw is None:
+        return origin, f"not a regular file or larger than {MAX_CONFIG_BYTES} bytes"
+    if isinstance(raw, str):
+        return origin, f"cannot read: {raw}"
+    if not _IMPORT_NAME.fullmatch(name):
+        return origin, "name must be 1-15 characters of A-Z a-z 0-9 _ . -"
+    try:
+        text = raw.decode("utf-8")
+        cfg = parse_config(text, name)
+    except UnicodeDecodeError:
+        return origin, "not UTF-8 text"
+    except ConfigError as exc:
+        return origin, str(exc)
+    return ImportCandidate(
+        name, origin, text, cfg.interface.private_key, cfg.interface.addresses
+    )
+
+
+def _check_all(items: list[Member]) -> Iterable[ImportCandidate | tuple[str, str]]:
+    if len(items) < _PARALLEL_MIN or (os.cpu_count() or 1) < 2:
+        return map(_check_one, items)
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_check_one, items, chunksize=_CHUNK))
+
+
+def check(items: list[Member], installed: ConfigIndex) -> ImportReport:
+    """Validate *items* and cross-check them against *installed*."""
+    report = ImportReport()
+    candidates: list[ImportCandidate] = []
+    for result in _check_all(items):
+        if isinstance(result, ImportCandidate):
+            candidates.append(result)
+        else:
+            report.rejected.append(result)
+
+    # the same interface name twice in one bundle: nothing says which wins
+    origins: dict[str, list[str]] = {}
+    for cand in candidates:
+        origins.setdefault(cand.name, []).append(cand.origin)
+    existing = set(installed.names())
+    keys: dict[str, str] = {}
+    addresses: dict[str, str] = {}
+    for name in existing:
+        cfg = installed.get(name)
+        if cfg is None:
+            continue
+        if cfg.interface.private_key:
+            keys[cfg.interface.private_key] = name
+        for addr in cfg.interface.addresses:
+            addresses[addr] = name
+    for cand in candidates:
+        if len(origins[cand.name]) > 1:
+            others = ", ".join(o for o in origins[cand.name] if o != cand.origin)
+            report.rejected.append(
+                (cand.origin, f"duplicate interface name, also in {others}")
+            )
+            continue
+        (report.conflicts if cand.name in existing else report.accepted).append(cand)
+        if cand.private_key:
+            other = keys.setdefault(cand.private_key, cand.name)
+            if other != cand.name:
+                report.warnings.append(f"{cand.name}: same PrivateKey as {other}")
+        for addr in cand.addresses:
+            other = addresses.setdefault(addr, cand.name)
+            if other != cand.name:
+                report.warnings.append(
+                    f"{cand.name}: Address {addr} also used by {other}"
+                )
+    report.rejected.sort()
+    return report
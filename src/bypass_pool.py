@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Split-tunnel ("outside VPN") launches through pre-started sandboxes.
+
+A cold launch, ``firejail --net=IF``, builds a network namespace with a
+macvlan on the uplink for every app, which takes a second or more.
+BypassPool instead keeps a keeper sandbox (``sleep infinity``) running for
+the current uplink and launches apps with ``firejail --join``, which only
+enters the existing namespaces.
+
+The keeper's address and gateway are fixed when it starts, so keepers are
+keyed by (interface, gateway) of the main table's default route, which is
+followed through rtnetlink.  A keeper outlives the GUI: apps launched
+into it live in its PID namespace and would die with it.  Keepers for
+routes that are gone are shut down once nothing else runs in them, and a
+keeper left by an earlier session is simply joined again.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import shlex
+import subprocess
+import threading
+import time
+import zlib
+from typing import Callable, Final
+
+import rtnetlink
+
+GROUP: Final[str] = "novpn"  # see install.sh: main-table routing for its gid
+DNS: Final[str] = "1.1.1.1"
+_PREFIX: Final[str] = f"wgui-bypass-{os.getuid()}-"
+_READY_TIMEOUT_S: Final[float] = 15.0
+_READY_POLL_S: Final[float] = 0.2
+_ROUTE_SETTLE_S: Final[float] = 0.5  # routes change in bursts (DHCP, roaming)
+_ROUTE_POLL_S: Final[float] = 5.0  # without netlink
+_LAUNCH_WATCH_S: Final[float] = 10.0
+_KEEPER_COMMANDS: Final[frozenset[str]] = frozenset({"firejail", "sleep", "ps"})
+
+
+class LaunchResult:
+    """How one app was started and how long until its process existed."""
+
+    __slots__ = ("command", "uplink", "pooled", "elapsed")
+
+    def __init__(self, command: str, uplink: str, pooled: bool) -> None:
+        self.command = command
+        self.uplink = uplink
+        self.pooled = pooled
+        self.elapsed: float | None = None  # None: not seen within the watch
+
+
+def _sandbox_name(uplink: str, gateway: str | None) -> str:
+    # firejail names are global; the gateway stands for the keeper's subnet
+    return f"{_PREFIX}{uplink}-{zlib.crc32((gateway or '').encode()):08x}"
+
+
+def _firejail(*args: str, timeout: float = 5.0) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["firejail", "--quiet", *args],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=False,
+    )
+
+
+def _running_sandboxes() -> set[str]:
+    """Names of our keeper sandboxes, from `firejail --list` (pid:user:name:cmd)."""
+    try:
+        out = _firejail("--list").stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return set()
+    names = set()
+    for line in out.splitlines():
+        fields = line.split(":", 3)
+        if len(fields) == 4 and fields[2].startswith(_PREFIX):
+            names.add(fields[2])
+    return names
+
+
+def _joinable(name: str) -> bool:
+    try:
+        return _firejail(f"--join={name}", "true").returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def _idle(name: str) -> bool:
+    """True if nothing but the keeper itself runs in sandbox *name*."""
+    try:
+        proc = _firejail(f"--join={name}", "ps", "-A", "-o", "comm=")
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return proc.returncode == 0 and set(proc.stdout.split()) <= _KEEPER_COMMANDS
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="ascii") as fh:
+            return [int(p) for p in fh.read().split()]
+    except OSError:
+        return []
+
+
+def _spawned(root: int, comm: str) -> bool:
+    """True once a process named *comm* runs below *root*."""
+    todo = _children(root)
+    while todo:
+        pid = todo.pop()
+        try:
+            with open(f"/proc/{pid}/comm", encoding="utf-8") as fh:
+                if fh.read().strip() == comm:
+                    return True
+        except OSError:
+            continue
+        todo += _children(pid)
+    return False
+
+
+class BypassPool:
+    """Keeps a joinable sandbox for the current uplink; see the module doc."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.uplink: str | None = None
+        self.sandbox: str | None = None  # joinable keeper for self.uplink
+        self.warmup: float | None = None  # seconds the keeper took to start
+        self.last_launch: LaunchResult | None = None
+        self._known: set[str] = set()  # keepers that may need shutting down
+        self._listeners: list[Callable[[], None]] = []
+        self._started = False
+
+    # ───────── state ───────── #
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """*listener* runs on a pool thread whenever the state changes."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+    def describe(self) -> str:
+        """One status line for the launcher dialog."""
+        if self.uplink is None and not self._started:
+            return "Checking uplink…"
+        if self.uplink is None:
+            return "No default route: apps cannot be launched outside the VPN."
+        parts = [f"Uplink: {self.uplink}"]
+        if self.sandbox is None:
+            parts.append("preparing sandbox…")
+        elif self.warmup is not None:
+            parts.append(f"sandbox ready (started in {self.warmup:.1f} s)")
+        else:
+            parts.append("sandbox ready")
+        launch = self.last_launch
+        if launch is not None and launch.elapsed is not None:
+            how = "pooled" if launch.pooled else "cold"
+            parts.append(f"last launch {launch.elapsed * 1000:.0f} ms ({how})")
+        return " · ".join(parts)
+
+    # ───────── keepers ───────── #
+    def start(self) -> None:
+        """Start following the default route (once; later calls do nothing)."""
+        if self._started:
+            return
+        self._started = True
+        self._known = _running_sandboxes()
+        threading.Thread(target=self._watch, name="bypass-pool", daemon=True).start()
+
+    def _watch(self) -> None:
+        self._sync()
+        try:
+            sock = rtnetlink.open_route_events()
+        except OSError:
+            while True:
+                time.sleep(_ROUTE_POLL_S)
+                self._sync()
+        while True:
+            select.select([sock], [], [])
+            time.sleep(_ROUTE_SETTLE_S)
+            while True:
+                try:
+                    sock.recv(64 * 1024)
+                except BlockingIOError:
+                    break
+                except OSError:  # ENOBUFS: the re-check below covers it
+                    break
+            self._sync()
+
+    def _sync(self) -> None:
+        try:
+            route = rtnetlink.default_route()
+        except OSError:
+            route = None
+        name = _sandbox_name(*route) if route else None
+        with self._lock:
+            if route is not None and self.uplink == route[0] and self.sandbox == name:
+                return
+            self.uplink = route[0] if route else None
+            self.sandbox = None
+            self.warmup = None
+        self._notify()
+        if name is not None:
+            self._ensure_keeper(name, route[0])
+        for stale in self._known - {name}:
+            if _idle(stale):
+                _firejail(f"--shutdown={stale}")
+                self._known.discard(stale)
+
+    def _ensure_keeper(self, name: str, uplink: str) -> None:
+        started = time.perf_counter()
+        warmup = None
+        if not _joinable(name):  # else left running by an earlier session
+            self._known.add(name)
+            subprocess.Popen(
+                [
+                    "sg",
+                    GROUP,
+                    "-c",
+                    shlex.join(
+                        [
+                            "firejail",
+                            "--quiet",
+                            "--noprofile",
+                            f"--name={name}",
+                            f"--net={uplink}",
+                            f"--dns={DNS}",
+                            "sleep",
+                            "infinity",
+                        ]
+                    ),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,  # survives the GUI, see module doc
+            )
+            deadline = started + _READY_TIMEOUT_S
+            while not _joinable(name):
+                if time.perf_counter() > deadline:
+                    return  # launches stay cold
+                time.sleep(_READY_POLL_S)
+            warmup = time.perf_counter() - started
+        with self._lock:
+            if self.uplink != uplink:
+                return  # the route moved on meanwhile
+            self.sandbox = name
+            self.warmup = warmup
+        self._notify()
+
+    # ───────── launching ───────── #
+    def launch(self, argv: list[str]) -> LaunchResult:
+        """Start *argv* outside the VPN; joins the keeper when it is ready."""
+        with self._lock:
+            uplink, sandbox = self.uplink, self.sandbox
+        if uplink is None:
+            uplink = (rtnetlink.default_route() or (None, None))[0]
+            if uplink is None:
+                raise RuntimeError("No default route in the main table.")
+        started = time.perf_counter()
+        if sandbox is not None:
+            cmd = ["firejail", "--quiet", f"--join={sandbox}", *argv]
+        else:
+            firejail = ["firejail", "--noprofile", f"--net={uplink}", f"--dns={DNS}"]
+            cmd = ["sg", GROUP, "-c", shlex.join(firejail + argv)]
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        result = LaunchResult(os.path.basename(argv[0]), uplink, sandbox is not None)
+        self.last_launch = result
+        threading.Thread(
+            target=self._time_launch,
+            args=(proc, result, started),
+            name="bypass-launch",
+            daemon=True,
+        ).start()
+        return result
+
+    def _time_launch(
+        self, proc: subprocess.Popen, result: LaunchResult, started: float
+    ) -> None:
+        """Wait until the app's own process shows up, for the latency figure."""
+        comm = result.command[:15]  # /proc/PID/comm is truncated to TASK_COMM_LEN
+        deadline = started + _LAUNCH_WATCH_S
+        while time.perf_counter() < deadline and proc.poll() is None:
+            if _spawned(proc.pid, comm):
+                result.elapsed = time.perf_counter() - started
+                break
+            time.sleep(0.002)
+        self._notify()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Config editor: the text of one tunnel, saved back through the helper.
+
+Nothing is opened or spawned as root: the text is read and installed with
+the helper's read_config and atomic_install ops, so this works the same
+with a private helper and with the shared daemon.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from PyQt6.QtGui import QFontDatabase
+from PyQt6.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QMessageBox,
+    QPlainTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+class ConfigEditor(QDialog):
+    """Edits *text*; Save hands it to *save*, which raises if it is refused."""
+
+    def __init__(
+        self,
+        name: str,
+        text: str,
+        save: Callable[[str], None],
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle(f"WireGuard config: {name}")
+        self.resize(640, 480)
+        self._save = save
+
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.text.setPlainText(text)
+        layout.addWidget(self.text, 1)
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Save
+            | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self._on_save)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _on_save(self) -> None:
+        try:
+            self._save(self.text.toPlainText())
+        except Exception as e:  # pylint: disable=broad-except
+            # keep the dialog and the edits: the user fixes and saves again
+            QMessageBox.warning(self, "WireGuard", f"Not saved.\n{e}")
+            return
+        self.accept()
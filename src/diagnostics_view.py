@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Diagnostics window: per-command latency and error counts from metrics."""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Callable, Final
+
+from PyQt6.QtCore import QSettings, QTimer
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+import metrics
+from wireguard_core import _QUERY_CACHE
+
+_COLUMNS: Final[list[str]] = [
+    "Command",
+    "Calls",
+    "Errors",
+    "Queue p95",
+    "IPC p95",
+    "Spawn p95",
+    "Exec p95",
+    "Total p50",
+    "Total p95",
+    "Total max",
+]
+# (phase, quantile key) for the latency columns, in _COLUMNS order
+_LATENCY_COLS: Final[list[tuple[str, str]]] = [
+    ("queue", "p95_ms"),
+    ("ipc", "p95_ms"),
+    ("spawn", "p95_ms"),
+    ("exec", "p95_ms"),
+    ("total", "p50_ms"),
+    ("total", "p95_ms"),
+    ("total", "max_ms"),
+]
+
+
+def _format_ms(value: float | None) -> str:
+    if value is None:
+        return "–"
+    return f"{value:.2f} ms" if value < 10 else f"{value:.0f} ms"
+
+
+class DiagnosticsDialog(QDialog):
+    """Live view of metrics.REGISTRY; *on_settings* re-applies the settings."""
+
+    def __init__(
+        self,
+        settings: QSettings,
+        on_settings: Callable[[], None],
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("WireGuard diagnostics")
+        self.resize(820, 340)
+        self.settings = settings
+        self.on_settings = on_settings
+
+        layout = QVBoxLayout(self)
+        self.enabled_box = QCheckBox("Record command timings")
+        self.enabled_box.setChecked(metrics.ENABLED)
+        self.enabled_box.toggled.connect(self._set_enabled)
+        layout.addWidget(self.enabled_box)
+
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        layout.addWidget(self.table)
+
+        textfile_row = QHBoxLayout()
+        textfile_row.addWidget(QLabel("Prometheus textfile:"))
+        self.textfile_edit = QLineEdit(
+            str(settings.value("diagnostics/textfile", ""))
+        )
+        self.textfile_edit.setPlaceholderText(
+            "/var/lib/node_exporter/textfile_collector/wireguard_ui.prom"
+        )
+        self.textfile_edit.editingFinished.connect(self._set_textfile)
+        textfile_row.addWidget(self.textfile_edit)
+        layout.addLayout(textfile_row)
+
+        buttons = QHBoxLayout()
+        self.status = QLabel()
+        buttons.addWidget(self.status, 1)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self._reset)
+        buttons.addWidget(reset_btn)
+        save_btn = QPushButton("Save JSON…")
+        save_btn.clicked.connect(self._save_json)
+        buttons.addWidget(save_btn)
+        layout.addLayout(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self._render)
+
+    def showEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        self.enabled_box.setChecked(metrics.ENABLED)
+        self._render()
+        self._timer.start()  # refresh only while the window is open
+        super().showEvent(event)
+
+    def done(self, result: int) -> None:
+        self._timer.stop()
+        super().done(result)
+
+    def _set_enabled(self, enabled: bool) -> None:
+        self.settings.setValue("diagnostics/metrics", enabled)
+        self.on_settings()
+        self._render()
+
+    def _set_textfile(self) -> None:
+        path = self.textfile_edit.text().strip()
+        if path == str(self.settings.value("diagnostics/textfile", "")):
+            return
+        if path:
+            self.settings.setValue("diagnostics/textfile", path)
+        else:
+            self.settings.remove("diagnostics/textfile")
+        self.on_settings()
+
+    def _reset(self) -> None:
+        metrics.REGISTRY.reset()
+        self._render()
+
+    def _save_json(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save metrics", "wireguard-ui-metrics.json", "JSON (*.json)"
+        )
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(metrics.REGISTRY.snapshot(), fh, indent=2)
+
+    def _render(self) -> None:
+        snap = metrics.REGISTRY.snapshot()
+        commands = snap["commands"]
+        if self.table.rowCount() != len(commands):
+            self.table.setRowCount(len(commands))
+            for row in range(len(commands)):
+                for col in range(len(_COLUMNS)):
+                    if self.table.item(row, col) is None:
+                        self.table.setItem(row, col, QTableWidgetItem())
+        for row, (kind, entry) in enumerate(commands.items()):
+            phases = entry["phases"]
+            calls = max((p["count"] for p in phases.values()), default=0)
+            values = [kind, str(calls), str(sum(entry["errors"].values()))]
+            for phase, key in _LATENCY_COLS:
+                hist = phases.get(phase)
+                values.append(_format_ms(hist[key] if hist else None))
+            for col, text in enumerate(values):
+                item = self.table.item(row, col)
+                if item is not None and item.text() != text:
+                    item.setText(text)
+            errors = ", ".join(f"{k}: {v}" for k, v in entry["errors"].items())
+            self.table.item(row, 2).setToolTip(errors)
+        since = time.strftime("%H:%M:%S", time.localtime(snap["since"]))
+        state = "recording" if snap["enabled"] else "off"
+        cache = _QUERY_CACHE.stats()
+        hits = sum(c["hits"] for c in cache.values())
+        misses = sum(c["misses"] for c in cache.values())
+        self.status.setText(
+            f"{state}, since {since} · query cache: {hits} hits, {misses} misses"
+            f" · SIGUSR1 writes {metrics.DUMP_FILE}"
+        )
+        self.status.setToolTip(
+            "\n".join(
+                f"{kind}: {c['hits']} hits, {c['misses']} misses"
+                for kind, c in cache.items()
+            )
+        )
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Endpoint hostname pre-resolution with a TTL-honouring cache (no Qt).
+
+wg-quick resolves the Endpoint of each peer one after the other while it
+brings the tunnel up, after it may already have changed resolv.conf.
+EndpointResolver resolves the hosts of all configs ahead of time, in
+parallel from one asyncio loop, so connect can hand the helper literal
+addresses (see pinned()), and tells which records changed since the last
+look so running peers can be pointed at the new address.
+
+getaddrinfo() does not report TTLs, so A and AAAA records are queried
+directly from the resolv.conf nameservers with a minimal stub resolver.
+Names in /etc/hosts, single-label names and anything the stub cannot
+answer (truncated replies, no nameserver) go through getaddrinfo() and
+are kept for _FALLBACK_TTL_S.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Final, Iterable
+
+from wg_config import WgConfig, join_endpoint, split_endpoint
+
+_RESOLV_CONF: Final[Path] = Path("/etc/resolv.conf")
+_HOSTS: Final[Path] = Path("/etc/hosts")
+_CONCURRENCY: Final[int] = 32
+_TIMEOUT_S: Final[float] = 2.0
+_MIN_TTL_S: Final[float] = 10.0
+_MAX_TTL_S: Final[float] = 3600.0
+_FALLBACK_TTL_S: Final[float] = 300.0
+_NEGATIVE_TTL_S: Final[float] = 30.0
+_TYPE_A: Final[int] = 1
+_TYPE_AAAA: Final[int] = 28
+_HEADER: Final[struct.Struct] = struct.Struct("!HHHHHH")
+_RR: Final[struct.Struct] = struct.Struct("!HHIH")  # type, class, ttl, rdlength
+
+
+class Resolution:
+    """Addresses of one host (IPv4 first) and until when they are valid."""
+
+    __slots__ = ("host", "addresses", "expires", "error")
+
+    def __init__(
+        self,
+        host: str,
+        addresses: tuple[str, ...] = (),
+        ttl: float = _NEGATIVE_TTL_S,
+        error: str | None = None,
+    ) -> None:
+        self.host = host
+        self.addresses = addresses
+        self.expires = time.monotonic() + min(max(ttl, _MIN_TTL_S), _MAX_TTL_S)
+        self.error = error
+
+
+def _is_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _ordered(addresses: Iterable[str]) -> tuple[str, ...]:
+    """Unique addresses, IPv4 before IPv6, as most uplinks have no IPv6."""
+    unique = dict.fromkeys(addresses)
+    return tuple(sorted(unique, key=lambda a: ipaddress.ip_address(a).version))
+
+
+# ───────── system configuration ───────── #
+def _nameservers() -> list[str]:
+    try:
+        text = _RESOLV_CONF.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return []
+    servers = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[0] == "nameserver" and _is_literal(fields[1]):
+            servers.append(fields[1])
+    return servers[:3]  # glibc's MAXNS
+
+
+def _hosts_file() -> set[str]:
+    """Names listed in /etc/hosts; those must not bypass nsswitch."""
+    try:
+        text = _HOSTS.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return set()
+    names = set()
+    for line in text.splitlines():
+        names.update(n.lower() for n in line.split("#", 1)[0].split()[1:])
+    return names
+
+
+# ───────── stub resolver ───────── #
+def _query(host: str, qtype: int) -> tuple[int, bytes]:
+    qid = int.from_bytes(os.urandom(2), "big")
+    qname = b"".join(
+        bytes([len(label)]) + label
+        for label in host.rstrip(".").encode("idna").split(b".")
+    )
+    header = _HEADER.pack(qid, 0x0100, 1, 0, 0, 0)  # RD, one question
+    return qid, header + qname + b"\0" + struct.pack("!HH", qtype, 1)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:  # compression pointer ends the name
+            return offset + 2
+        offset += 1 + length
+        if length == 0:
+            return offset
+
+
+def _parse(data: bytes, qid: int, qtype: int) -> tuple[list[str], float] | None:
+    """(addresses, min TTL) from a reply; None if it cannot be used."""
+    if len(data) < _HEADER.size:
+        return None
+    rid, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+    if rid != qid or not flags & 0x8000 or flags & 0x0200:  # not a reply, or TC
+        return None
+    rcode = flags & 0x000F
+    if rcode == 3:  # NXDOMAIN
+        return [], _NEGATIVE_TTL_S
+    if rcode != 0:
+        return None
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+    addresses, ttl = [], _MAX_TTL_S
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, length = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        rdata = data[offset : offset + length]
+        offset += length
+        ttl = min(ttl, rttl)  # CNAMEs on the way count too
+        if rtype == qtype == _TYPE_A and length == 4:
+            addresses.append(socket.inet_ntop(socket.AF_INET, rdata))
+        elif rtype == qtype == _TYPE_AAAA and length == 16:
+            addresses.append(socket.inet_ntop(socket.AF_INET6, rdata))
+    return addresses, ttl if addresses else _NEGATIVE_TTL_S
+
+
+async def _ask(server: str, host: str, qtype: int) -> tuple[list[str], float] | None:
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in server else socket.AF_INET
+    qid, packet = _query(host, qtype)
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        sock.connect((server, 53))  # datagram: no handshake, never blocks
+        await loop.sock_sendall(sock, packet)
+        deadline = time.perf_counter() + _TIMEOUT_S
+        while (left := deadline - time.perf_counter()) > 0:
+            reply = await asyncio.wait_for(loop.sock_recv(sock, 4096), left)
+            parsed = _parse(reply, qid, qtype)
+            if parsed is not None:
+                return parsed
+    return None
+
+
+async def _stub(host: str, servers: list[str]) -> Resolution | None:
+    for server in servers:
+        try:
+            answers = await asyncio.gather(
+                _ask(server, host, _TYPE_A), _ask(server, host, _TYPE_AAAA)
+            )
+        except (
+            OSError,
+            TimeoutError,
+            asyncio.TimeoutError,  # distinct from the builtin before 3.11
+            struct.error,
+            IndexError,
+            UnicodeError,
+        ):
+            continue
+        if None in answers:
+            continue
+        found = [(addrs, ttl) for addrs, ttl in answers if addrs]  # type: ignore[misc]
+        if not found:
+            return None  # no records: let getaddrinfo have a say (search domains)
+        addresses = [a for addrs, _ in found for a in addrs]
+        return Resolution(host, _ordered(addresses), min(ttl for _, ttl in found))
+    return None
+
+
+async def _system(host: str) -> Resolution:
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, None, type=socket.SOCK_DGRAM), _TIMEOUT_S * 3
+        )
+    except (OSError, TimeoutError, asyncio.TimeoutError) as exc:
+        return Resolution(host, error=str(exc) or "timeout")
+    return Resolution(host, _ordered(info[4][0] for info in infos), _FALLBACK_TTL_S)
+
+
+async def resolve_all(
+    hosts: Iterable[str], concurrency: int = _CONCURRENCY
+) -> dict[str, Resolution]:
+    """Resolve *hosts* concurrently, at most *concurrency* at once."""
+    servers = _nameservers()
+    listed = _hosts_file()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(host: str) -> Resolution:
+        async with limit:
+            if "." in host.strip(".") and host.lower() not in listed:
+                found = await _stub(host, servers)
+                if found is not None:
+                    return found
+            return await _system(host)
+
+    results = await asyncio.gather(*(one(h) for h in hosts))
+    return {result.host: result for result in results}
+
+
+# ───────── cache ───────── #
+def endpoint_hosts(configs: Iterable[WgConfig]) -> dict[str, tuple[str, int]]:
+    """Endpoint ("host:port") -> (host, port) for those naming a host."""
+    hosts = {}
+    for config in configs:
+        for peer in config.peers:
+            if peer.endpoint and peer.endpoint not in hosts:
+                host, port = split_endpoint(peer.endpoint)
+                if not _is_literal(host):
+                    hosts[peer.endpoint] = (host, port)
+    return hosts
+
+
+class EndpointResolver:
+    """resolve_all() behind a per-host TTL cache; safe to call from any thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cache: dict[str, Resolution] = {}
+
+    def stale(self, hosts: Iterable[str]) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            return sorted(
+                {
+                    h
+                    for h in hosts
+                    if h not in self._cache or self._cache[h].expires <= now
+                }
+            )
+
+    def refresh(self, hosts: Iterable[str]) -> set[str]:
+        """Resolve the expired *hosts* (blocks); return those that moved.
+
+        A failed lookup keeps the last good answer until the next try.
+        """
+        todo = self.stale(hosts)
+        if not todo:
+            return set()
+        results = asyncio.run(resolve_all(todo))
+        changed = set()
+        with self._lock:
+            for host, result in results.items():
+                old = self._cache.get(host)
+                if not result.addresses and old is not None and old.addresses:
+                    old.expires = result.expires  # retry later, keep using it
+                    continue
+                if old is not None:
+                    if set(old.addresses) != set(result.addresses):
+                        changed.add(host)
+                    else:  # round-robin DNS rotates: keep the pinned order
+                        result.addresses = old.addresses
+                self._cache[host] = result
+        return changed
+
+    def addresses(self, hosts: Iterable[str]) -> dict[str, list[str]]:
+        """Cached addresses of *hosts*, however old; unknown ones left out."""
+        with self._lock:
+            return {
+                h: list(self._cache[h].addresses)
+                for h in hosts
+                if h in self._cache and self._cache[h].addresses
+            }
+
+    def pinned(self, config: WgConfig, resolve: bool = True) -> dict[str, str]:
+        """Endpoint -> "address:port" for the named endpoints of *config*.
+
+        With *resolve*, expired or unknown hosts are resolved first (in
+        parallel); endpoints whose host has no address are left out, so
+        wg resolves those itself.
+        """
+        hosts = endpoint_hosts([config])
+        if resolve:
+            self.refresh(host for host, _ in hosts.values())
+        found = self.addresses(host for host, _ in hosts.values())
+        return {
+            endpoint: join_endpoint(found[host][0], port)
+            for endpoint, (host, port) in hosts.items()
+            if host in found
+        }
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Concurrent reachability/RTT probing of tunnel endpoints (no Qt).
+
+WireGuard never answers unauthenticated packets, so the endpoint host is
+probed with ICMP echo instead: through an unprivileged ping socket
+(net.ipv4.ping_group_range) when the kernel allows it, else by running
+`ping`.  All hosts are probed from one asyncio loop, at most
+``concurrency`` at a time; results are cached per host for ``ttl``
+seconds, so configs sharing a POP share one probe.
+
+While a full tunnel is up the probes would travel through it, so callers
+should rely on the cache rather than re-probe in that state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import socket
+import struct
+import threading
+import time
+from typing import Final, Iterable
+
+DEFAULT_TTL_S: Final[float] = 300.0
+_CONCURRENCY: Final[int] = 32
+_TIMEOUT_S: Final[float] = 1.0
+_ECHOES: Final[int] = 3  # per host; the best RTT counts
+# family -> (echo request type, echo reply type, protocol)
+_ICMP: Final[dict[int, tuple[int, int, int]]] = {
+    socket.AF_INET: (8, 0, socket.IPPROTO_ICMP),
+    socket.AF_INET6: (128, 129, socket.IPPROTO_ICMPV6),
+}
+_ICMP_HEADER: Final[struct.Struct] = struct.Struct("!BBHHH")
+_PING_TIME: Final[re.Pattern[str]] = re.compile(r"time[=<]([\d.]+) ?ms")
+_NOT_PERMITTED: Final[str] = "ICMP not permitted"
+
+
+class ProbeResult:
+    """RTT of one host (seconds), or why there is none."""
+
+    __slots__ = ("host", "address", "rtt", "error", "time")
+
+    def __init__(
+        self,
+        host: str,
+        address: str | None = None,
+        rtt: float | None = None,
+        error: str | None = None,
+    ) -> None:
+        self.host = host
+        self.address = address
+        self.rtt = rtt
+        self.error = error
+        self.time = time.monotonic()
+
+    def describe(self) -> str:
+        """Short text for a list row; empty when probing is impossible here."""
+        if self.rtt is not None:
+            return f"{self.rtt * 1000:.0f} ms"
+        return "" if self.error == _NOT_PERMITTED else "unreachable"
+
+
+# ───────── single probes ───────── #
+async def _echo_socket(family: int, address: str, seq: int, timeout: float) -> float:
+    """One echo through a ping socket; the kernel sets the id and checksum."""
+    request, reply, proto = _ICMP[family]
+    loop = asyncio.get_running_loop()
+    with socket.socket(family, socket.SOCK_DGRAM, proto) as sock:
+        sock.setblocking(False)
+        sock.connect((address, 0))  # datagram: no handshake, never blocks
+        start = time.perf_counter()
+        await loop.sock_sendall(
+            sock, _ICMP_HEADER.pack(request, 0, 0, 0, seq) + b"wireguard-ui"
+        )
+        deadline = start + timeout
+        while True:
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                raise TimeoutError
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024), left)
+            if len(data) >= _ICMP_HEADER.size:
+                kind, _, _, _, got = _ICMP_HEADER.unpack_from(data)
+                if kind == reply and got == seq:
+                    return time.perf_counter() - start
+
+
+async def _echo_command(family: int, address: str, timeout: float) -> float:
+    """One echo by running ping(8), for kernels without ping sockets."""
+    proc = await asyncio.create_subprocess_exec(
+        "ping",
+        "-6" if family == socket.AF_INET6 else "-4",
+        "-n",
+        "-c",
+        "1",
+        "-W",
+        str(max(1, round(timeout))),
+        address,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    out, _ = await proc.communicate()
+    match = _PING_TIME.search(out.decode(errors="replace"))
+    if proc.returncode != 0 or match is None:
+        raise TimeoutError
+    return float(match.group(1)) / 1000
+
+
+class _Pinger:
+    """Picks ping sockets or ping(8) once, on the first probe."""
+
+    def __init__(self) -> None:
+        self.use_socket: bool | None = None
+
+    async def echo(self, family: int, address: str, seq: int, timeout: float) -> float:
+        if self.use_socket is not False:
+            try:
+                rtt = await _echo_socket(family, address, seq, timeout)
+            except PermissionError:  # not in ping_group_range
+                self.use_socket = False
+            else:
+                self.use_socket = True
+                return rtt
+        return await _echo_command(family, address, timeout)
+
+
+async def probe_host(
+    host: str, pinger: _Pinger, echoes: int = _ECHOES, timeout: float = _TIMEOUT_S
+) -> ProbeResult:
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, None, type=socket.SOCK_DGRAM), timeout * 3
+        )
+    except (OSError, TimeoutError, asyncio.TimeoutError) as exc:  # distinct < 3.11
+        return ProbeResult(host, error=f"DNS: {str(exc) or 'timeout'}")
+    family, _, _, _, sockaddr = next(
+        (info for info in infos if info[0] in _ICMP), infos[0]
+    )
+    address = sockaddr[0]
+    best: float | None = None
+    for seq in range(1, echoes + 1):
+        try:
+            rtt = await pinger.echo(family, address, seq, timeout)
+        except (TimeoutError, asyncio.TimeoutError, ConnectionError):
+            continue
+        except FileNotFoundError:
+            return ProbeResult(host, address, error=_NOT_PERMITTED)
+        except OSError as exc:
+            return ProbeResult(host, address, error=exc.strerror or str(exc))
+        best = rtt if best is None else min(best, rtt)
+    return ProbeResult(host, address, best, None if best is not None else "no reply")
+
+
+async def probe_all(
+    hosts: Iterable[str], concurrency: int = _CONCURRENCY
+) -> dict[str, ProbeResult]:
+    """Probe *hosts* concurrently, at most *concurrency* at once."""
+    limit = asyncio.Semaphore(concurrency)
+    pinger = _Pinger()
+
+    async def bounded(host: str) -> ProbeResult:
+        async with limit:
+            return await probe_host(host, pinger)
+
+    results = await asyncio.gather(*(bounded(h) for h in hosts))
+    return {result.host: result for result in results}
+
+
+# ───────── cache ───────── #
+class EndpointProber:
+    """probe_all() behind a per-host TTL cache; safe to call from any thread."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_S) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: dict[str, ProbeResult] = {}
+
+    def cached(self, hosts: Iterable[str]) -> dict[str, ProbeResult]:
+        """Whatever is known about *hosts*, however old."""
+        with self._lock:
+            return {h: self._cache[h] for h in hosts if h in self._cache}
+
+    def stale(self, hosts: Iterable[str]) -> list[str]:
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            return sorted(
+                {
+                    h
+                    for h in hosts
+                    if h not in self._cache or self._cache[h].time < cutoff
+                }
+            )
+
+    def probe(
+        self, hosts: Iterable[str], force: bool = False
+    ) -> dict[str, ProbeResult]:
+        """Probe the hosts whose entry expired (all with *force*); blocks."""
+        hosts = list(hosts)
+        todo = sorted(set(hosts)) if force else self.stale(hosts)
+        if todo:
+            results = asyncio.run(probe_all(todo))
+            with self._lock:
+                self._cache.update(results)
+        return self.cached(hosts)
+
+
+def fastest(
+    endpoints: dict[str, str], results: dict[str, ProbeResult]
+) -> str | None:
+    """Name (key of *endpoints*: name -> host) with the lowest RTT, if any."""
+    timed = [
+        (results[host].rtt, name)
+        for name, host in endpoints.items()
+        if host in results and results[host].rtt is not None
+    ]
+    return min(timed)[1] if timed else None
@@ -5,18 +5,21 @@ Connect | Disconnect | Rename | Edit config."""
 
 from __future__ import annotations
 
+import json
 import os
+import time
 from pathlib import Path
-from typing import Final
+from typing import TYPE_CHECKING, Final
 
-from PyQt6.QtCore import QTimer, QSize, Qt
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QEvent, QSettings, QSize, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFontDatabase, QIcon
 from PyQt6.QtWidgets import (
     QFileDialog,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QLineEdit,
+    QListView,
     QMessageBox,
+    QPlainTextEdit,
     QPushButton,
     QHBoxLayout,
     QVBoxLayout,
@@ -26,33 +29,90 @@ from PyQt6.QtWidgets import (
     QInputDialog,
 )
 
-from app_launcher import AppLauncherDialog
-from wireguard_core import WireGuard, _run_command
+import metrics
+from operations import OperationRunner
+from status_monitor import StatusMonitor
+import traffic_history
+from traffic_history import HistoryRecorder
+from tunnel_list import TunnelDelegate, TunnelFilterProxy, TunnelListModel
+from wg_config import ConfigIndex, split_endpoint
+from wireguard_core import WireGuard
+from xdg_paths import cache_dir, config_dir
 
+if TYPE_CHECKING:  # imported on first use to keep startup fast
+    from bulk_import import ImportReport
+    from endpoint_dns import EndpointResolver
+    from endpoint_probe import EndpointProber, ProbeResult
+    from profiles import Profile, ProfileResult, Step
+    from diagnostics_view import DiagnosticsDialog
+    from history_view import HistoryDialog
+    from telemetry import TelemetrySampler
+    from telemetry_view import TelemetryDialog
 
-# ───────── list row ───────── #
-class TunnelRow(QWidget):
-    _ACTIVE_MARKER: Final[str] = " [ACTIVE]"
+_TUNNEL_CACHE: Final[Path] = cache_dir() / "tunnels.json"
+_PROFILES_FILE: Final[Path] = config_dir() / "profiles.json"
+_PROBE_INTERVAL_MS: Final[int] = 300_000  # endpoint_probe.DEFAULT_TTL_S
+_RELOAD_SETTLE_MS: Final[int] = 500  # editors often save in several writes
+_LOG_LINES: Final[int] = 1000
+_RESOLVE_INTERVAL_MS: Final[int] = 30_000  # only expired records are looked up
+# outlives the window in tray mode, see tray.py
+_metrics_exporter: metrics.TextfileExporter | None = None
+
+
+def _load_cached_tunnels() -> list[str]:
+    """Tunnel names from the last session, to paint before the helper answers."""
+    try:
+        names = json.loads(_TUNNEL_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if not isinstance(names, list):
+        return []
+    return [
+        n
+        for n in names
+        if isinstance(n, str) and WireGuard.VALID_WG_NAME.fullmatch(n)
+    ]
+
+
+def _save_cached_tunnels(names: list[str]) -> None:
+    try:
+        _TUNNEL_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        _TUNNEL_CACHE.write_text(json.dumps(names), encoding="utf-8")
+    except OSError:
+        pass  # only a startup hint
 
-    def __init__(self, name: str) -> None:
-        super().__init__()
-        self.orig_name = name
-        lay = QHBoxLayout(self)
-        lay.setContentsMargins(4, 0, 4, 0)
-        lay.setSpacing(6)
-        self.label = QLabel(name)
-        lay.addWidget(self.label)
-        lay.addStretch(1)
 
-    def mark_active(self, active: bool) -> None:
-        self.label.setText(self.orig_name + (self._ACTIVE_MARKER if active else ""))
+def _timed(fn, *args) -> tuple[object, float]:
+    """Call *fn* and return (its result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
 
 
 # ───────── main window ───────── #
 class MainWindow(QWidget):
-    def __init__(self) -> None:
+    # operation keys that can never clash with a tunnel name
+    _REFRESH_KEY: Final[str] = ":refresh"
+    _IMPORT_KEY: Final[str] = ":import"
+    _PROBE_KEY: Final[str] = ":probe"
+    _RESOLVE_KEY: Final[str] = ":resolve"
+    _FASTEST_KEY: Final[str] = ":fastest"
+    _PROFILE_KEY: Final[str] = ":profile"
+
+    # helper output of a tunnel operation, from the IPC reader thread
+    _output = pyqtSignal(str, str)  # tunnel name, text
+
+    def __init__(
+        self,
+        monitor: StatusMonitor | None = None,
+        recorder: HistoryRecorder | None = None,
+    ) -> None:
+        """With *monitor* and *recorder* (tray mode), status and traffic
+        history come from those, which outlive this window; else the window
+        starts its own."""
         super().__init__()
-        self.wg = WireGuard()
+        self.wg = monitor.wg if monitor is not None else WireGuard()
+        self.settings = QSettings("wireguard-ui", "wireguard-ui")
         self.setWindowTitle("WireGuard UI (secure)")
         self.resize(460, 380)
 
@@ -94,21 +154,66 @@ class MainWindow(QWidget):
             "Load WireGuard config",
             self._load_config,
         )
+        self.import_button = tool(
+            QIcon.fromTheme("document-import")
+            or self.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon),
+            "Import configs from a folder or archive",
+            self._import_bundle,
+        )
+
+        self.log_button = tool(
+            QIcon.fromTheme("utilities-terminal")
+            or self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogDetailedView),
+            "Show command output",
+            self._toggle_log,
+        )
+        self.log_button.setCheckable(True)
+
+        tool(
+            QIcon.fromTheme("utilities-system-monitor")
+            or self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogInfoView),
+            "Diagnostics: command timings",
+            self._show_diagnostics,
+        )
 
         self.info_button = QPushButton("⋯")
         self.info_button.setFixedSize(28, 28)
         self.info_button.setEnabled(False)
-        self.info_button.setToolTip("Active connection info")
+        self.info_button.setToolTip("Live traffic and handshakes")
         self.info_button.clicked.connect(self._show_active_info)
         top.addWidget(self.info_button)
 
         root.addLayout(top)
 
-        # list
-        self.list_widget = QListWidget()
-        self.list_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.list_widget.customContextMenuRequested.connect(self._show_ctx_menu)
-        root.addWidget(self.list_widget)
+        # list: one model row per tunnel, painted by a delegate (no widgets)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter tunnels…")
+        self.filter_input.setClearButtonEnabled(True)
+        root.addWidget(self.filter_input)
+        self.tunnels = TunnelListModel(self)
+        self.tunnel_proxy = TunnelFilterProxy(self)
+        self.tunnel_proxy.setSourceModel(self.tunnels)
+        self.filter_input.textChanged.connect(self.tunnel_proxy.setFilterFixedString)
+        self.list_view = QListView()
+        self.list_view.setModel(self.tunnel_proxy)
+        self.list_view.setItemDelegate(TunnelDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.list_view.customContextMenuRequested.connect(self._show_ctx_menu)
+        root.addWidget(self.list_view)
+
+        # live wg-quick output of connect/disconnect/reload
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(_LOG_LINES)
+        self.log_view.setFont(
+            QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        )
+        self.log_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.log_view.setVisible(False)
+        root.addWidget(self.log_view)
+        self._partial_lines: dict[str, str] = {}
+        self._output.connect(self._append_output)
 
         # bottom buttons
         self.run_app_button = QPushButton("Launch app outside VPN")
@@ -119,75 +224,215 @@ class MainWindow(QWidget):
         self.connect_btn.clicked.connect(self._connect_selected)
         root.addWidget(self.connect_btn)
 
+        self.fastest_btn = QPushButton("Connect to fastest")
+        self.fastest_btn.setToolTip(
+            "Connect to the listed tunnel whose endpoint answers fastest"
+        )
+        self.fastest_btn.clicked.connect(self._connect_fastest)
+        root.addWidget(self.fastest_btn)
+
         self.disconnect_btn = QPushButton("Disconnect")
         self.disconnect_btn.clicked.connect(self._disconnect_selected)
         root.addWidget(self.disconnect_btn)
 
-        # initial data + timer
+        self.profiles_btn = QPushButton("Profiles")
+        self.profiles_btn.setToolTip("Switch between sets of tunnels")
+        self.profiles_btn.setMenu(QMenu(self.profiles_btn))
+        self.profiles_btn.menu().aboutToShow.connect(self._fill_profile_menu)
+        root.addWidget(self.profiles_btn)
+        self._profile_names: set[str] = set()  # tunnels a profile switch owns
+
+        # slow WireGuard calls run in the background
+        self.ops = OperationRunner(self)
+        self.ops.succeeded.connect(self._on_op_succeeded)
+        self.ops.failed.connect(self._on_op_failed)
+        self.ops.cancelled.connect(self._on_op_cancelled)
+        self._telemetry: TelemetrySampler | None = None
+        self._telemetry_dialog: TelemetryDialog | None = None
+        self._diagnostics_dialog: DiagnosticsDialog | None = None
+        self._history_dialog: HistoryDialog | None = None
+        self._prober: EndpointProber | None = None
+        self._resolver: EndpointResolver | None = None
+        self._apply_metrics_settings()
+
+        # initial data + change notifications (netlink/inotify, polling fallback)
+        self._owns_monitor = monitor is None
+        self.monitor = monitor if monitor is not None else StatusMonitor(self.wg, self)
+        self.monitor.interfacesChanged.connect(self._apply_status)
+        self.monitor.configsChanged.connect(self._on_configs_changed)
+        self._populate(_load_cached_tunnels())
+        # per-tunnel traffic history, sampled while tunnels are up
+        self._owns_recorder = recorder is None
+        self.recorder = recorder if recorder is not None else HistoryRecorder()
+        if self._owns_recorder:
+            self.monitor.interfacesChanged.connect(self.recorder.set_active)
+            self.recorder.start()
         self._refresh()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_status)
-        self.timer.start(3_000)
+        if self._owns_monitor:
+            self.monitor.start()
+        self._probe_timer = QTimer(self)
+        self._probe_timer.timeout.connect(self._probe_endpoints)
+        self._probe_timer.start(_PROBE_INTERVAL_MS)
+        self._pending_reloads: set[str] = set()
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(_RELOAD_SETTLE_MS)
+        self._reload_timer.timeout.connect(self._reload_pending)
+        self._resolve_timer = QTimer(self)
+        self._resolve_timer.timeout.connect(self._resolve_endpoints)
+        self._resolve_timer.start(_RESOLVE_INTERVAL_MS)
+
+    def shutdown(self) -> None:
+        """Stop this window's timers and samplers before it is deleted."""
+        for timer in (self._probe_timer, self._reload_timer, self._resolve_timer):
+            timer.stop()
+        if self._telemetry_dialog is not None:
+            self._telemetry_dialog.done(0)  # stops the sampler thread
+        if self._history_dialog is not None:
+            self._history_dialog.done(0)
+        if self._owns_monitor:
+            self.monitor.stop()
+        if self._owns_recorder:
+            self.recorder.stop()  # writes what it has not flushed yet
+
+    # ───────── window events ───────── #
+    def showEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        self.monitor.set_hidden(False)
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        self.monitor.set_hidden(True)  # hidden or minimized
+        super().hideEvent(event)
+
+    def changeEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        if event.type() == QEvent.Type.ActivationChange and self.isActiveWindow():
+            self.monitor.poke()
+        super().changeEvent(event)
 
     # ───────── helpers ───────── #
-    def _populate(self, tunnels: list[str]) -> None:
-        self.list_widget.clear()
-        for name in tunnels:
-            item = QListWidgetItem(self.list_widget)
-            row = TunnelRow(name)
-            item.setSizeHint(row.sizeHint())
-            self.list_widget.setItemWidget(item, row)
-
-    def _current_row(self) -> TunnelRow | None:
-        item = self.list_widget.currentItem()
-        return self.list_widget.itemWidget(item) if item else None  # type: ignore[return-value]
+    def _populate(self, names: list[str], index: ConfigIndex | None = None) -> None:
+        self.tunnels.set_tunnels(names, index)
+
+    def _set_busy(self, name: str, action: str | None) -> None:
+        self.tunnels.set_busy(name, action)
+        if action is None and name in self._partial_lines:
+            self._append_output(name, "\n")  # output without a final newline
+
+    def _current_name(self) -> str | None:
+        index = self.list_view.currentIndex()
+        return index.data(TunnelListModel.NameRole) if index.isValid() else None
 
     # ───────── context menu ───────── #
     def _show_ctx_menu(self, pos) -> None:
-        item = self.list_widget.itemAt(pos)
-        if not item:
+        index = self.list_view.indexAt(pos)
+        if not index.isValid():
             return
-        row = self.list_widget.itemWidget(item)  # type: ignore[assignment]
-        if not isinstance(row, TunnelRow):
-            return
-        name = row.orig_name
+        name = index.data(TunnelListModel.NameRole)
 
         menu = QMenu(self)
         a_up = menu.addAction("Connect")
         a_down = menu.addAction("Disconnect")
+        a_cancel = menu.addAction("Cancel")
+        a_cancel.setEnabled(self.ops.action(name) is not None)
         menu.addSeparator()
         a_ren = menu.addAction("Rename…")
         a_edit = menu.addAction("Edit config…")
         a_delete = menu.addAction("Delete")
+        menu.addSeparator()
+        a_history = menu.addAction("Traffic history…")
+        a_native = menu.addAction("Fast connect (native engine)")
+        a_native.setCheckable(True)
+        a_native.setChecked(self._engine(name) == "native")
 
-        act = menu.exec(self.list_widget.viewport().mapToGlobal(pos))
+        act = menu.exec(self.list_view.viewport().mapToGlobal(pos))
         if act is None:
             return
         if act is a_up:
             self._connect(name)
         elif act is a_down:
             self._disconnect(name)
+        elif act is a_cancel:
+            self.ops.cancel(name)
         elif act is a_ren:
             self._rename(name)
         elif act is a_edit:
             self._edit(name)
         elif act is a_delete:
             self._delete(name)
+        elif act is a_history:
+            self._show_history(name)
+        elif act is a_native:
+            self._set_engine(name, "native" if a_native.isChecked() else None)
+
+    # ───────── per-tunnel engine ───────── #
+    def _engine(self, name: str) -> str:
+        return str(self.settings.value(f"engine/{name}", "wg-quick"))
+
+    def _set_engine(self, name: str, engine: str | None) -> None:
+        if engine is None:
+            self.settings.remove(f"engine/{name}")
+        else:
+            self.settings.setValue(f"engine/{name}", engine)
 
     # ───────── actions ───────── #
     def _connect(self, name: str) -> None:
-        try:
-            self.wg.connect(name)
-        except Exception as e:  # pylint: disable=broad-except
-            self.status_label.setText(f"Connection error: {e}")
-        self._update_status()
+        engine = self._engine(name)
+        log = self._log_output(name)
+        config = self.wg.index.get(name)
+        resolver = self._get_resolver()
+
+        def connect(cancel) -> tuple[object, float]:
+            # usually cached by _resolve_endpoints; else resolved here, in parallel
+            endpoints = resolver.pinned(config) if config is not None else None
+            return _timed(self.wg.connect, name, cancel, engine, log, endpoints)
+
+        self._submit(name, "connect", connect)
 
     def _disconnect(self, name: str) -> None:
-        try:
-            self.wg.disconnect(name)
-        except Exception as e:  # pylint: disable=broad-except
-            self.status_label.setText(f"Disconnection error: {e}")
-        self._update_status()
+        engine = self._engine(name)
+        log = self._log_output(name)
+        self._submit(
+            name,
+            "disconnect",
+            lambda cancel: _timed(self.wg.disconnect, name, cancel, engine, log),
+        )
+
+    # ───────── command output ───────── #
+    def _log_output(self, name: str):
+        """on_output callback for an operation on *name*; runs off the GUI thread."""
+        return lambda _fd, text: self._output.emit(name, text)
+
+    def _append_output(self, name: str, text: str) -> None:
+        """Add complete lines to the log; the last one doubles as progress."""
+        *lines, rest = (self._partial_lines.pop(name, "") + text).split("\n")
+        if rest:
+            self._partial_lines[name] = rest
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return
+        for line in lines:
+            self.log_view.appendPlainText(f"{name}: {line}")
+        if not self.log_view.isVisible() and not self.settings.value(
+            "ui/log_hidden", False, type=bool
+        ):
+            self.log_view.setVisible(True)
+            self.log_button.setChecked(True)
+        if self.ops.action(name) is not None:
+            self.status_label.setText(f"{name}: {lines[-1]}")
+
+    def _toggle_log(self) -> None:
+        shown = self.log_button.isChecked()
+        self.log_view.setVisible(shown)
+        self.settings.setValue("ui/log_hidden", not shown)
+
+    def _submit(self, name: str, action: str, fn) -> None:
+        self.monitor.poke()
+        if name in self._profile_names:
+            self.status_label.setText(f"{name}: a profile is being applied.")
+        elif self.ops.submit(name, action, fn):
+            self._set_busy(name, action)
+        elif self.ops.action(name) != action:
+            self.status_label.setText(f"{name}: another operation is in progress.")
 
     def _rename(self, old: str) -> None:
         new, ok = QInputDialog.getText(self, "Rename", "New name:", text=old)
@@ -196,46 +441,52 @@ class MainWindow(QWidget):
         if not WireGuard.VALID_WG_NAME.fullmatch(new):
             QMessageBox.warning(self, "WireGuard", "Invalid name.")
             return
-        _, err = _run_command(
-            ["mv", f"/etc/wireguard/{old}.conf", f"/etc/wireguard/{new}.conf"],
-            use_root=True,
-        )
-        if err:
-            QMessageBox.critical(self, "WireGuard", f"Error: {err}")
+        try:
+            self.wg.rename_config(old, new)
+        except Exception as e:  # pylint: disable=broad-except
+            QMessageBox.critical(self, "WireGuard", f"Error: {e}")
         else:
+            engine = self.settings.value(f"engine/{old}")
+            self._set_engine(old, None)
+            if engine is not None:
+                self._set_engine(new, str(engine))
+            self._rename_in_profiles(old, new)
+            try:
+                traffic_history.rename(old, new)
+            except OSError:
+                pass  # the history stays under the old name
             self.status_label.setText("File renamed.")
             self._refresh()
 
+    def _config_exists(self, name: str) -> bool:
+        try:
+            return self.wg.config_exists(name)
+        except Exception:  # pylint: disable=broad-except
+            return False
+
     def _edit(self, name: str) -> None:
-        conf = Path("/etc/wireguard") / f"{name}.conf"
-        _, err = _run_command(["test", "-e", str(conf)], use_root=True)
-        if err:
+        conf = self.wg.config_path(name)
+        if not self._config_exists(name):
             QMessageBox.warning(self, "WireGuard", "File not found or no access.")
             return
 
-        # 1. Open WITHOUT root via GVFS backend admin://
-
-        cmd = ["env"]
-        for var in (
-            "DISPLAY",
-            "XAUTHORITY",
-            "DBUS_SESSION_BUS_ADDRESS",
-            "WAYLAND_DISPLAY",
-            "XDG_RUNTIME_DIR",
-        ):
-            val = os.environ.get(var)
-            if val:
-                cmd.append(f"{var}={val}")
-        cmd.extend(["xdg-open", str(conf)])
-        _, err = _run_command(cmd, use_root=True)
+        try:
+            text = self.wg.read_config(name)
+        except Exception as e:  # pylint: disable=broad-except
+            QMessageBox.critical(self, "WireGuard", f"Cannot read {conf}.\n{e}")
+            return
+        # pylint: disable-next=import-outside-toplevel
+        from config_editor import ConfigEditor
 
-        if err:
-            QMessageBox.critical(self, "WireGuard", "Failed to start editor.\n" + err)
+        editor = ConfigEditor(
+            name, text, lambda content: self.wg.save_config(name, content), self
+        )
+        if editor.exec():
+            self.status_label.setText(f"{name}: config saved.")
+            self._refresh()
 
     def _delete(self, name: str) -> None:
-        conf = Path("/etc/wireguard") / f"{name}.conf"
-        _, err = _run_command(["test", "-e", str(conf)], use_root=True)
-        if err:
+        if not self._config_exists(name):
             QMessageBox.warning(self, "WireGuard", "File not found or no access.")
             return
 
@@ -246,23 +497,26 @@ class MainWindow(QWidget):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            _, err = _run_command(["rm", "-f", str(conf)], use_root=True)
-            if err:
-                QMessageBox.critical(self, "WireGuard", f"Error deleting file: {err}")
+            try:
+                self.wg.delete_config(name)
+            except Exception as e:  # pylint: disable=broad-except
+                QMessageBox.critical(self, "WireGuard", f"Error deleting file: {e}")
             else:
+                self._set_engine(name, None)
+                self._rename_in_profiles(name, None)
                 self.status_label.setText("Configuration deleted.")
                 self._refresh()
 
     # ───────── UI slots ───────── #
     def _connect_selected(self) -> None:
-        row = self._current_row()
-        if row:
-            self._connect(row.orig_name)
+        name = self._current_name()
+        if name:
+            self._connect(name)
 
     def _disconnect_selected(self) -> None:
-        row = self._current_row()
-        if row:
-            self._disconnect(row.orig_name)
+        name = self._current_name()
+        if name:
+            self._disconnect(name)
 
     def _load_config(self) -> None:
         path, _ = QFileDialog.getOpenFileName(
@@ -277,21 +531,419 @@ class MainWindow(QWidget):
             self.status_label.setText(str(e))
         self._refresh()
 
-    # ───────── refresh list/status ───────── #
-    def _refresh(self) -> None:
+    def _import_bundle(self) -> None:
+        menu = QMenu(self)
+        a_dir = menu.addAction("From folder…")
+        a_archive = menu.addAction("From archive (.zip, .tar)…")
+        button = self.import_button
+        chosen = menu.exec(button.mapToGlobal(button.rect().bottomLeft()))
+        if chosen is a_dir:
+            path = QFileDialog.getExistingDirectory(self, "Select folder with configs")
+        elif chosen is a_archive:
+            path, _ = QFileDialog.getOpenFileName(
+                self,
+                "Select config archive",
+                "",
+                "Archives (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz)",
+            )
+        else:
+            return
+        if not path:
+            return
+        if self.ops.submit(
+            self._IMPORT_KEY,
+            "import-check",
+            lambda _cancel: _timed(self.wg.check_import, path),
+        ):
+            self.status_label.setText("Checking configs…")
+        else:
+            self.status_label.setText("An import is already in progress.")
+
+    def _confirm_import(self, report: ImportReport, elapsed: float) -> None:
+        box = QMessageBox(self)
+        box.setWindowTitle("Import configs")
+        box.setText(report.summary())
+        box.setInformativeText(f"Checked in {elapsed * 1000:.0f} ms.")
+        if report.details():
+            box.setDetailedText(report.details())
+        role = QMessageBox.ButtonRole.AcceptRole
+        install = replace = None
+        if report.accepted:
+            install = box.addButton(f"Install {len(report.accepted)}", role)
+        if report.conflicts:
+            total = len(report.accepted) + len(report.conflicts)
+            replace = box.addButton(f"Install {total}, replace existing", role)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+        clicked = box.clickedButton()
+        if clicked is None or clicked not in (install, replace):
+            self.status_label.setText("Import cancelled.")
+            return
+        overwrite = clicked is replace
+        self.ops.submit(
+            self._IMPORT_KEY,
+            "import",
+            lambda _cancel: _timed(self.wg.install_import, report, overwrite),
+        )
+        self.status_label.setText("Installing configs…")
+
+    # ───────── endpoint probing ───────── #
+    def _endpoints(self, names: list[str]) -> dict[str, str]:
+        """name -> endpoint host for those of *names* whose config has one."""
+        hosts = {}
+        for name in names:
+            config = self.wg.index.get(name)
+            if config is not None and config.endpoint:
+                hosts[name] = split_endpoint(config.endpoint)[0]
+        return hosts
+
+    def _get_prober(self) -> EndpointProber:
+        if self._prober is None:
+            # pylint: disable-next=import-outside-toplevel
+            from endpoint_probe import EndpointProber
+
+            self._prober = EndpointProber()
+        return self._prober
+
+    def _probe_endpoints(self) -> None:
+        """Re-probe expired endpoints in the background.
+
+        Skipped while a tunnel is up: the probes would measure the tunnel.
+        """
+        if self.monitor.active:
+            return
+        prober = self._get_prober()
+        hosts = list(self._endpoints(self.wg.index.names()).values())
+        if prober.stale(hosts):
+            self.ops.submit(
+                self._PROBE_KEY, "probe", lambda _cancel: prober.probe(hosts)
+            )
+
+    def _show_latency(self) -> None:
+        endpoints = self._endpoints(self.wg.index.names())
+        results = self._get_prober().cached(endpoints.values())
+        self.tunnels.set_latency(
+            {
+                name: results[host].describe()
+                for name, host in endpoints.items()
+                if host in results
+            }
+        )
+
+    def _connect_fastest(self) -> None:
+        """Probe the tunnels that pass the filter and connect the fastest."""
+        proxy = self.tunnel_proxy
+        shown = [
+            proxy.index(row, 0).data(TunnelListModel.NameRole)
+            for row in range(proxy.rowCount())
+        ]
+        endpoints = self._endpoints(shown)
+        if not endpoints:
+            self.status_label.setText("No listed tunnel has an endpoint.")
+            return
+        prober = self._get_prober()
+        connected = bool(self.monitor.active)
+
+        def probe(_cancel) -> tuple[dict[str, str], dict[str, ProbeResult]]:
+            hosts = endpoints.values()
+            # through an active tunnel only the cached RTTs mean anything
+            if connected:
+                return endpoints, prober.cached(hosts)
+            return endpoints, prober.probe(hosts)
+
+        if self.ops.submit(self._FASTEST_KEY, "fastest", probe):
+            self.status_label.setText(
+                f"Probing {len(set(endpoints.values()))} endpoint(s)…"
+            )
+
+    def _on_fastest(
+        self, endpoints: dict[str, str], results: dict[str, ProbeResult]
+    ) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from endpoint_probe import fastest
+
+        self._show_latency()
+        name = fastest(endpoints, results)
+        if name is None:
+            self.status_label.setText(
+                "No endpoint answered."
+                if not self.monitor.active
+                else "No probe results yet; disconnect to probe endpoints."
+            )
+        elif name in self.monitor.active:
+            self.status_label.setText(f"{name} is already the fastest.")
+        else:
+            self._connect(name)
+
+    # ───────── endpoint DNS ───────── #
+    def _get_resolver(self) -> EndpointResolver:
+        if self._resolver is None:
+            # pylint: disable-next=import-outside-toplevel
+            from endpoint_dns import EndpointResolver
+
+            self._resolver = EndpointResolver()
+        return self._resolver
+
+    def _configs(self, names: list[str]) -> list:
+        return [c for c in map(self.wg.index.get, names) if c is not None]
+
+    def _resolve_endpoints(self) -> None:
+        """Re-resolve the expired endpoint hostnames of all configs."""
+        # pylint: disable-next=import-outside-toplevel
+        from endpoint_dns import endpoint_hosts
+
+        resolver = self._get_resolver()
+        configs = self._configs(self.wg.index.names())
+        hosts = {host for host, _ in endpoint_hosts(configs).values()}
+        if resolver.stale(hosts):
+            self.ops.submit(
+                self._RESOLVE_KEY, "resolve", lambda _cancel: resolver.refresh(hosts)
+            )
+
+    def _on_resolved(self, changed: set[str]) -> None:
+        """Point running peers whose endpoint host moved at its new address."""
+        if not changed:
+            return
+        # pylint: disable-next=import-outside-toplevel
+        from endpoint_dns import endpoint_hosts
+
+        resolver = self._get_resolver()
+        for name in self.monitor.active:
+            hosts = {
+                host for host, _ in endpoint_hosts(self._configs([name])).values()
+            }
+            addresses = resolver.addresses(hosts & changed)
+            if addresses:
+                self.ops.submit(
+                    name,
+                    "endpoints",
+                    lambda _cancel, n=name, a=addresses: self.wg.refresh_endpoints(
+                        n, a
+                    ),
+                )
+
+    # ───────── profiles ───────── #
+    def _load_profiles(self) -> list[Profile]:
+        # pylint: disable-next=import-outside-toplevel
+        from profiles import load
+
         try:
-            self._populate(self.wg.list_configs())
-        except Exception as e:  # pylint: disable=broad-except
-            self.status_label.setText(str(e))
+            return load(_PROFILES_FILE)
+        except ValueError as exc:
+            self.status_label.setText(f"Profile error: {exc}")
+            return []
+
+    def _save_profiles(self, profiles: list[Profile]) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from profiles import save
+
+        try:
+            save(_PROFILES_FILE, profiles)
+        except OSError as exc:
+            QMessageBox.critical(self, "WireGuard", f"Error saving profiles: {exc}")
+
+    def _rename_in_profiles(self, old: str, new: str | None) -> None:
+        """Follow a renamed (*new*) or deleted (None) tunnel in all profiles."""
+        # pylint: disable-next=import-outside-toplevel
+        from profiles import Profile
+
+        profiles = self._load_profiles()
+        if not any(old in p.tunnels for p in profiles):
+            return
+
+        def swap(names) -> list[str]:
+            return [new if n == old else n for n in names if n != old or new]
+
+        self._save_profiles(
+            [
+                Profile(
+                    p.name,
+                    swap(p.tunnels),
+                    {
+                        (new if t == old else t): swap(deps)
+                        for t, deps in p.after.items()
+                        if new or t != old
+                    },
+                )
+                for p in profiles
+            ]
+        )
+
+    def _fill_profile_menu(self) -> None:
+        menu = self.profiles_btn.menu()
+        menu.clear()
+        if self.ops.action(self._PROFILE_KEY) is not None:
+            menu.addAction("Cancel switch").triggered.connect(
+                lambda: self.ops.cancel(self._PROFILE_KEY)
+            )
+            return
+        active = set(self.monitor.active)
+        profiles = self._load_profiles()
+        for profile in profiles:
+            action = menu.addAction(profile.name)
+            action.setCheckable(True)
+            action.setChecked(set(profile.tunnels) == active)
+            action.triggered.connect(lambda _on, p=profile: self._apply_profile(p))
+        if profiles:
+            menu.addSeparator()
+        save = menu.addAction("Save active tunnels as profile…")
+        save.setEnabled(bool(active))
+        save.triggered.connect(self._save_active_profile)
+        menu.addAction("Edit profiles…").triggered.connect(self._edit_profiles)
+
+    def _save_active_profile(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from profiles import Profile
+
+        name, ok = QInputDialog.getText(self, "Save profile", "Profile name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        profiles = self._load_profiles()
+        old = next((p for p in profiles if p.name == name), None)
+        if old is not None:
+            reply = QMessageBox.question(
+                self,
+                "WireGuard",
+                f"Replace profile {name}?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        tunnels = list(self.monitor.active)
+        # keep the order constraints that still apply to the new set
+        after = {
+            t: [d for d in deps if d in tunnels]
+            for t, deps in (old.after if old is not None else {}).items()
+            if t in tunnels
+        }
+        profile = Profile(name, tunnels, after)
+        self._save_profiles(
+            [profile if p is old else p for p in profiles]
+            + ([profile] if old is None else [])
+        )
+        self.status_label.setText(f"Profile {name} saved.")
+
+    def _edit_profiles(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from profile_view import ProfileDialog
+
+        dialog = ProfileDialog(self._load_profiles(), self.wg.index.names(), self)
+        if dialog.exec():
+            self._save_profiles(dialog.profiles)
+
+    def _apply_profile(self, profile: Profile) -> None:
+        """Switch to *profile*: all its steps run at once as far as the
+        dependencies allow, see profiles.py; a failure rolls back."""
+        if self.ops.action(self._PROFILE_KEY) is not None:
+            self.status_label.setText("A profile is already being applied.")
+            return
+        active = set(self.monitor.active)
+        ups = [n for n in profile.tunnels if n not in active]
+        downs = sorted(active - set(profile.tunnels))
+        busy = next(
+            (n for n in (*ups, *downs) if self.ops.action(n) is not None), None
+        )
+        if busy is not None:
+            self.status_label.setText(f"{busy}: another operation is in progress.")
+            return
+        everything = self._load_profiles()
+        engines = {n: self._engine(n) for n in (*profile.tunnels, *active)}
+        resolver = self._get_resolver()
+        index = self.wg.index
+
+        def run(step: Step, cancel) -> str:
+            engine = engines.get(step.name, "wg-quick")
+            log = self._log_output(step.name)
+            if step.action == "disconnect":
+                return self.wg.disconnect(step.name, cancel, engine, log)
+            config = index.get(step.name)
+            endpoints = resolver.pinned(config) if config is not None else None
+            return self.wg.connect(step.name, cancel, engine, log, endpoints)
+
+        def switch(cancel) -> tuple[str, ProfileResult]:
+            # pylint: disable-next=import-outside-toplevel
+            from profiles import apply, plan
+
+            now = self.wg.active_interfaces(refresh=True)  # the monitor may lag
+            configs = {n: index.get(n) for n in (*now, *profile.tunnels)}
+            return profile.name, apply(
+                plan(profile, now, configs, everything), run, cancel
+            )
+
+        if not self.ops.submit(self._PROFILE_KEY, "profile", switch):
+            return
+        for names, action in ((ups, "connect"), (downs, "disconnect")):
+            for name in names:
+                self._set_busy(name, action)
+                self._profile_names.add(name)
+        self.status_label.setText(f"Switching to profile {profile.name}…")
+
+    def _end_profile(self) -> None:
+        for name in self._profile_names:
+            self._set_busy(name, None)
+        self._profile_names.clear()
         self._update_status()
 
+    def _on_profile_applied(self, name: str, result: ProfileResult) -> None:
+        self._end_profile()
+        if result.ok:
+            self.status_label.setText(f"Profile {name}: {result.describe()}.")
+        else:
+            self.status_label.setText(f"Profile {name} failed: {result.describe()}.")
+
+    # ───────── refresh list/status ───────── #
+    def _refresh(self) -> None:
+        self.monitor.poke()
+        self.ops.submit(  # asked for, or after a change: bypass the query cache
+            self._REFRESH_KEY,
+            "refresh",
+            lambda _cancel: self.wg.scan_configs(refresh=True),
+        )
+
     def _update_status(self) -> None:
-        active = self.wg.active_interfaces()
+        self.monitor.refresh()
+        self._apply_status(self.monitor.active)
+
+    def _on_configs_changed(self, names: list[str]) -> None:
+        self._refresh()
+        active = set(self.monitor.active)
+        self._pending_reloads.update(n for n in names if n in active)
+        if self._pending_reloads:
+            self._reload_timer.start()  # restarts: wait for the last write
+
+    def _reload_pending(self) -> None:
+        """Apply saved edits to running tunnels without reconnecting them."""
+        names, self._pending_reloads = self._pending_reloads, set()
+        for name in sorted(names):
+            if self.ops.action(name) is not None or name in self._profile_names:
+                continue  # a connect/disconnect in flight reads the file itself
+            engine = self._engine(name)
+            log = self._log_output(name)
+            self._submit(
+                name,
+                "reload",
+                lambda _cancel, n=name, e=engine, o=log: _timed(
+                    self.wg.reload, n, e, o
+                ),
+            )
+
+    def _on_reloaded(self, name: str, reply: dict, elapsed: float) -> None:
+        took = f"{elapsed * 1000:.0f} ms"
+        if reply["mode"] == "synced":
+            changes = reply["summary"] or "no peer changes"
+            self.status_label.setText(
+                f"{name}: edits applied without reconnecting in {took} ({changes})."
+            )
+        elif reply["mode"] == "restarted":
+            changed = ", ".join(reply["restart"])
+            self.status_label.setText(
+                f"{name} restarted in {took} to apply {changed} changes."
+            )
+
+    def _apply_status(self, active: list[str]) -> None:
         self.info_button.setEnabled(bool(active))
-        for i in range(self.list_widget.count()):
-            row = self.list_widget.itemWidget(self.list_widget.item(i))  # type: ignore[assignment]
-            if isinstance(row, TunnelRow):
-                row.mark_active(row.orig_name in active)
+        self.tunnels.set_active(active)
         self.status_label.setText(
             f"Status: connected to {', '.join(active)}"
             if active
@@ -299,12 +951,142 @@ class MainWindow(QWidget):
         )
 
     def _show_active_info(self) -> None:
-        active = self.wg.active_interfaces()
-        if not active:
+        if not self.monitor.active:
             QMessageBox.information(self, "WireGuard", "No active connections.")
             return
-        QMessageBox.information(self, "WireGuard", self.wg.tunnel_info(active[0]))
+        if self._telemetry_dialog is None:
+            # pylint: disable=import-outside-toplevel
+            from telemetry import TelemetrySampler
+            from telemetry_view import TelemetryDialog
+
+            self._telemetry = TelemetrySampler(parent=self)
+            self._telemetry_dialog = TelemetryDialog(self._telemetry, self)
+        self._telemetry_dialog.show()
+        self._telemetry_dialog.raise_()
+
+    def _apply_metrics_settings(self) -> None:
+        """Turn timing and the textfile export on/off from settings and env.
+
+        WIREGUARD_UI_METRICS=1 or WIREGUARD_UI_METRICS_TEXTFILE=<path> force
+        recording on, e.g. for a node_exporter setup without the GUI dialog.
+        """
+        textfile = os.environ.get("WIREGUARD_UI_METRICS_TEXTFILE") or str(
+            self.settings.value("diagnostics/textfile", "")
+        )
+        if (
+            os.environ.get("WIREGUARD_UI_METRICS") == "1"
+            or os.environ.get("WIREGUARD_UI_METRICS_TEXTFILE")
+            or self.settings.value("diagnostics/metrics", False, type=bool)
+        ):
+            metrics.enable()
+        else:
+            metrics.disable()
+        global _metrics_exporter
+        if _metrics_exporter is not None:
+            _metrics_exporter.stop()
+            _metrics_exporter = None
+        if metrics.ENABLED and textfile:
+            _metrics_exporter = metrics.TextfileExporter(Path(textfile))
+            _metrics_exporter.start()
+
+    def _show_history(self, name: str) -> None:
+        if self._history_dialog is None:
+            # pylint: disable-next=import-outside-toplevel
+            from history_view import HistoryDialog
+
+            self._history_dialog = HistoryDialog(
+                self.wg.index.names(), name, self.recorder.flush, self
+            )
+        self._history_dialog.show_tunnel(name)
+        self._history_dialog.show()
+        self._history_dialog.raise_()
+
+    def _show_diagnostics(self) -> None:
+        if self._diagnostics_dialog is None:
+            # pylint: disable-next=import-outside-toplevel
+            from diagnostics_view import DiagnosticsDialog
+
+            self._diagnostics_dialog = DiagnosticsDialog(
+                self.settings, self._apply_metrics_settings, self
+            )
+        self._diagnostics_dialog.show()
+        self._diagnostics_dialog.raise_()
+
+    # ───────── background operation results ───────── #
+    def _on_op_succeeded(self, key: str, action: str, result: object) -> None:
+        if action == "refresh":
+            names = result.names()  # type: ignore[attr-defined]
+            self._populate(names, result)  # type: ignore[arg-type]
+            self._update_status()
+            _save_cached_tunnels(names)
+            self._probe_endpoints()
+            self._resolve_endpoints()
+        elif action == "probe":
+            self._show_latency()
+        elif action == "resolve":
+            self._on_resolved(result)  # type: ignore[arg-type]
+        elif action == "endpoints":
+            if result:
+                moved = ", ".join(sorted(result.values()))  # type: ignore[union-attr]
+                self.status_label.setText(f"{key}: endpoint moved to {moved}.")
+        elif action == "fastest":
+            self._on_fastest(*result)  # type: ignore[misc]
+        elif action == "profile":
+            self._on_profile_applied(*result)  # type: ignore[misc]
+        elif action == "import-check":
+            self._confirm_import(*result)  # type: ignore[misc]
+        elif action == "reload":
+            self._set_busy(key, None)
+            self._update_status()
+            self._on_reloaded(key, *result)  # type: ignore[misc]
+        elif action == "import":
+            names, elapsed = result  # type: ignore[misc]
+            self.status_label.setText(
+                f"Imported {len(names)} config(s) in {elapsed * 1000:.0f} ms."
+            )
+            self._refresh()
+        else:
+            self._set_busy(key, None)
+            self._update_status()
+            engine, elapsed = result  # type: ignore[misc]
+            done = "connected" if action == "connect" else "disconnected"
+            self.status_label.setText(
+                f"{key} {done} in {elapsed * 1000:.0f} ms ({engine})"
+            )
+
+    def _on_op_failed(self, key: str, action: str, error: str) -> None:
+        self._set_busy(key, None)
+        if action == "profile":
+            self._end_profile()
+        prefix = {
+            "connect": "Connection error: ",
+            "disconnect": "Disconnection error: ",
+            "reload": "Reload error: ",
+            "import-check": "Import error: ",
+            "import": "Import error: ",
+            "probe": "Endpoint probe error: ",
+            "fastest": "Endpoint probe error: ",
+            "resolve": "Endpoint lookup error: ",
+            "endpoints": "Endpoint update error: ",
+            "profile": "Profile error: ",
+        }.get(action, "")
+        self.status_label.setText(prefix + error)
+
+    def _on_op_cancelled(self, key: str, action: str) -> None:
+        self._set_busy(key, None)
+        if action == "profile":
+            self._end_profile()
+        self._update_status()
+        self.status_label.setText(f"{key}: {action} cancelled.")
 
     def _show_app_launcher(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from app_launcher import AppLauncherDialog
+
         dialog = AppLauncherDialog(self)
-        dialog.exec()
+        if dialog.exec() and dialog.launched is not None:
+            launched = dialog.launched
+            how = "ready sandbox" if launched.pooled else "new sandbox"
+            self.status_label.setText(
+                f"Launched {launched.command} via {launched.uplink} ({how})."
+            )
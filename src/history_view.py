@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Traffic history of one tunnel as a bar chart, from traffic_history rollups."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Final
+
+from PyQt6.QtCore import QRectF, QTimer
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QVBoxLayout,
+    QWidget,
+)
+
+import traffic_history
+from traffic_history import Record
+
+# label, rollup level, bucket (s), span (s)
+_RANGES: Final[list[tuple[str, str, int, int]]] = [
+    ("Last hour", "minute", 60, 3600),
+    ("Last 2 days", "hour", 3600, 2 * 86400),
+    ("Last 7 days", "hour", 3600, 7 * 86400),
+    ("Last 30 days", "day", 86400, 30 * 86400),
+    ("Last year", "day", 86400, 365 * 86400),
+]
+_RELOAD_MS: Final[int] = 60_000
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+class HistoryChart(QWidget):
+    """Received (left) and sent (right) bytes per bucket, newest at the right."""
+
+    _RX: Final[QColor] = QColor(52, 152, 219)
+    _TX: Final[QColor] = QColor(230, 126, 34)
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.records: list[Record] = []
+        self.start = self.end = 0
+        self.bucket = 60
+        self.setMinimumSize(480, 180)
+
+    def set_data(
+        self, records: list[Record], start: int, end: int, bucket: int
+    ) -> None:
+        self.records, self.start, self.end, self.bucket = records, start, end, bucket
+        self.update()
+
+    def paintEvent(self, _event) -> None:  # noqa: N802 (Qt override)
+        painter = QPainter(self)
+        text_h = self.fontMetrics().height()
+        w, h = self.width() - 1, self.height() - 2 * text_h - 2
+        span = max(self.end - self.start, 1)
+        peak = max((max(r.rx, r.tx) for r in self.records), default=0)
+        painter.setPen(self.palette().text().color())
+        painter.drawText(0, text_h, f"peak {format_bytes(peak)} per bucket")
+        painter.drawText(
+            0, self.height() - 2, time.strftime("%x %X", time.localtime(self.start))
+        )
+        painter.drawLine(0, text_h + h + 1, w, text_h + h + 1)
+        if not peak:
+            return
+        bar = max(w * self.bucket / span / 2, 1.0)
+        painter.setPen(QColor(0, 0, 0, 0))
+        for record in self.records:
+            x = w * (record.time - self.start) / span
+            for offset, value, color in (
+                (0, record.rx, self._RX),
+                (bar, record.tx, self._TX),
+            ):
+                height = h * value / peak
+                painter.fillRect(
+                    QRectF(x + offset, text_h + 1 + h - height, bar, height), color
+                )
+
+
+class HistoryDialog(QDialog):
+    """Pick a tunnel and a range; *flush* makes the recorder write first."""
+
+    def __init__(
+        self,
+        tunnels: list[str],
+        current: str | None = None,
+        flush: Callable[[], None] | None = None,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("WireGuard traffic history")
+        self.resize(640, 300)
+        self._flush = flush
+
+        layout = QVBoxLayout(self)
+        row = QHBoxLayout()
+        self.tunnel_box = QComboBox()
+        self.tunnel_box.addItems(tunnels)
+        if current in tunnels:
+            self.tunnel_box.setCurrentText(current)
+        row.addWidget(self.tunnel_box, 1)
+        self.range_box = QComboBox()
+        self.range_box.addItems([label for label, *_ in _RANGES])
+        self.range_box.setCurrentIndex(1)
+        row.addWidget(self.range_box)
+        layout.addLayout(row)
+        self.chart = HistoryChart()
+        layout.addWidget(self.chart, 1)
+        self.totals = QLabel()
+        layout.addWidget(self.totals)
+
+        self.tunnel_box.currentIndexChanged.connect(self.reload)
+        self.range_box.currentIndexChanged.connect(self.reload)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.reload)
+
+    def show_tunnel(self, name: str) -> None:
+        if self.tunnel_box.findText(name) < 0:
+            self.tunnel_box.addItem(name)
+        self.tunnel_box.setCurrentText(name)  # reloads if it changed
+
+    def showEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        self.reload()
+        self._timer.start(_RELOAD_MS)
+        super().showEvent(event)
+
+    def done(self, result: int) -> None:
+        self._timer.stop()
+        super().done(result)
+
+    def reload(self) -> None:
+        name = self.tunnel_box.currentText()
+        label, level, bucket, span = _RANGES[self.range_box.currentIndex()]
+        if self._flush is not None:
+            self._flush()
+        now = int(time.time())
+        start = now - span
+        records = traffic_history.read(name, level, since=start - bucket)
+        self.chart.set_data(records, start, now, bucket)
+        if not records:
+            self.totals.setText(f"No traffic recorded for {name}.")
+            return
+        self.totals.setText(
+            f"{label}: received {format_bytes(sum(r.rx for r in records))}, "
+            f"sent {format_bytes(sum(r.tx for r in records))}"
+        )
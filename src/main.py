@@ -1,14 +1,119 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""Entry point: launches GUI and root helper."""
+"""Entry point: launches GUI and root helper.
+
+Qt and the GUI modules are imported only after the root helper has been
+spawned, so the polkit prompt and the helper handshake run while the window
+is being built.  Pass --startup-profile to print per-phase timings.
+SIGUSR1 dumps the command-latency metrics to $XDG_CACHE_HOME/wireguard-ui.
+With --use-daemon (or WIREGUARD_UI_DAEMON=1) the GUI talks to the shared
+root daemon instead of starting its own helper, falling back to pkexec if
+the daemon is not running.  When a system tray is available the app lives
+in it (see tray.py): closing the window frees it, and --tray starts with
+only the tray icon.
+"""
 
 import os
 import pwd
+import signal
+import socket
 import sys
-from PyQt6.QtWidgets import QApplication
+import threading
+import time
+
+_T0 = time.perf_counter()
+
+import metrics  # noqa: E402
+from wireguard_core import (  # noqa: E402
+    _HELPER_READY,
+    _connect_daemon,
+    _start_root_helper,
+)
+
+
+class _StartupProfile:
+    """Prints "startup-profile: <phase> <at ms> (+<delta ms>)" to stderr."""
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def mark(self, phase: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            now = (time.perf_counter() - _T0) * 1000
+            print(
+                f"startup-profile: {phase:<24} {now:8.1f} ms "
+                f"(+{now - self._last:.1f} ms)",
+                file=sys.stderr,
+                flush=True,
+            )
+            self._last = now
+
+    def watch_helper(self) -> None:
+        def _wait() -> None:
+            _HELPER_READY.wait()
+            self.mark("root helper ready")
+
+        if self.enabled:
+            threading.Thread(target=_wait, daemon=True).start()
+
+    def watch_window(self, win) -> None:
+        """Mark the first paint of *win* and the first tunnel list."""
+        if not self.enabled:
+            return
+        # pylint: disable-next=import-outside-toplevel
+        from PyQt6.QtCore import QEvent, QObject
+
+        profile = self
+
+        class _FirstPaint(QObject):
+            def eventFilter(self, obj, event):  # noqa: N802 (Qt override)
+                if event.type() == QEvent.Type.Paint:
+                    obj.removeEventFilter(self)
+                    profile.mark("first frame")
+                return False
+
+        win._startup_filter = _FirstPaint(win)  # keep a reference
+        win.installEventFilter(win._startup_filter)
 
-from wireguard_core import _start_root_helper
-from gui import MainWindow
+        def _listed(key: str, *_args) -> None:
+            if key == win._REFRESH_KEY:
+                win.ops.succeeded.disconnect(_listed)
+                self.mark("tunnels listed")
+
+        win.ops.succeeded.connect(_listed)
+
+
+def _start_privileged(use_daemon: bool) -> None:
+    if use_daemon:
+        try:
+            if _connect_daemon():
+                return
+            print("wireguard-ui: daemon not running, using pkexec", file=sys.stderr)
+        except PermissionError as exc:
+            print(f"wireguard-ui: daemon refused: {exc}", file=sys.stderr)
+    _start_root_helper()
+
+
+def _wake_for_signals(app) -> None:
+    """Run Python signal handlers promptly while Qt's event loop is idle.
+
+    CPython only runs handlers between bytecodes; the wakeup fd makes the
+    signal readable on a socket that Qt watches, which hands control back.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from PyQt6.QtCore import QSocketNotifier
+
+    rsock, wsock = socket.socketpair()
+    rsock.setblocking(False)
+    wsock.setblocking(False)
+    signal.set_wakeup_fd(wsock.fileno())
+    notifier = QSocketNotifier(rsock.fileno(), QSocketNotifier.Type.Read, app)
+    notifier.activated.connect(lambda *_: rsock.recv(64))
+    app._signal_wakeup = (rsock, wsock, notifier)  # keep them alive
 
 
 def _reexec_as_user() -> None:
@@ -53,8 +158,46 @@ def _reexec_as_user() -> None:
 
 if __name__ == "__main__":
     _reexec_as_user()
-    _start_root_helper()  # request polkit before window appears
+    profile = _StartupProfile("--startup-profile" in sys.argv)
+    if profile.enabled:
+        sys.argv.remove("--startup-profile")
+    profile.mark("core imported")
+    use_daemon = os.environ.get("WIREGUARD_UI_DAEMON") == "1"
+    if "--use-daemon" in sys.argv:
+        sys.argv.remove("--use-daemon")
+        use_daemon = True
+    start_hidden = "--tray" in sys.argv
+    if start_hidden:
+        sys.argv.remove("--tray")
+    _start_privileged(use_daemon)  # polkit prompt runs while Qt loads below
+    profile.mark("root helper spawned")
+    profile.watch_helper()
+
+    from PyQt6.QtWidgets import QApplication
+
+    profile.mark("Qt imported")
+    from gui import MainWindow
+
+    profile.mark("GUI imported")
     app = QApplication(sys.argv)
-    win = MainWindow()
-    win.show()
+    profile.mark("QApplication created")
+    metrics.install_dump_signal()
+    _wake_for_signals(app)
+    import tray
+
+    if tray.available():
+        app.setQuitOnLastWindowClosed(False)
+        core = tray.TrayCore()
+        app.aboutToQuit.connect(core.shutdown)
+        profile.mark("tray constructed")
+        if not start_hidden:
+            win = core.show_window()
+            profile.mark("window constructed")
+            profile.watch_window(win)
+    else:
+        win = MainWindow()
+        app.aboutToQuit.connect(win.shutdown)
+        profile.mark("window constructed")
+        profile.watch_window(win)
+        win.show()
     sys.exit(app.exec())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Latency histograms and error counters for privileged commands.
+
+Recording is off by default.  Every hook checks the module-level ``ENABLED``
+flag first, so a disabled build pays one global lookup per command and the
+root helper is not even asked to time anything.
+
+Commands are grouped by kind ("wg-quick up", "wg show", "op stat", "gui
+connect") and timed in phases:
+
+    queue   waiting for a worker (helper pool, or the GUI's thread pool)
+    ipc     JSON round trip to the helper, i.e. total minus helper time
+    spawn   fork/exec of the child process inside the helper
+    exec    the child (or in-process helper op) running
+    total   as seen by the caller
+
+Snapshots are exported as JSON (also on SIGUSR1) and in the Prometheus
+text format for node_exporter's textfile collector.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Final
+
+from xdg_paths import cache_dir
+
+ENABLED = False  # toggle with enable()/disable()
+
+PHASES: Final[tuple[str, ...]] = ("queue", "ipc", "spawn", "exec", "total")
+# upper bucket bounds in milliseconds; the last bucket is unbounded
+BUCKETS_MS: Final[tuple[float, ...]] = (
+    0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000,
+)  # fmt: skip
+DUMP_FILE: Final[Path] = cache_dir() / "metrics.json"
+_PROM_PREFIX: Final[str] = "wireguard_ui_command"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the *q* quantile (max if beyond)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": self.sum,
+            "mean_ms": self.sum / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "buckets": self.counts[:],
+        }
+
+
+class Registry:
+    """Histograms per (kind, phase) plus error counters per (kind, reason)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hist: dict[tuple[str, str], Histogram] = {}
+        self._errors: dict[tuple[str, str], int] = {}
+        self.since = time.time()
+
+    def observe(self, kind: str, spans: dict[str, float]) -> None:
+        """Record *spans* (phase -> seconds) for one command of *kind*."""
+        with self._lock:
+            for phase, seconds in spans.items():
+                hist = self._hist.get((kind, phase))
+                if hist is None:
+                    hist = self._hist[(kind, phase)] = Histogram()
+                hist.observe(seconds * 1000)
+
+    def error(self, kind: str, reason: str = "error") -> None:
+        with self._lock:
+            self._errors[(kind, reason)] = self._errors.get((kind, reason), 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._errors.clear()
+            self.since = time.time()
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready copy: {"commands": {kind: {"phases", "errors"}}, ...}."""
+        with self._lock:
+            commands: dict[str, dict[str, Any]] = {}
+            for (kind, phase), hist in sorted(self._hist.items()):
+                entry = commands.setdefault(kind, {"phases": {}, "errors": {}})
+                entry["phases"][phase] = hist.as_dict()
+            for (kind, reason), count in sorted(self._errors.items()):
+                entry = commands.setdefault(kind, {"phases": {}, "errors": {}})
+                entry["errors"][reason] = count
+        return {
+            "enabled": ENABLED,
+            "since": self.since,
+            "time": time.time(),
+            "buckets_ms": list(BUCKETS_MS),
+            "commands": commands,
+        }
+
+    def prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {_PROM_PREFIX}_duration_seconds "
+            "Privileged command latency by phase.",
+            f"# TYPE {_PROM_PREFIX}_duration_seconds histogram",
+        ]
+        bounds = [f"{b / 1000:g}" for b in BUCKETS_MS] + ["+Inf"]
+        for kind, entry in snap["commands"].items():
+            for phase, hist in entry["phases"].items():
+                labels = f'kind="{_escape(kind)}",phase="{phase}"'
+                cumulative = 0
+                for bound, n in zip(bounds, hist["buckets"]):
+                    cumulative += n
+                    lines.append(
+                        f"{_PROM_PREFIX}_duration_seconds_bucket"
+                        f'{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f"{_PROM_PREFIX}_duration_seconds_sum{{{labels}}}"
+                    f" {hist['sum_ms'] / 1000:.6f}"
+                )
+                lines.append(
+                    f"{_PROM_PREFIX}_duration_seconds_count{{{labels}}} {hist['count']}"
+                )
+        lines += [
+            f"# HELP {_PROM_PREFIX}_errors_total Failed privileged commands.",
+            f"# TYPE {_PROM_PREFIX}_errors_total counter",
+        ]
+        for kind, entry in snap["commands"].items():
+            for reason, count in entry["errors"].items():
+                lines.append(
+                    f'{_PROM_PREFIX}_errors_total{{kind="{_escape(kind)}",'
+                    f'reason="{reason}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+
+def enable() -> None:
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+def command_kind(cmd: list[str]) -> str:
+    """Low-cardinality label for *cmd*: program plus its sub-command.
+
+    ``["wg-quick", "up", "home"]`` -> "wg-quick up"; tunnel names and other
+    arguments are dropped.
+    """
+    if not cmd:
+        return "?"
+    prog = os.path.basename(cmd[0])
+    sub = next((arg for arg in cmd[1:] if not arg.startswith("-")), "")
+    return f"{prog} {sub}" if sub.isalpha() else prog
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)  # the textfile collector must never see half a file
+
+
+def dump_json(path: Path = DUMP_FILE) -> Path:
+    _write_atomic(path, json.dumps(REGISTRY.snapshot(), indent=2))
+    return path
+
+
+def write_textfile(path: Path) -> None:
+    _write_atomic(path, REGISTRY.prometheus())
+
+
+class TextfileExporter:
+    """Rewrites a Prometheus textfile-collector file every *interval* s."""
+
+    def __init__(self, path: Path, interval: float = 15.0) -> None:
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="wg-metrics-export", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                write_textfile(self.path)
+            except OSError as exc:
+                print(f"metrics: cannot write {self.path}: {exc}", file=sys.stderr)
+            if self._stop.wait(self.interval):
+                return
+
+
+def install_dump_signal(signum: int = signal.SIGUSR1) -> None:
+    """Dump a JSON snapshot to DUMP_FILE whenever *signum* arrives.
+
+    The handler may interrupt code holding the registry lock, so the dump
+    itself runs on a short-lived thread.
+    """
+
+    def _dump() -> None:
+        try:
+            print(f"metrics: wrote {dump_json()}", file=sys.stderr)
+        except OSError as exc:
+            print(f"metrics: dump failed: {exc}", file=sys.stderr)
+
+    signal.signal(
+        signum, lambda *_: threading.Thread(target=_dump, daemon=True).start()
+    )
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Native tunnel bring-up used by the root helper instead of wg-quick.
+
+wg-quick forks a few dozen ip/wg/sed processes per connect.  This engine
+works from the parsed config and usually needs three: ``ip link add``, one
+``wg setconf`` fed on stdin and one ``ip -batch`` for addresses, MTU, routes
+and rules.  IPv6 policy rules add an ``ip -6 -batch`` and DNS a
+``resolvconf`` call.  Routing mirrors wg-quick: default routes go
+through fwmark table 51820 with the same rule layout, so either engine can
+tear down a tunnel the other brought up.
+
+Configs using PreUp/PostUp/PreDown/PostDown or SaveConfig raise
+UnsupportedConfig; the caller falls back to wg-quick for those.
+
+reload() applies an edited config to a running interface without taking it
+down, whichever engine brought it up: ``wg syncconf`` keeps the sessions of
+unchanged peers, and only the routes of added or removed AllowedIPs are
+touched.  Interface-level changes (addresses, MTU, DNS, table, hooks, a
+default route appearing or going away) cannot be applied that way and are
+reported back so the caller restarts the tunnel instead.
+
+Commands are started through ``spawn``; the root helper points it at its
+own, so they can be cancelled and their output is streamed like wg-quick's.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Final
+
+from wg_config import WgConfig, parse_config
+
+_DEFAULT_TABLE: Final[int] = 51820
+_DEFAULT_MTU: Final[int] = 1420
+_SRC_VALID_MARK: Final[Path] = Path("/proc/sys/net/ipv4/conf/all/src_valid_mark")
+
+
+class UnsupportedConfig(NotImplementedError):
+    """The config needs wg-quick features this engine does not implement."""
+
+
+def _subprocess_spawn(
+    cmd: list[str], stdin: str | None = None, capture: bool = False
+) -> dict[str, Any]:
+    # never inherit stdin: in the root helper it is the request pipe
+    proc = subprocess.run(
+        cmd,
+        input=stdin if stdin is not None else "",
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return {"stdout": proc.stdout, "stderr": proc.stderr, "returncode": proc.returncode}
+
+
+# (cmd, stdin, capture) -> {"stdout", "stderr", "returncode"}; stdout is
+# only guaranteed with capture (wireguard_core._spawn streams it otherwise)
+spawn: Callable[..., dict[str, Any]] = _subprocess_spawn
+
+
+def _run(
+    cmd: list[str],
+    stdin: str | None = None,
+    check: bool = True,
+    capture: bool = False,
+) -> str:
+    result = spawn(cmd, stdin, capture)
+    if check and result["returncode"] != 0:
+        raise RuntimeError(
+            result["stderr"].strip()
+            or f"{' '.join(cmd)}: exit code {result['returncode']}"
+        )
+    return result["stdout"]
+
+
+def _check_supported(cfg: WgConfig) -> None:
+    iface = cfg.interface
+    if iface.pre_up or iface.post_up or iface.pre_down or iface.post_down:
+        raise UnsupportedConfig("PreUp/PostUp/PreDown/PostDown hooks need wg-quick")
+    if iface.save_config:
+        raise UnsupportedConfig("SaveConfig needs wg-quick")
+
+
+def _fwmark(cfg: WgConfig) -> int:
+    mark = cfg.interface.fwmark
+    if mark is None or mark == "off":
+        return _DEFAULT_TABLE
+    return int(mark, 0)
+
+
+def setconf_text(cfg: WgConfig, fwmark: int | None = None) -> str:
+    """The config minus wg-quick-only keys, in `wg setconf` syntax."""
+    iface = cfg.interface
+    lines = ["[Interface]"]
+    if iface.private_key:
+        lines.append(f"PrivateKey = {iface.private_key}")
+    if iface.listen_port is not None:
+        lines.append(f"ListenPort = {iface.listen_port}")
+    if fwmark is not None:
+        lines.append(f"FwMark = {fwmark}")
+    for peer in cfg.peers:
+        lines += ["", "[Peer]", f"PublicKey = {peer.public_key}"]
+        if peer.preshared_key:
+            lines.append(f"PresharedKey = {peer.preshared_key}")
+        if peer.allowed_ips:
+            lines.append(f"AllowedIPs = {', '.join(peer.allowed_ips)}")
+        if peer.endpoint:
+            lines.append(f"Endpoint = {peer.endpoint}")
+        if peer.persistent_keepalive:
+            lines.append(f"PersistentKeepalive = {peer.persistent_keepalive}")
+    return "\n".join(lines) + "\n"
+
+
+def _default_families(cfg: WgConfig) -> set[int]:
+    """IP versions for which some peer routes the whole address space."""
+    return {
+        net.version
+        for peer in cfg.peers
+        for net in map(ipaddress.ip_network, peer.allowed_ips)
+        if net.prefixlen == 0
+    }
+
+
+def plan(name: str, cfg: WgConfig) -> tuple[list[str], list[str], int | None]:
+    """Build the `ip -batch` lines for *cfg*.
+
+    Returns (main batch, IPv6 rule batch, fwmark or None).  Rules without an
+    address default to IPv4 and `ip -batch` has no per-line family switch,
+    so the IPv6 policy rules get a batch of their own.
+    """
+    iface = cfg.interface
+    batch = [f"address replace {addr} dev {name}" for addr in iface.addresses]
+    batch.append(f"link set dev {name} mtu {iface.mtu or _DEFAULT_MTU} up")
+    v6_rules: list[str] = []
+    if iface.table == "off":
+        return batch, v6_rules, None
+
+    auto = iface.table in (None, "auto")
+    defaults = _default_families(cfg) if auto else set()
+    fwmark = _fwmark(cfg) if defaults else None
+    main_table = "" if auto else f" table {iface.table}"
+    seen: set[str] = set()
+    for peer in cfg.peers:
+        for cidr in peer.allowed_ips:
+            if cidr in seen:
+                continue
+            seen.add(cidr)
+            if defaults and ipaddress.ip_network(cidr).prefixlen == 0:
+                batch.append(f"route replace {cidr} dev {name} table {fwmark}")
+            else:
+                batch.append(f"route replace {cidr} dev {name}{main_table}")
+    for version in sorted(defaults):
+        rules = [
+            f"rule add not fwmark {fwmark} table {fwmark}",
+            "rule add table main suppress_prefixlength 0",
+        ]
+        (batch if version == 4 else v6_rules).extend(rules)
+    return batch, v6_rules, fwmark
+
+
+def _resolvconf_input(cfg: WgConfig) -> str:
+    servers, search = [], []
+    for item in cfg.interface.dns:
+        try:
+            ipaddress.ip_address(item)
+            servers.append(f"nameserver {item}")
+        except ValueError:
+            search.append(item)
+    if search:
+        servers.append("search " + " ".join(search))
+    return "\n".join(servers) + "\n"
+
+
+def up(name: str, cfg: WgConfig) -> None:
+    """Create and configure interface *name*; remove it again on failure."""
+    _check_supported(cfg)
+    batch, v6_rules, fwmark = plan(name, cfg)
+    _run(["ip", "link", "add", "dev", name, "type", "wireguard"])
+    try:
+        _run(["wg", "setconf", name, "/dev/stdin"], setconf_text(cfg, fwmark))
+        _run(["ip", "-batch", "-"], "\n".join(batch) + "\n")
+        if v6_rules:
+            _run(["ip", "-6", "-batch", "-"], "\n".join(v6_rules) + "\n")
+        if fwmark is not None and 4 in _default_families(cfg):
+            _SRC_VALID_MARK.write_text("1\n")
+        if cfg.interface.dns:
+            _run(
+                ["resolvconf", "-a", f"tun.{name}", "-m", "0", "-x"],
+                _resolvconf_input(cfg),
+            )
+    except Exception:
+        down(name, cfg, missing_ok=True)
+        raise
+
+
+def down(name: str, cfg: WgConfig, missing_ok: bool = False) -> None:
+    """Remove interface *name* together with its policy rules and DNS."""
+    _check_supported(cfg)
+    try:
+        _run(["ip", "link", "del", "dev", name])
+    except RuntimeError:
+        if not missing_ok:
+            raise
+    fwmark = _fwmark(cfg)
+    rules = f"rule del table {fwmark}\nrule del table main suppress_prefixlength 0\n"
+    for version in sorted(_default_families(cfg)):
+        family = ["-4"] if version == 4 else ["-6"]
+        # -force: keep going if a rule is already gone
+        _run(["ip", *family, "-force", "-batch", "-"], rules, check=False)
+    if cfg.interface.dns:
+        _run(["resolvconf", "-d", f"tun.{name}", "-f"], check=False)
+
+
+# ───────── hitless reload ───────── #
+# interface keys the kernel does not know; compared against the last
+# applied config when there is one (label, attribute)
+_UNOBSERVABLE: Final[tuple[tuple[str, str], ...]] = (
+    ("DNS", "dns"),
+    ("Table", "table"),
+    ("PreUp", "pre_up"),
+    ("PostUp", "post_up"),
+    ("PreDown", "pre_down"),
+    ("PostDown", "post_down"),
+    ("SaveConfig", "save_config"),
+)
+
+
+class LiveState:
+    """What the kernel says about a running interface."""
+
+    __slots__ = ("config", "addresses", "mtu")
+
+    def __init__(self, config: WgConfig, addresses: set[str], mtu: int | None):
+        self.config = config  # from `wg showconf`: keys, peers, AllowedIPs
+        self.addresses = addresses
+        self.mtu = mtu
+
+
+def live_state(name: str) -> LiveState:
+    """Read the running configuration of interface *name*."""
+    config = parse_config(_run(["wg", "showconf", name], capture=True), name)
+    addresses = set()
+    shown = _run(["ip", "-o", "address", "show", "dev", name], capture=True)
+    for line in shown.splitlines():
+        fields = line.split()
+        # "3: wg0    inet 10.0.0.2/32 scope global wg0 ..."
+        for family in ("inet", "inet6"):
+            if family in fields and "link" not in fields:
+                address = fields[fields.index(family) + 1]
+                addresses.add(str(ipaddress.ip_interface(address)))
+    fields = _run(["ip", "-o", "link", "show", "dev", name], capture=True).split()
+    mtu = int(fields[fields.index("mtu") + 1]) if "mtu" in fields else None
+    return LiveState(config, addresses, mtu)
+
+
+def _allowed_ips(cfg: WgConfig) -> set[str]:
+    return {cidr for peer in cfg.peers for cidr in peer.allowed_ips}
+
+
+def restart_reasons(
+    new: WgConfig, live: LiveState, applied: WgConfig | None = None
+) -> list[str]:
+    """Interface-level differences that rule out an in-place reload.
+
+    *applied* is the config the tunnel was last brought up or reloaded
+    with; without it, keys the kernel does not know count as unchanged.
+    """
+    reasons = []
+    addresses = {str(ipaddress.ip_interface(a)) for a in new.interface.addresses}
+    if addresses != live.addresses:
+        reasons.append("Address")
+    if new.interface.mtu is not None:
+        mtu_changed = new.interface.mtu != live.mtu
+    else:  # automatic MTU: only a change from an explicit value counts
+        mtu_changed = applied is not None and applied.interface.mtu is not None
+    if mtu_changed:
+        reasons.append("MTU")
+    if applied is not None:
+        reasons += [
+            label
+            for label, attr in _UNOBSERVABLE
+            if getattr(new.interface, attr) != getattr(applied.interface, attr)
+        ]
+        if new.interface.fwmark != applied.interface.fwmark:
+            reasons.append("FwMark")
+    # with an automatic table, default routes need the fwmark rules
+    defaults = _default_families(new)
+    if new.interface.table in (None, "auto") and defaults != _default_families(
+        live.config
+    ):
+        reasons.append("default route")
+    return reasons
+
+
+def route_changes(
+    name: str, new: WgConfig, live: LiveState
+) -> tuple[list[str], list[str]]:
+    """`ip -batch` lines (removals, additions) for the AllowedIPs diff.
+
+    With an automatic table, default routes live in the fwmark table and
+    are left alone; restart_reasons() covers them.
+    """
+    if new.interface.table == "off":
+        return [], []
+    auto = new.interface.table in (None, "auto")
+    table = "" if auto else f" table {new.interface.table}"
+    old, wanted = _allowed_ips(live.config), _allowed_ips(new)
+
+    def routed(cidr: str) -> bool:
+        return not auto or ipaddress.ip_network(cidr).prefixlen > 0
+
+    removals = [
+        f"route del {cidr} dev {name}{table}"
+        for cidr in sorted(old - wanted)
+        if routed(cidr)
+    ]
+    additions = [
+        f"route replace {cidr} dev {name}{table}"
+        for cidr in sorted(wanted - old)
+        if routed(cidr)
+    ]
+    return removals, additions
+
+
+def _peer_summary(new: WgConfig, live: WgConfig) -> str:
+    old = {p.public_key: p for p in live.peers}
+    keys = {p.public_key for p in new.peers}
+    added = sum(1 for key in keys if key not in old)
+    removed = sum(1 for key in old if key not in keys)
+    changed = sum(
+        1
+        for peer in new.peers
+        if peer.public_key in old
+        and set(peer.allowed_ips) != set(old[peer.public_key].allowed_ips)
+    )
+    counts = ((added, "added"), (removed, "removed"), (changed, "re-routed"))
+    return ", ".join(f"{count} peer(s) {what}" for count, what in counts if count)
+
+
+def reload(name: str, new: WgConfig, applied: WgConfig | None = None) -> dict:
+    """Apply *new* to running interface *name* in place, if possible.
+
+    Returns {"restart": [reasons]} without touching anything when the
+    interface itself has to change, else {"restart": [], "summary": ...}.
+    """
+    live = live_state(name)
+    reasons = restart_reasons(new, live, applied)
+    if reasons:
+        return {"restart": reasons}
+    mark = live.config.interface.fwmark
+    fwmark = int(mark, 0) if mark and mark != "off" else None
+    _run(["wg", "syncconf", name, "/dev/stdin"], setconf_text(new, fwmark))
+    removals, additions = route_changes(name, new, live)
+    if removals:
+        # -force: keep going if a route is already gone
+        _run(["ip", "-force", "-batch", "-"], "\n".join(removals) + "\n", check=False)
+    if additions:
+        _run(["ip", "-batch", "-"], "\n".join(additions) + "\n")
+    summary = _peer_summary(new, live.config)
+    if new.interface.private_key != live.config.interface.private_key:
+        summary = ", ".join(filter(None, ("new PrivateKey", summary)))
+    return {
+        "restart": [],
+        "summary": summary,
+        "routes": len(removals) + len(additions),
+    }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Background execution of WireGuard operations for the GUI.
+
+Every potentially slow call (wg-quick, helper round trips) runs on a
+QThreadPool worker; results come back to the GUI thread as Qt signals.
+Operations are keyed (usually by tunnel name): submitting a key that is
+already queued or running is coalesced into the existing operation.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import metrics
+from wireguard_core import OperationCancelled
+
+# fn receives the cancel event; long-running calls should pass it on to
+# WireGuard so the root helper can terminate the underlying process.
+OperationFn = Callable[[threading.Event], Any]
+
+
+class _Operation(QRunnable):
+    def __init__(
+        self, runner: "OperationRunner", key: str, action: str, fn: OperationFn
+    ) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.runner = runner
+        self.key = key
+        self.action = action
+        self.fn = fn
+        self.cancel = threading.Event()
+        # set only while metrics are on: time spent waiting for a pool thread
+        self.queued = time.perf_counter() if metrics.ENABLED else None
+
+    def run(self) -> None:
+        if self.cancel.is_set():
+            self._emit("_done", self.key, "cancelled", None)
+            return
+        self._emit("_begun", self.key)
+        started = time.perf_counter() if self.queued is not None else 0.0
+        try:
+            result = self.fn(self.cancel)
+        except OperationCancelled:
+            status, result = "cancelled", None
+        except Exception as exc:  # pylint: disable=broad-except
+            status, result = "failed", str(exc)
+        else:
+            status = "cancelled" if self.cancel.is_set() else "succeeded"
+        if self.queued is not None:
+            self._record(self.queued, started, status)
+        self._emit("_done", self.key, status, result)
+
+    def _emit(self, signal: str, *args: Any) -> None:
+        try:
+            getattr(self.runner, signal).emit(*args)
+        except RuntimeError:  # the runner went with its window (tray.py)
+            pass
+
+    def _record(self, queued: float, started: float, status: str) -> None:
+        kind = f"gui {self.action}"
+        metrics.REGISTRY.observe(
+            kind,
+            {"queue": started - queued, "total": time.perf_counter() - queued},
+        )
+        if status != "succeeded":
+            metrics.REGISTRY.error(kind, "error" if status == "failed" else status)
+
+
+class OperationRunner(QObject):
+    """Runs keyed operations on a thread pool and reports via signals."""
+
+    started = pyqtSignal(str, str)  # key, action
+    succeeded = pyqtSignal(str, str, object)  # key, action, result
+    failed = pyqtSignal(str, str, str)  # key, action, error
+    cancelled = pyqtSignal(str, str)  # key, action
+
+    # internal: emitted from worker threads, delivered in the GUI thread
+    _begun = pyqtSignal(str)
+    _done = pyqtSignal(str, str, object)
+
+    def __init__(self, parent: QObject | None = None, max_threads: int = 4) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._ops: dict[str, _Operation] = {}
+        self._begun.connect(self._on_begun)
+        self._done.connect(self._on_done)
+
+    def submit(self, key: str, action: str, fn: OperationFn) -> bool:
+        """Queue *fn* under *key*; return False if *key* is already busy."""
+        if key in self._ops:
+            return False
+        op = _Operation(self, key, action, fn)
+        self._ops[key] = op
+        self._pool.start(op)
+        return True
+
+    @property
+    def busy(self) -> bool:
+        """True while any operation is queued or running."""
+        return bool(self._ops)
+
+    def action(self, key: str) -> str | None:
+        """Return the action pending or running under *key*, if any."""
+        op = self._ops.get(key)
+        return op.action if op else None
+
+    def cancel(self, key: str) -> None:
+        op = self._ops.get(key)
+        if op is None:
+            return
+        op.cancel.set()
+        if self._pool.tryTake(op):  # never started: report right away
+            self._on_done(key, "cancelled", None)
+
+    def cancel_all(self) -> None:
+        for key in list(self._ops):
+            self.cancel(key)
+
+    def _on_begun(self, key: str) -> None:
+        op = self._ops.get(key)
+        if op is not None:
+            self.started.emit(key, op.action)
+
+    def _on_done(self, key: str, status: str, payload: object) -> None:
+        op = self._ops.pop(key, None)
+        if op is None:
+            return
+        if status == "succeeded":
+            self.succeeded.emit(key, op.action, payload)
+        elif status == "failed":
+            self.failed.emit(key, op.action, str(payload))
+        else:
+            self.cancelled.emit(key, op.action)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Profile editor: which tunnels each profile holds and in what order."""
+
+from __future__ import annotations
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QMessageBox,
+    QPlainTextEdit,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from profiles import Profile, check
+
+
+def _format_after(after: dict[str, tuple[str, ...]]) -> str:
+    return "\n".join(f"{t}: {', '.join(deps)}" for t, deps in after.items())
+
+
+def _parse_after(text: str) -> dict[str, list[str]]:
+    after: dict[str, list[str]] = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        tunnel, sep, deps = line.partition(":")
+        if not sep or not tunnel.strip():
+            raise ValueError(f"Order line {number}: expected 'tunnel: other, …'")
+        after.setdefault(tunnel.strip(), []).extend(
+            d.strip() for d in deps.split(",") if d.strip()
+        )
+    return after
+
+
+class ProfileDialog(QDialog):
+    """Edits a copy of *profiles*; after accept() the result is in .profiles."""
+
+    def __init__(
+        self,
+        profiles: list[Profile],
+        tunnels: list[str],
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Tunnel profiles")
+        self.resize(560, 360)
+        self.profiles = [Profile.from_json(p.to_json()) for p in profiles]
+        self._tunnels = tunnels
+        self._row = -1  # profile shown in the editor
+
+        layout = QHBoxLayout(self)
+        left = QVBoxLayout()
+        self.profile_list = QListWidget()
+        self.profile_list.currentRowChanged.connect(self._show)
+        left.addWidget(self.profile_list)
+        row = QHBoxLayout()
+        new_btn = QPushButton("New")
+        new_btn.clicked.connect(self._new)
+        row.addWidget(new_btn)
+        self.delete_btn = QPushButton("Delete")
+        self.delete_btn.clicked.connect(self._delete)
+        row.addWidget(self.delete_btn)
+        left.addLayout(row)
+        layout.addLayout(left, 1)
+
+        right = QVBoxLayout()
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("Profile name")
+        right.addWidget(self.name_edit)
+        self.tunnel_list = QListWidget()
+        right.addWidget(self.tunnel_list, 2)
+        right.addWidget(QLabel("Order (one per line, 'tunnel: connect after these'):"))
+        self.after_edit = QPlainTextEdit()
+        self.after_edit.setPlaceholderText("office: vpn-gateway")
+        right.addWidget(self.after_edit, 1)
+        buttons = QHBoxLayout()
+        buttons.addStretch(1)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(cancel_btn)
+        save_btn = QPushButton("Save")
+        save_btn.setDefault(True)
+        save_btn.clicked.connect(self._save)
+        buttons.addWidget(save_btn)
+        right.addLayout(buttons)
+        layout.addLayout(right, 2)
+
+        self.profile_list.addItems([p.name for p in self.profiles])
+        self.profile_list.setCurrentRow(0 if self.profiles else -1)
+        self._set_editable(bool(self.profiles))
+
+    def _set_editable(self, enabled: bool) -> None:
+        for widget in (
+            self.name_edit,
+            self.tunnel_list,
+            self.after_edit,
+            self.delete_btn,
+        ):
+            widget.setEnabled(enabled)
+
+    def _show(self, row: int) -> None:
+        if not self._store():
+            self.profile_list.blockSignals(True)
+            self.profile_list.setCurrentRow(self._row)
+            self.profile_list.blockSignals(False)
+            return
+        self._row = row
+        if row < 0:
+            self.name_edit.clear()
+            self.tunnel_list.clear()
+            self.after_edit.clear()
+            return
+        profile = self.profiles[row]
+        self.name_edit.setText(profile.name)
+        self.tunnel_list.clear()
+        # tunnels that no longer exist stay listed so they are not lost silently
+        for name in dict.fromkeys([*self._tunnels, *profile.tunnels]):
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(
+                Qt.CheckState.Checked
+                if name in profile.tunnels
+                else Qt.CheckState.Unchecked
+            )
+            self.tunnel_list.addItem(item)
+        self.after_edit.setPlainText(_format_after(profile.after))
+
+    def _store(self) -> bool:
+        """Write the editor back into self.profiles; False if it is invalid."""
+        if not 0 <= self._row < len(self.profiles):
+            return True
+        checked = [
+            self.tunnel_list.item(i).text()
+            for i in range(self.tunnel_list.count())
+            if self.tunnel_list.item(i).checkState() == Qt.CheckState.Checked
+        ]
+        try:
+            profile = Profile(
+                self.name_edit.text().strip(),
+                checked,
+                _parse_after(self.after_edit.toPlainText()),
+            )
+            check(profile)
+        except ValueError as exc:
+            QMessageBox.warning(self, "WireGuard", str(exc))
+            return False
+        self.profiles[self._row] = profile
+        self.profile_list.item(self._row).setText(profile.name)
+        return True
+
+    def _new(self) -> None:
+        if not self._store():
+            return
+        taken = {p.name for p in self.profiles}
+        name = next(
+            n for n in (f"Profile {i}" for i in range(1, len(taken) + 2))
+            if n not in taken
+        )
+        self.profiles.append(Profile(name, []))
+        self.profile_list.addItem(name)
+        self._set_editable(True)
+        self._row = -1  # nothing to store from the editor
+        self.profile_list.setCurrentRow(len(self.profiles) - 1)
+
+    def _delete(self) -> None:
+        row = self._row
+        if row < 0:
+            return
+        self._row = -1
+        del self.profiles[row]
+        self.profile_list.takeItem(row)  # selects a neighbour via _show
+        self._set_editable(bool(self.profiles))
+
+    def _save(self) -> None:
+        if not self._store():
+            return
+        names = [p.name for p in self.profiles]
+        duplicate = next((n for n in names if names.count(n) > 1), None)
+        if duplicate is not None:
+            QMessageBox.warning(
+                self, "WireGuard", f"Two profiles are named {duplicate}."
+            )
+            return
+        self.accept()
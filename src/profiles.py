@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tunnel profiles: named sets of tunnels, switched concurrently (no Qt).
+
+Applying a profile disconnects every active tunnel it does not list and
+connects the listed ones that are down.  plan() turns that into steps with
+dependencies and apply() runs every step whose dependencies are done, so a
+switch takes about as long as its slowest chain instead of the sum of all
+wg-quick runs.  Dependencies come from
+
+* the profile's "after" constraints: a tunnel connects once the tunnels
+  it names are up; with the constraints of all profiles, a tunnel goes
+  down only after the active tunnels that depend on it;
+* routing: a connect waits for the disconnects of tunnels whose routes
+  collide with its own (two default routes share wg-quick's fwmark table,
+  overlapping AllowedIPs would shadow each other).
+
+When a step fails or the switch is cancelled, steps not yet started are
+dropped and the completed ones are undone, again concurrently, with the
+dependencies reversed.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Final, Iterable, Mapping
+
+from wg_config import WgConfig
+
+_INVERSE: Final[dict[str, str]] = {"connect": "disconnect", "disconnect": "connect"}
+
+
+class Profile:
+    """Tunnels that should be up together, with ordering constraints."""
+
+    __slots__ = ("name", "tunnels", "after")
+
+    def __init__(
+        self,
+        name: str,
+        tunnels: Iterable[str],
+        after: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        self.name = name
+        self.tunnels = tuple(dict.fromkeys(tunnels))
+        # tunnel -> tunnels that must be up before it connects
+        self.after = {t: tuple(deps) for t, deps in (after or {}).items() if deps}
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "tunnels": list(self.tunnels),
+            "after": {t: list(deps) for t, deps in self.after.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> Profile:
+        return cls(str(data["name"]), data.get("tunnels", ()), data.get("after"))
+
+
+def check(profile: Profile) -> None:
+    """Raise ValueError if the constraints name other tunnels or loop."""
+    if not profile.name.strip():
+        raise ValueError("A profile needs a name.")
+    listed = set(profile.tunnels)
+    for tunnel, deps in profile.after.items():
+        for name in (tunnel, *deps):
+            if name not in listed:
+                raise ValueError(f"{profile.name}: {name} is not in the profile")
+    state: dict[str, int] = {}  # 1: on the current path, 2: finished
+
+    def visit(tunnel: str, path: list[str]) -> None:
+        if state.get(tunnel) == 2:
+            return
+        if state.get(tunnel) == 1:
+            loop = " → ".join(path[path.index(tunnel) :] + [tunnel])
+            raise ValueError(f"{profile.name}: circular order {loop}")
+        state[tunnel] = 1
+        for dep in profile.after.get(tunnel, ()):
+            visit(dep, path + [tunnel])
+        state[tunnel] = 2
+
+    for tunnel in profile.after:
+        visit(tunnel, [])
+
+
+# ───────── storage ───────── #
+def load(path: Path) -> list[Profile]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return [Profile.from_json(item) for item in data["profiles"]]
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f"{path}: {exc}") from None
+
+
+def save(path: Path, profiles: Iterable[Profile]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps({"profiles": [p.to_json() for p in profiles]}, indent=2),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+# ───────── planning ───────── #
+class Step:
+    """Connect or disconnect one tunnel once the steps in *needs* are done."""
+
+    __slots__ = ("action", "name", "needs")
+
+    def __init__(self, action: str, name: str) -> None:
+        self.action = action
+        self.name = name
+        self.needs: set[tuple[str, str]] = set()
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.action, self.name
+
+    def __repr__(self) -> str:
+        return f"Step({self.action} {self.name})"
+
+
+def _routes(config: WgConfig | None) -> list:
+    if config is None or (config.interface.table or "").lower() == "off":
+        return []
+    return [
+        ipaddress.ip_network(cidr)
+        for peer in config.peers
+        for cidr in peer.allowed_ips
+    ]
+
+
+def _collide(a: list, b: list) -> bool:
+    return any(x.version == y.version and x.overlaps(y) for x in a for y in b)
+
+
+def plan(
+    profile: Profile,
+    active: Iterable[str],
+    configs: Mapping[str, WgConfig | None],
+    constraints: Iterable[Profile] = (),
+) -> list[Step]:
+    """Steps that turn *active* into *profile*, disconnects first.
+
+    *configs* maps tunnel names to their parsed config (for the routing
+    dependencies); *constraints* are the profiles whose "after" rules
+    order the disconnects, usually all of them.
+    """
+    active = set(active)
+    wanted = set(profile.tunnels)
+    downs = {n: Step("disconnect", n) for n in sorted(active - wanted)}
+    ups = {n: Step("connect", n) for n in profile.tunnels if n not in active}
+
+    for name, step in ups.items():
+        step.needs |= {
+            ("connect", dep) for dep in profile.after.get(name, ()) if dep in ups
+        }
+    for other in (profile, *constraints):
+        for dependent, deps in other.after.items():
+            if dependent in downs:
+                for dep in deps:
+                    if dep in downs and dep != dependent:
+                        downs[dep].needs.add(("disconnect", dependent))
+
+    routes = {name: _routes(configs.get(name)) for name in (*downs, *ups)}
+    for name, step in ups.items():
+        step.needs |= {
+            ("disconnect", old)
+            for old in downs
+            if _collide(routes[name], routes[old])
+        }
+    return [*downs.values(), *ups.values()]
+
+
+# ───────── execution ───────── #
+class ProfileResult:
+    """What apply() did: completed steps, the failure and its rollback."""
+
+    def __init__(self) -> None:
+        self.done: list[Step] = []
+        self.failed: Step | None = None
+        self.error: str | None = None
+        self.rollback_errors: list[str] = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def describe(self) -> str:
+        if self.ok:
+            ups = sum(1 for s in self.done if s.action == "connect")
+            downs = len(self.done) - ups
+            return (
+                f"{ups} connected, {downs} disconnected "
+                f"in {self.elapsed * 1000:.0f} ms"
+            )
+        where = f"{self.failed.action} {self.failed.name}: " if self.failed else ""
+        text = f"{where}{self.error}; "
+        if self.rollback_errors:
+            return text + "rollback failed: " + "; ".join(self.rollback_errors)
+        return text + f"rolled back {len(self.done)} step(s)"
+
+
+RunStep = Callable[[Step, threading.Event], object]
+
+
+def _execute(
+    steps: list[Step], run: RunStep, cancel: threading.Event
+) -> tuple[list[Step], Step | None, str | None]:
+    """Run *steps* as their dependencies allow; stop starting new ones on
+    the first failure.  Returns (completed in order, failed step, error)."""
+    pending = {step.key: step for step in steps}
+    finished: set[tuple[str, str]] = set()
+    done: list[Step] = []
+    failed: Step | None = None
+    error: str | None = None
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(steps)), thread_name_prefix="wg-profile"
+    ) as pool:
+        running: dict[Future, Step] = {}
+        while True:
+            if error is None and not cancel.is_set():
+                for key, step in list(pending.items()):
+                    if step.needs <= finished:
+                        running[pool.submit(run, step, cancel)] = step
+                        del pending[key]
+            if not running:
+                break
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in completed:
+                step = running.pop(fut)
+                try:
+                    fut.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    if error is None:
+                        failed, error = step, str(exc) or type(exc).__name__
+                else:
+                    finished.add(step.key)
+                    done.append(step)
+    if error is None and pending:  # a late cancel leaves a finished switch alone
+        error = "cancelled"
+    return done, failed, error
+
+
+def _undo(done: list[Step]) -> list[Step]:
+    """Inverse steps of *done*: what depended on a step is undone first."""
+    undo = {step.key: Step(_INVERSE[step.action], step.name) for step in done}
+    for step in done:
+        for need in step.needs:
+            if need in undo:
+                undo[need].needs.add(undo[step.key].key)
+    return list(undo.values())
+
+
+def apply(
+    steps: list[Step], run: RunStep, cancel: threading.Event | None = None
+) -> ProfileResult:
+    """Run *steps* concurrently via *run*(step, cancel); roll back on failure.
+
+    *run* raises to report a failure; setting *cancel* stops the switch and
+    rolls back like a failure (the running steps see the same event).
+    """
+    start = time.perf_counter()
+    result = ProfileResult()
+    result.done, result.failed, result.error = _execute(
+        steps, run, cancel or threading.Event()
+    )
+    if result.error is not None and result.done:
+        _, failed, error = _execute(_undo(result.done), run, threading.Event())
+        if error is not None:
+            where = f"{failed.action} {failed.name}: " if failed else ""
+            result.rollback_errors.append(where + error)
+    result.elapsed = time.perf_counter() - start
+    return result
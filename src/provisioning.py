@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Bulk peer provisioning: keypairs, address allocation and client configs.
+
+`wg genkey | wg pubkey` forks two processes per key.  Keys are made here
+instead: private keys from os.urandom() and clamped like wg does, public
+keys by fixed-base scalar multiplication on the Edwards form of Curve25519
+(a table of 32 × 255 precomputed multiples of the base point, built on
+first use in ~0.1 s, i.e. one point addition per scalar byte) with a single
+field inversion per batch (Montgomery's trick) for the conversion back to
+the X25519 u-coordinate.  That is ~0.15 ms per key in CPython instead of two
+process starts.
+
+This arithmetic is not constant-time: fine for minting keys on the admin's
+own machine, not for a service whose timing an attacker can observe.
+"""
+
+from __future__ import annotations
+
+import base64
+import ipaddress
+import os
+import string
+import threading
+from pathlib import Path
+from typing import Final, Iterable, Iterator
+
+from wg_config import WgConfig, parse_config
+
+_P: Final[int] = 2**255 - 19
+_L: Final[int] = 2**252 + 27742317777372353535851937790883648493  # order of B
+_D2: Final[int] = 2 * (-121665 * pow(121666, _P - 2, _P)) % _P  # 2·d
+# the Ed25519 base point, birationally equivalent to X25519's u = 9
+_BX: Final[int] = (
+    15112221349535400772501151409588531511454012693041857206046113283949847762202
+)
+_BY: Final[int] = 4 * pow(5, _P - 2, _P) % _P
+_WINDOW_BITS: Final[int] = 8
+_WINDOWS: Final[int] = 32  # 256 bits / _WINDOW_BITS
+
+DEFAULT_ALLOWED_IPS: Final[tuple[str, ...]] = ("0.0.0.0/0", "::/0")
+# placeholders: name, private_key, public_key, preshared_key, address,
+# server_public_key, endpoint, allowed_ips, dns, keepalive
+DEFAULT_TEMPLATE: Final[str] = """[Interface]
+PrivateKey = ${private_key}
+Address = ${address}
+DNS = ${dns}
+
+[Peer]
+PublicKey = ${server_public_key}
+PresharedKey = ${preshared_key}
+AllowedIPs = ${allowed_ips}
+Endpoint = ${endpoint}
+PersistentKeepalive = ${keepalive}
+"""
+
+
+# ───────── X25519 ───────── #
+_Point = tuple[int, int, int, int]  # extended coordinates X:Y:Z:T
+_table: list[list[tuple[int, int, int]]] | None = None
+_table_lock = threading.Lock()
+
+
+def _add(p: _Point, q: _Point) -> _Point:
+    """p + q on -x² + y² = 1 + d·x²·y² (unified: also doubles)."""
+    x1, y1, z1, t1 = p
+    x2, y2, z2, t2 = q
+    a = (y1 - x1) * (y2 - x2) % _P
+    b = (y1 + x1) * (y2 + x2) % _P
+    c = t1 * _D2 * t2 % _P
+    d = 2 * z1 * z2 % _P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return e * f % _P, g * h % _P, f * g % _P, e * h % _P
+
+
+def _inverses(values: list[int]) -> list[int]:
+    """Modular inverses of all *values* for the price of one (Montgomery)."""
+    prefix, acc = [], 1
+    for value in values:
+        prefix.append(acc)
+        acc = acc * value % _P
+    inv = pow(acc, _P - 2, _P)
+    out = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        out[i] = prefix[i] * inv % _P
+        inv = inv * values[i] % _P
+    return out
+
+
+def _base_table() -> list[list[tuple[int, int, int]]]:
+    """j·256^w·B for w < 32, 1 ≤ j ≤ 255, as (y+x, y−x, 2d·x·y); built once."""
+    global _table
+    with _table_lock:
+        if _table is None:
+            points: list[_Point] = []
+            base: _Point = (_BX, _BY, 1, _BX * _BY % _P)
+            for _ in range(_WINDOWS):
+                multiple = base
+                for _ in range(2**_WINDOW_BITS - 1):
+                    points.append(multiple)
+                    multiple = _add(multiple, base)
+                base = multiple  # 256·base
+            flat = []
+            for (x, y, _, _), zinv in zip(points, _inverses([p[2] for p in points])):
+                x, y = x * zinv % _P, y * zinv % _P
+                flat.append(((y + x) % _P, (y - x) % _P, _D2 * x * y % _P))
+            row = 2**_WINDOW_BITS - 1
+            _table = [flat[w * row : (w + 1) * row] for w in range(_WINDOWS)]
+        return _table
+
+
+def _clamp(secret: bytes) -> int:
+    k = int.from_bytes(secret, "little")
+    return (k & ~7 & ((1 << 254) - 1)) | (1 << 254)
+
+
+def _public_bytes(scalars: list[int]) -> list[bytes]:
+    """X25519(k, 9) for every clamped scalar k, in one batch."""
+    table = _base_table()
+    mask = 2**_WINDOW_BITS - 1
+    nums, dens = [], []
+    for k in scalars:
+        k %= _L  # B has prime order L
+        x, y, z, t = 0, 1, 1, 0
+        window = 0
+        while k:
+            digit = k & mask
+            if digit:  # mixed addition with a table point (Z = 1)
+                ypx, ymx, xy2d = table[window][digit - 1]
+                a = (y - x) * ymx % _P
+                b = (y + x) * ypx % _P
+                c = t * xy2d % _P
+                d = 2 * z
+                e, f, g, h = b - a, d - c, d + c, b + a
+                x, y, z, t = e * f % _P, g * h % _P, f * g % _P, e * h % _P
+            k >>= _WINDOW_BITS
+            window += 1
+        nums.append((z + y) % _P)  # u = (1 + y) / (1 − y) with y = Y/Z
+        dens.append((z - y) % _P)
+    return [
+        (num * inv % _P).to_bytes(32, "little")
+        for num, inv in zip(nums, _inverses(dens))
+    ]
+
+
+class Keypair:
+    """A WireGuard private/public key pair, base64 like `wg genkey`."""
+
+    __slots__ = ("private_key", "public_key")
+
+    def __init__(self, private_key: str, public_key: str) -> None:
+        self.private_key = private_key
+        self.public_key = public_key
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def generate_keypairs(count: int) -> list[Keypair]:
+    """*count* fresh keypairs; randomness comes from one os.urandom() call."""
+    entropy = os.urandom(32 * count)
+    scalars = [_clamp(entropy[i : i + 32]) for i in range(0, 32 * count, 32)]
+    return [
+        Keypair(_b64(k.to_bytes(32, "little")), _b64(pub))
+        for k, pub in zip(scalars, _public_bytes(scalars))
+    ]
+
+
+def public_key(private_key: str) -> str:
+    """The public key of a base64 private key, like `wg pubkey`."""
+    raw = base64.b64decode(private_key, validate=True)
+    if len(raw) != 32:
+        raise ValueError("A WireGuard key is 32 bytes.")
+    return _b64(_public_bytes([_clamp(raw)])[0])
+
+
+def preshared_keys(count: int) -> list[str]:
+    """*count* preshared keys, like `wg genpsk`."""
+    entropy = os.urandom(32 * count)
+    return [_b64(entropy[i : i + 32]) for i in range(0, 32 * count, 32)]
+
+
+# ───────── addresses ───────── #
+class AddressPool:
+    """Hands out free host addresses, one from each subnet per peer."""
+
+    def __init__(self, subnets: Iterable[str], used: Iterable[str] = ()) -> None:
+        self.subnets = [ipaddress.ip_network(s, strict=False) for s in subnets]
+        if not self.subnets:
+            raise ValueError("No subnet to allocate addresses from.")
+        self._used = {ipaddress.ip_interface(u).ip for u in used}
+        self._free = [self._hosts(net) for net in self.subnets]
+
+    def _hosts(self, net) -> Iterator:
+        # lazily: a /64 has more hosts than could ever be listed
+        first = int(net.network_address)
+        last = int(net.broadcast_address)
+        if net.version == 4 and net.prefixlen < 31:
+            first, last = first + 1, last - 1  # network and broadcast
+        elif net.version == 6 and net.prefixlen < 127:
+            first += 1  # the subnet-router anycast address
+        kind = type(net.network_address)  # ip_address(int) could pick IPv4
+        for value in range(first, last + 1):
+            address = kind(value)
+            if address not in self._used:
+                yield address
+
+    def allocate(self) -> tuple[str, ...]:
+        """The next free address of every subnet, as /32 or /128."""
+        picked = []
+        for net, free in zip(self.subnets, self._free):
+            address = next(free, None)
+            if address is None:
+                raise ValueError(f"{net} has no free address left.")
+            self._used.add(address)
+            picked.append(f"{address}/{address.max_prefixlen}")
+        return tuple(picked)
+
+
+def used_addresses(server: WgConfig) -> list[str]:
+    """Addresses taken in *server*: its own and its peers' host routes."""
+    used = list(server.interface.addresses)
+    for peer in server.peers:
+        for cidr in peer.allowed_ips:
+            net = ipaddress.ip_network(cidr, strict=False)
+            if net.num_addresses == 1:
+                used.append(str(net.network_address))
+    return used
+
+
+# ───────── configs ───────── #
+class ProvisionedPeer:
+    """One new peer: its keys, addresses and rendered client config."""
+
+    __slots__ = ("name", "keypair", "preshared_key", "addresses", "config")
+
+    def __init__(
+        self,
+        name: str,
+        keypair: Keypair,
+        preshared_key: str | None,
+        addresses: tuple[str, ...],
+        config: str,
+    ) -> None:
+        self.name = name
+        self.keypair = keypair
+        self.preshared_key = preshared_key
+        self.addresses = addresses
+        self.config = config
+
+
+def _drop_empty(text: str) -> str:
+    """Remove "Key = " lines whose placeholder rendered empty."""
+    kept = []
+    for line in text.splitlines(keepends=True):
+        key, sep, value = line.partition("=")
+        if not sep or value.strip() or key.lstrip().startswith("#"):
+            kept.append(line)
+    return "".join(kept)
+
+
+def provision(
+    server: WgConfig,
+    names: list[str],
+    endpoint: str,
+    subnets: Iterable[str] | None = None,
+    allowed_ips: Iterable[str] = DEFAULT_ALLOWED_IPS,
+    dns: Iterable[str] = (),
+    keepalive: int | None = None,
+    psk: bool = True,
+    template: str = DEFAULT_TEMPLATE,
+) -> list[ProvisionedPeer]:
+    """Mint one peer of *server* per name, with a rendered client config.
+
+    Addresses come from *subnets* (default: those of the server's own
+    Address lines), skipping every address the server config already uses.
+    *template* is a string.Template over the placeholders listed at
+    DEFAULT_TEMPLATE; "Key = " lines left empty are dropped.  Every
+    rendered config is parsed, so a broken template fails here.
+    """
+    if server.interface.private_key is None:
+        raise ValueError(f"{server.name} has no PrivateKey.")
+    if len(set(names)) != len(names):
+        raise ValueError("Peer names must be unique.")
+    if subnets is None:
+        subnets = [
+            str(ipaddress.ip_interface(a).network) for a in server.interface.addresses
+        ]
+    pool = AddressPool(subnets, used_addresses(server))
+    server_key = public_key(server.interface.private_key)
+    keys = generate_keypairs(len(names))
+    psks: list[str | None] = [None] * len(names)
+    if psk:
+        psks = list(preshared_keys(len(names)))
+    shared = {
+        "server_public_key": server_key,
+        "endpoint": endpoint,
+        "allowed_ips": ", ".join(allowed_ips),
+        "dns": ", ".join(dns),
+        "keepalive": "" if keepalive is None else str(keepalive),
+    }
+    render = string.Template(template).substitute
+    peers = []
+    for name, keypair, preshared in zip(names, keys, psks):
+        addresses = pool.allocate()
+        try:
+            text = render(
+                shared,
+                name=name,
+                private_key=keypair.private_key,
+                public_key=keypair.public_key,
+                preshared_key=preshared or "",
+                address=", ".join(addresses),
+            )
+        except (KeyError, ValueError) as exc:
+            raise ValueError(f"Template: unknown or bad placeholder {exc}") from None
+        text = _drop_empty(text)
+        parse_config(text, name)  # ConfigError (a ValueError) on a bad template
+        peers.append(ProvisionedPeer(name, keypair, preshared, addresses, text))
+    return peers
+
+
+def server_peers(peers: Iterable[ProvisionedPeer]) -> str:
+    """[Peer] sections that add *peers* to the server's config."""
+    blocks = []
+    for peer in peers:
+        lines = [f"[Peer]\n# {peer.name}\nPublicKey = {peer.keypair.public_key}\n"]
+        if peer.preshared_key:
+            lines.append(f"PresharedKey = {peer.preshared_key}\n")
+        lines.append(f"AllowedIPs = {', '.join(peer.addresses)}\n")
+        blocks.append("".join(lines))
+    return "\n".join(blocks)
+
+
+def write_clients(peers: Iterable[ProvisionedPeer], directory: Path) -> list[Path]:
+    """Write NAME.conf per peer into *directory*, owner-only; never overwrites."""
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for peer in peers:
+        path = directory / f"{peer.name}.conf"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(peer.config)
+        written.append(path)
+    return written
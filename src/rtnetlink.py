@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Minimal rtnetlink link tracking (no Qt), shared by the GUI and the daemon.
+
+Subscribing to RTMGRP_LINK needs no privileges; a GETLINK dump gives the
+initial state and NEWLINK/DELLINK events keep it current.  The IPv4 route
+group likewise tells the bypass launcher when the default route moves.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+from typing import Final
+
+_NETLINK_ROUTE: Final[int] = 0
+_RTMGRP_LINK: Final[int] = 0x1
+_RTMGRP_IPV4_ROUTE: Final[int] = 0x40
+_NLMSG_ERROR: Final[int] = 2
+_NLMSG_DONE: Final[int] = 3
+RTM_NEWLINK: Final[int] = 16
+RTM_DELLINK: Final[int] = 17
+_RTM_GETLINK: Final[int] = 18
+_RTM_NEWROUTE: Final[int] = 24
+_RTM_GETROUTE: Final[int] = 26
+_NLM_F_REQUEST: Final[int] = 0x1
+_NLM_F_DUMP: Final[int] = 0x300
+_IFLA_IFNAME: Final[int] = 3
+_IFLA_LINKINFO: Final[int] = 18
+_IFLA_INFO_KIND: Final[int] = 1
+_RTA_OIF: Final[int] = 4
+_RTA_GATEWAY: Final[int] = 5
+_RTA_PRIORITY: Final[int] = 6
+_RTA_TABLE: Final[int] = 15
+_RT_TABLE_MAIN: Final[int] = 254
+
+_NLMSGHDR: Final[struct.Struct] = struct.Struct("=IHHII")
+_IFINFOMSG: Final[struct.Struct] = struct.Struct("=BxHiII")
+_RTATTR: Final[struct.Struct] = struct.Struct("=HH")
+# family, dst_len, src_len, tos, table, protocol, scope, type, flags
+_RTMSG: Final[struct.Struct] = struct.Struct("=BBBBBBBBI")
+
+
+def _attrs(buf: bytes, offset: int, end: int) -> dict[int, bytes]:
+    """Decode a run of rtattrs into {type: payload}."""
+    out: dict[int, bytes] = {}
+    while offset + _RTATTR.size <= end:
+        length, kind = _RTATTR.unpack_from(buf, offset)
+        if length < _RTATTR.size:
+            break
+        out[kind & 0x3FFF] = buf[offset + _RTATTR.size : offset + length]
+        offset += (length + 3) & ~3
+    return out
+
+
+def parse_link_messages(buf: bytes) -> list[tuple[int, int, str, str]]:
+    """Return (msg_type, ifindex, ifname, kind) for every link message in *buf*."""
+    links = []
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(buf):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(buf, offset)
+        if length < _NLMSGHDR.size:
+            break
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            body = offset + _NLMSGHDR.size
+            _, _, index, _, _ = _IFINFOMSG.unpack_from(buf, body)
+            attrs = _attrs(buf, body + _IFINFOMSG.size, offset + length)
+            name = attrs.get(_IFLA_IFNAME, b"").split(b"\0", 1)[0].decode()
+            info = attrs.get(_IFLA_LINKINFO, b"")
+            kind = _attrs(info, 0, len(info)).get(_IFLA_INFO_KIND, b"")
+            links.append((msg_type, index, name, kind.split(b"\0", 1)[0].decode()))
+        offset += (length + 3) & ~3
+    return links
+
+
+def _message_offsets(buf: bytes) -> list[int]:
+    offsets = []
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(buf):
+        length = _NLMSGHDR.unpack_from(buf, offset)[0]
+        if length < _NLMSGHDR.size:
+            break
+        offsets.append(offset)
+        offset += (length + 3) & ~3
+    return offsets
+
+
+def _dump(msg_type: int, body: bytes) -> list[bytes]:
+    """Run one NLM_F_DUMP request; return the received buffers."""
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_ROUTE) as sock:
+        sock.bind((0, 0))
+        sock.send(
+            _NLMSGHDR.pack(
+                _NLMSGHDR.size + len(body),
+                msg_type,
+                _NLM_F_REQUEST | _NLM_F_DUMP,
+                1,
+                0,
+            )
+            + body
+        )
+        bufs = []
+        while True:
+            buf = sock.recv(64 * 1024)
+            bufs.append(buf)
+            if not buf or any(
+                _NLMSGHDR.unpack_from(buf, off)[1] in (_NLMSG_DONE, _NLMSG_ERROR)
+                for off in _message_offsets(buf)
+            ):
+                return bufs
+
+
+def dump_wireguard_links() -> dict[int, str]:
+    """Ask the kernel for all links once and keep the WireGuard ones."""
+    links: dict[int, str] = {}
+    body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+    for buf in _dump(_RTM_GETLINK, body):
+        for _, index, name, kind in parse_link_messages(buf):
+            if kind == "wireguard":
+                links[index] = name
+    return links
+
+
+def default_route() -> tuple[str, str | None] | None:
+    """(interface, gateway) of the main table's IPv4 default route.
+
+    With several default routes the one with the lowest metric wins.
+    """
+    best: tuple[int, int, str | None] | None = None  # (metric, ifindex, gateway)
+    body = _RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0)
+    for buf in _dump(_RTM_GETROUTE, body):
+        for offset in _message_offsets(buf):
+            length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(buf, offset)
+            if msg_type != _RTM_NEWROUTE:
+                continue
+            rtm = offset + _NLMSGHDR.size
+            _, dst_len, _, _, table, _, _, _, _ = _RTMSG.unpack_from(buf, rtm)
+            attrs = _attrs(buf, rtm + _RTMSG.size, offset + length)
+            if _RTA_TABLE in attrs:
+                table = struct.unpack("=I", attrs[_RTA_TABLE])[0]
+            if dst_len != 0 or table != _RT_TABLE_MAIN or _RTA_OIF not in attrs:
+                continue
+            metric = struct.unpack("=I", attrs.get(_RTA_PRIORITY, bytes(4)))[0]
+            oif = struct.unpack("=I", attrs[_RTA_OIF])[0]
+            gateway = attrs.get(_RTA_GATEWAY)
+            if best is None or metric < best[0]:
+                best = (
+                    metric,
+                    oif,
+                    socket.inet_ntop(socket.AF_INET, gateway) if gateway else None,
+                )
+    if best is None:
+        return None
+    try:
+        return socket.if_indextoname(best[1]), best[2]
+    except OSError:
+        return None
+
+
+def _open_events(groups: int) -> socket.socket:
+    sock = socket.socket(
+        socket.AF_NETLINK,
+        socket.SOCK_RAW | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+        _NETLINK_ROUTE,
+    )
+    try:
+        sock.bind((0, groups))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def open_link_events() -> socket.socket:
+    """Non-blocking socket subscribed to link NEWLINK/DELLINK events."""
+    return _open_events(_RTMGRP_LINK)
+
+
+def open_route_events() -> socket.socket:
+    """Non-blocking socket subscribed to IPv4 route and link changes.
+
+    Any message on it means "re-check default_route()"; links are included
+    because an uplink going down takes its routes with it.
+    """
+    return _open_events(_RTMGRP_LINK | _RTMGRP_IPV4_ROUTE)
+
+
+def apply_link_events(links: dict[int, str], buf: bytes) -> bool:
+    """Update *links* (ifindex -> name) from the events in *buf*; True if changed."""
+    changed = False
+    for msg_type, index, name, kind in parse_link_messages(buf):
+        if msg_type == RTM_NEWLINK and kind == "wireguard":
+            changed |= links.get(index) != name
+            links[index] = name
+        elif msg_type == RTM_DELLINK and index in links:
+            del links[index]
+            changed = True
+    return changed
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Event-driven tunnel status: rtnetlink link events + inotify on /etc/wireguard.
+
+The monitor keeps the set of WireGuard interfaces up to date from kernel
+notifications instead of forking ``wg show interfaces`` on a timer.  Polling
+is only used when the netlink socket cannot be opened; its interval doubles
+with every poll that finds nothing new, up to a ceiling that is higher while
+no window is shown, and drops back to the minimum on a change or poke().
+With the shared daemon, both come from its "status" and "configs" events
+instead.  Every change also drops the matching entries of the query cache
+in wireguard_core, so cached answers never lag behind an event.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from typing import Any, Final
+
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+
+import rtnetlink
+from wireguard_core import (
+    WireGuard,
+    _CONFIG_DIR,
+    _inotify_open,
+    _inotify_read,
+    _using_daemon,
+)
+
+_POLL_MIN_MS: Final[int] = 3_000
+_POLL_IDLE_MAX_MS: Final[int] = 30_000  # window shown, nothing changing
+_POLL_HIDDEN_MAX_MS: Final[int] = 300_000  # tray only: nobody is looking
+
+
+class StatusMonitor(QObject):
+    """Pushes tunnel and config changes to the GUI through Qt signals."""
+
+    interfacesChanged = pyqtSignal(list)  # sorted active interface names
+    configsChanged = pyqtSignal(list)  # names of configs that changed
+    _polled = pyqtSignal(list)  # fallback poll result, from a worker thread
+    _event = pyqtSignal(dict)  # daemon event, from the helper reader thread
+
+    def __init__(self, wg: WireGuard, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.wg = wg
+        self._links: dict[int, str] = {}
+        self._active: list[str] = []
+        self._nl_sock: socket.socket | None = None
+        self._nl_notifier: QSocketNotifier | None = None
+        self._in_fd: int | None = None
+        self._in_notifier: QSocketNotifier | None = None
+        self._poll_timer: QTimer | None = None
+        self.poll_min_ms = _POLL_MIN_MS
+        self.poll_max_ms = _POLL_IDLE_MAX_MS
+        self.poll_hidden_max_ms = _POLL_HIDDEN_MAX_MS
+        self._hidden = False
+        self._stop = threading.Event()
+        self._polling = False
+        self._daemon = False
+        self._polled.connect(self._on_polled)
+        self._event.connect(self._on_daemon_event)
+
+    # ───────── lifecycle ───────── #
+    def start(self) -> None:
+        if _using_daemon() and self._start_daemon():
+            return
+        if not self._start_netlink():
+            self._poll_timer = QTimer(self)
+            self._poll_timer.timeout.connect(self.refresh)
+            self._poll_timer.start(self.poll_min_ms)
+        self._start_config_watch()
+        self.refresh()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._daemon:
+            self._daemon = False
+            try:
+                self.wg.unsubscribe(["status", "configs"], self._forward_event)
+            except Exception:  # pylint: disable=broad-except
+                pass  # daemon already gone
+        for notifier in (self._nl_notifier, self._in_notifier):
+            if notifier is not None:
+                notifier.setEnabled(False)
+        if self._poll_timer is not None:
+            self._poll_timer.stop()
+        if self._nl_sock is not None:
+            self._nl_sock.close()
+            self._nl_sock = None
+        if self._in_fd is not None:
+            os.close(self._in_fd)
+            self._in_fd = None
+
+    @property
+    def active(self) -> list[str]:
+        return list(self._active)
+
+    @property
+    def event_driven(self) -> bool:
+        return self._daemon or self._nl_sock is not None
+
+    @property
+    def poll_interval_ms(self) -> int | None:
+        """Current polling interval; None when events make polling unneeded."""
+        if self._poll_timer is None or not self._poll_timer.isActive():
+            return None
+        return self._poll_timer.interval()
+
+    # ───────── adaptive polling ───────── #
+    def poke(self) -> None:
+        """The user is looking: poll at full rate again (and now, if backed off)."""
+        timer = self._poll_timer
+        if timer is not None and timer.interval() > self.poll_min_ms:
+            timer.start(self.poll_min_ms)
+            self.refresh()
+
+    def set_hidden(self, hidden: bool) -> None:
+        """Allow the long back-off while no window shows the status."""
+        if hidden != self._hidden:
+            self._hidden = hidden
+            if not hidden:
+                self.poke()
+
+    def _back_off(self) -> None:
+        timer = self._poll_timer
+        if timer is None or self._stop.is_set():
+            return
+        ceiling = self.poll_hidden_max_ms if self._hidden else self.poll_max_ms
+        interval = min(timer.interval() * 2, ceiling)
+        if interval != timer.interval():
+            timer.setInterval(interval)
+
+    def _snap_back(self) -> None:
+        timer = self._poll_timer
+        if timer is not None and timer.interval() != self.poll_min_ms:
+            timer.start(self.poll_min_ms)
+
+    def refresh(self) -> None:
+        """Re-read the full interface set and emit if it changed."""
+        if self._daemon:
+            return  # the daemon pushes every change
+        if self._nl_sock is not None:
+            try:
+                self._links = rtnetlink.dump_wireguard_links()
+                self._publish()
+                return
+            except OSError:
+                pass
+        if not self._polling:  # `wg show` forks: keep it off the GUI thread
+            self._polling = True
+            threading.Thread(
+                target=lambda: self._polled.emit(
+                    self.wg.active_interfaces(refresh=True)
+                ),
+                name="wg-status-poll",
+                daemon=True,
+            ).start()
+
+    def _on_polled(self, names: list[str]) -> None:
+        self._polling = False
+        if not self._set_active(names):
+            self._back_off()
+
+    # ───────── shared daemon ───────── #
+    def _start_daemon(self) -> bool:
+        try:
+            snapshot = self.wg.subscribe(
+                ["status", "configs"], self._forward_event
+            )
+        except Exception:  # pylint: disable=broad-except
+            return False
+        self._daemon = True
+        self._set_active(snapshot.get("active", []))
+        return True
+
+    def _forward_event(self, event: dict[str, Any]) -> None:
+        if event.get("event") == "configs":  # before anyone can ask again
+            self.wg.invalidate_configs(event.get("names") or None)
+        if event.get("event") in ("status", "configs"):
+            self._event.emit(event)  # into the GUI thread
+
+    def _on_daemon_event(self, event: dict[str, Any]) -> None:
+        if event.get("event") == "status":
+            self._set_active(event.get("active", []))
+        elif event.get("event") == "configs" and event.get("names"):
+            self.configsChanged.emit(event["names"])
+
+    # ───────── netlink ───────── #
+    def _start_netlink(self) -> bool:
+        try:
+            sock = rtnetlink.open_link_events()
+        except OSError:
+            return False
+        self._nl_sock = sock
+        self._nl_notifier = QSocketNotifier(
+            sock.fileno(), QSocketNotifier.Type.Read, self
+        )
+        self._nl_notifier.activated.connect(self._on_netlink)
+        return True
+
+    def _on_netlink(self) -> None:
+        sock = self._nl_sock
+        if sock is None:
+            return
+        changed = False
+        while True:
+            try:
+                buf = sock.recv(64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError:  # ENOBUFS: events were dropped, resync
+                self.refresh()
+                return
+            changed |= rtnetlink.apply_link_events(self._links, buf)
+        if changed:
+            self._publish()
+
+    def _publish(self) -> None:
+        self._set_active(self._links.values())
+
+    def _set_active(self, names) -> bool:
+        active = sorted(set(names))
+        if active == self._active:
+            return False
+        self._active = active
+        self.wg.invalidate_interfaces()  # e.g. `wg show` of a tunnel now gone
+        self._snap_back()
+        self.interfacesChanged.emit(active)
+        return True
+
+    # ───────── config directory ───────── #
+    def _start_config_watch(self) -> None:
+        try:
+            self._in_fd = _inotify_open(_CONFIG_DIR)
+        except OSError:
+            # /etc/wireguard is normally root-only: let the helper watch it.
+            threading.Thread(
+                target=self._watch_via_helper,
+                name="wg-config-watch",
+                daemon=True,
+            ).start()
+            return
+        self._in_notifier = QSocketNotifier(
+            self._in_fd, QSocketNotifier.Type.Read, self
+        )
+        self._in_notifier.activated.connect(self._on_inotify)
+
+    def _on_inotify(self) -> None:
+        if self._in_fd is not None:
+            names = _inotify_read(self._in_fd)
+            if names:
+                self.wg.invalidate_configs(names)
+                self._snap_back()  # e.g. an import: tunnels may follow
+                self.configsChanged.emit(names)
+
+    def _watch_via_helper(self) -> None:
+        while not self._stop.is_set():
+            try:
+                names = self.wg.watch_configs()
+            except Exception:  # pylint: disable=broad-except
+                return  # helper gone or watch unsupported: stay silent
+            if names and not self._stop.is_set():
+                self.configsChanged.emit(names)
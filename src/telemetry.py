@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-peer throughput and handshake telemetry from `wg show all dump`.
+
+One privileged `wg show all dump` per interval covers every interface.  Each
+peer keeps fixed-size ``array('d')`` ring buffers of rx/tx rates, so a
+sample only overwrites floats in place: no per-sample objects survive the
+parse.  With the shared daemon the dump is sampled there, once for every
+subscribed client, and arrives as "telemetry" events.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from typing import Any, Final, Iterator
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from wireguard_core import WireGuard, _run_command, _using_daemon
+
+HISTORY: Final[int] = 120  # samples kept per peer (2 min at 1 Hz)
+STALE_HANDSHAKE_S: Final[int] = 180  # WireGuard's REJECT_AFTER_TIME
+_DUMP_CMD: Final[list[str]] = ["wg", "show", "all", "dump"]
+
+
+class PeerSeries:
+    """Counters and rate history for one peer of one interface."""
+
+    __slots__ = (
+        "interface",
+        "public_key",
+        "endpoint",
+        "rx_bytes",
+        "tx_bytes",
+        "handshake",
+        "rx_rates",
+        "tx_rates",
+        "_pos",
+        "_count",
+        "_last_time",
+        "seen",
+    )
+
+    def __init__(self, interface: str, public_key: str, capacity: int = HISTORY):
+        self.interface = interface
+        self.public_key = public_key
+        self.endpoint = ""
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.handshake = 0  # unix time, 0 = never
+        self.rx_rates = array("d", bytes(8 * capacity))
+        self.tx_rates = array("d", bytes(8 * capacity))
+        self._pos = 0
+        self._count = 0
+        self._last_time = 0.0
+        self.seen = 0  # sample generation, used to drop vanished peers
+
+    def push(self, now: float, rx: int, tx: int, handshake: int) -> None:
+        if self._last_time and now > self._last_time:
+            dt = now - self._last_time
+            # counters reset when the interface is recreated: treat as 0
+            self.rx_rates[self._pos] = max(rx - self.rx_bytes, 0) / dt
+            self.tx_rates[self._pos] = max(tx - self.tx_bytes, 0) / dt
+            self._pos = (self._pos + 1) % len(self.rx_rates)
+            self._count = min(self._count + 1, len(self.rx_rates))
+        self.rx_bytes, self.tx_bytes, self.handshake = rx, tx, handshake
+        self._last_time = now
+
+    def _latest(self, buf: array) -> float:
+        return buf[self._pos - 1] if self._count else 0.0
+
+    @property
+    def rx_rate(self) -> float:
+        return self._latest(self.rx_rates)
+
+    @property
+    def tx_rate(self) -> float:
+        return self._latest(self.tx_rates)
+
+    def history(self, buf: array) -> Iterator[float]:
+        """Yield the samples of *buf* oldest first."""
+        size = len(buf)
+        start = (self._pos - self._count) % size
+        for i in range(self._count):
+            yield buf[(start + i) % size]
+
+    def handshake_age(self, now: float) -> float | None:
+        return now - self.handshake if self.handshake else None
+
+    def is_stale(self, now: float) -> bool:
+        age = self.handshake_age(now)
+        return age is None or age > STALE_HANDSHAKE_S
+
+
+class TelemetryStore:
+    """Parses dump output into long-lived PeerSeries objects."""
+
+    def __init__(self, capacity: int = HISTORY) -> None:
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.peers: dict[tuple[str, str], PeerSeries] = {}
+        self._generation = 0
+
+    def ingest(self, dump: str, now: float) -> None:
+        with self.lock:
+            self._generation += 1
+            gen = self._generation
+            for line in dump.splitlines():
+                fields = line.split("\t")
+                if len(fields) != 9:  # interface lines have 5 fields
+                    continue
+                iface, pub, _, endpoint, _, hs, rx, tx, _ = fields
+                series = self.peers.get((iface, pub))
+                if series is None:
+                    series = self.peers[(iface, pub)] = PeerSeries(
+                        iface, pub, self.capacity
+                    )
+                if endpoint != series.endpoint:
+                    series.endpoint = endpoint
+                series.push(now, int(rx), int(tx), int(hs))
+                series.seen = gen
+            if any(s.seen != gen for s in self.peers.values()):
+                self.peers = {k: s for k, s in self.peers.items() if s.seen == gen}
+
+    def snapshot(self) -> list[PeerSeries]:
+        with self.lock:
+            return sorted(
+                self.peers.values(), key=lambda s: (s.interface, s.public_key)
+            )
+
+
+class TelemetrySampler(QObject):
+    """Samples all interfaces on a background thread and emits ``updated``."""
+
+    updated = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, interval: float = 1.0, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.interval = interval
+        self.store = TelemetryStore()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._subscribed = False
+
+    def start(self) -> None:
+        if _using_daemon():
+            if not self._subscribed:
+                try:
+                    WireGuard().subscribe(["telemetry"], self._on_event)
+                    self._subscribed = True
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.failed.emit(str(exc))
+            return
+        self._stop.clear()  # also revives a loop that is still winding down
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="wg-telemetry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._subscribed:
+            self._subscribed = False
+            try:
+                WireGuard().unsubscribe(["telemetry"], self._on_event)
+            except Exception:  # pylint: disable=broad-except
+                pass  # daemon already gone
+
+    def _on_event(self, event: dict[str, Any]) -> None:
+        """Daemon event listener; runs on the helper reader thread."""
+        if event.get("event") == "telemetry" and self._subscribed:
+            self.store.ingest(event.get("dump") or "", float(event.get("time", 0)))
+            self.updated.emit()
+
+    def sample(self) -> None:
+        out, err = _run_command(_DUMP_CMD, use_root=True)
+        if err:
+            self.failed.emit(err)
+            return
+        self.store.ingest(out or "", time.time())
+        self.updated.emit()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.sample()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+def format_rate(value: float) -> str:
+    for unit in ("B/s", "KiB/s", "MiB/s"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B/s" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB/s"
+
+
+def format_age(age: float | None) -> str:
+    if age is None:
+        return "never"
+    if age < 120:
+        return f"{age:.0f} s ago"
+    if age < 7200:
+        return f"{age / 60:.0f} min ago"
+    return f"{age / 3600:.0f} h ago"
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Live per-peer telemetry window with sparklines."""
+
+from __future__ import annotations
+
+import time
+from typing import Final
+
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import (
+    QDialog,
+    QHeaderView,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from telemetry import PeerSeries, TelemetrySampler, format_age, format_rate
+
+_COLUMNS: Final[list[str]] = [
+    "Interface",
+    "Peer",
+    "Endpoint",
+    "Rx",
+    "Tx",
+    "Handshake",
+    "Traffic",
+]
+_SPARK_COL: Final[int] = 6
+
+
+class Sparkline(QWidget):
+    """Draws the rx (and tx) history of one peer as two polylines."""
+
+    _RX: Final[QColor] = QColor(52, 152, 219)
+    _TX: Final[QColor] = QColor(230, 126, 34)
+
+    def __init__(self, series: PeerSeries, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.series = series
+        self.setMinimumSize(120, 24)
+
+    def paintEvent(self, _event) -> None:  # noqa: N802 (Qt override)
+        rx = list(self.series.history(self.series.rx_rates))
+        tx = list(self.series.history(self.series.tx_rates))
+        if len(rx) < 2:
+            return
+        peak = max(max(rx), max(tx), 1.0)
+        w, h = self.width() - 1, self.height() - 2
+        step = w / (len(self.series.rx_rates) - 1)
+        x0 = w - step * (len(rx) - 1)  # newest sample at the right edge
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for values, color in ((rx, self._RX), (tx, self._TX)):
+            painter.setPen(QPen(color, 1.2))
+            painter.drawPolyline(
+                QPolygonF(
+                    [
+                        QPointF(x0 + i * step, 1 + h - h * v / peak)
+                        for i, v in enumerate(values)
+                    ]
+                )
+            )
+
+
+class TelemetryDialog(QDialog):
+    def __init__(self, sampler: TelemetrySampler, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.setWindowTitle("WireGuard traffic")
+        self.resize(760, 320)
+        self.sampler = sampler
+        self._keys: list[tuple[str, str]] = []
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            _SPARK_COL, QHeaderView.ResizeMode.Stretch
+        )
+        layout.addWidget(self.table)
+        self.status = QLabel("Sampling…")
+        layout.addWidget(self.status)
+
+        sampler.updated.connect(self._render)
+        sampler.failed.connect(self.status.setText)
+
+    def showEvent(self, event) -> None:  # noqa: N802 (Qt override)
+        self.sampler.start()  # sample only while the window is open
+        super().showEvent(event)
+
+    def done(self, result: int) -> None:
+        self.sampler.stop()
+        super().done(result)
+
+    def _render(self) -> None:
+        now = time.time()
+        peers = self.sampler.store.snapshot()
+        keys = [(s.interface, s.public_key) for s in peers]
+        if keys != self._keys:  # peer set changed: rebuild rows once
+            self._keys = keys
+            self.table.setRowCount(len(peers))
+            for row, series in enumerate(peers):
+                for col in range(_SPARK_COL):
+                    self.table.setItem(row, col, QTableWidgetItem())
+                self.table.setCellWidget(row, _SPARK_COL, Sparkline(series))
+        stale = 0
+        for row, series in enumerate(peers):
+            is_stale = series.is_stale(now)
+            stale += is_stale
+            values = (
+                series.interface,
+                series.public_key[:10] + "…",
+                series.endpoint,
+                format_rate(series.rx_rate),
+                format_rate(series.tx_rate),
+                format_age(series.handshake_age(now)),
+            )
+            for col, text in enumerate(values):
+                item = self.table.item(row, col)
+                if item is not None and item.text() != text:
+                    item.setText(text)
+            hs_item = self.table.item(row, 5)
+            if hs_item is not None:
+                hs_item.setForeground(
+                    QBrush(QColor(Qt.GlobalColor.red))
+                    if is_stale
+                    else self.palette().text()
+                )
+                hs_item.setToolTip("Handshake is stale" if is_stale else "")
+            widget = self.table.cellWidget(row, _SPARK_COL)
+            if widget is not None:
+                widget.update()
+        self.status.setText(
+            f"{len(peers)} peer(s), {stale} with stale handshake"
+            if stale
+            else f"{len(peers)} peer(s)"
+        )
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Persistent per-tunnel traffic history in memory-mapped ring files (no Qt).
+
+Each tunnel has one fixed-size file, $XDG_DATA_HOME/wireguard-ui/history/
+NAME.ring, holding four rings of 32-byte records:
+
+* raw     one record per peer and sample: cumulative rx/tx counters and
+          the handshake age, as `wg show all dump` reports them;
+* minute, hour, day
+          rollups for the whole tunnel (peer = ALL_PEERS): bytes moved in
+          the bucket and the freshest handshake age at its end.
+
+Charting a week therefore reads a few thousand records with one
+struct.iter_unpack() and parses no text.  The file is allocated at its full
+size (under 1 MiB) when created and never grows; old records are
+overwritten in place.
+Public keys are numbered in NAME.peers, one per line.
+
+Writes are batched: samples go to in-memory queues and reach the mapping
+only on flush(), every FLUSH_INTERVAL_S or when a queue fills up, followed
+by one msync().  Between flushes no page is dirtied, so a laptop's disk can
+stay asleep.  Rollup buckets still open at a flush are written as PARTIAL
+records and replaced when they close; after a restart the open bucket is
+picked up again from its partial record.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Final, Iterable, NamedTuple
+
+from wireguard_core import _run_command
+from xdg_paths import data_dir
+
+_MAGIC: Final[bytes] = b"WGUIHIST"
+_VERSION: Final[int] = 1
+# time (s), peer index, flags, rx, tx, handshake age (s), padding
+RECORD: Final[struct.Struct] = struct.Struct("<IHHQQI4x")
+_HEADER: Final[struct.Struct] = struct.Struct("<8sII16s")  # + one _RING each
+_RING: Final[struct.Struct] = struct.Struct("<I4xQ")  # capacity, records written
+_HEADER_SIZE: Final[int] = 128
+
+LEVELS: Final[tuple[str, ...]] = ("raw", "minute", "hour", "day")
+CAPACITY: Final[dict[str, int]] = {
+    "raw": 8192,  # about a day for one peer at SAMPLE_INTERVAL_S
+    "minute": 10080,  # 7 days
+    "hour": 4320,  # 180 days
+    "day": 3660,  # 10 years
+}
+ALL_PEERS: Final[int] = 0xFFFF
+NEVER: Final[int] = 0xFFFFFFFF  # handshake age when there was none
+PARTIAL: Final[int] = 1  # flag: rollup bucket still open when written
+
+SAMPLE_INTERVAL_S: Final[float] = 10.0
+FLUSH_INTERVAL_S: Final[float] = 300.0
+_MAX_PENDING: Final[int] = 1024  # queued raw records that force a flush
+_DUMP_CMD: Final[list[str]] = ["wg", "show", "all", "dump"]
+
+
+class Record(NamedTuple):
+    time: int
+    peer: int
+    flags: int
+    rx: int
+    tx: int
+    handshake_age: int
+
+
+def history_dir() -> Path:
+    return data_dir() / "history"
+
+
+def _bucket(level: str, t: int) -> int:
+    if level == "minute":
+        return t - t % 60
+    if level == "hour":
+        return t - t % 3600
+    lt = time.localtime(t)  # days start at local midnight
+    return int(time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, 0, 0, 0, 0, 0, -1)))
+
+
+def _file_size() -> int:
+    return _HEADER_SIZE + RECORD.size * sum(CAPACITY.values())
+
+
+# ───────── ring file ───────── #
+class _Ring:
+    """One ring inside the mapping; ``written`` counts every record ever."""
+
+    __slots__ = ("mm", "header", "offset", "capacity", "written")
+
+    def __init__(self, mm: mmap.mmap, index: int, offset: int) -> None:
+        self.mm = mm
+        self.header = _HEADER.size + index * _RING.size
+        self.offset = offset
+        self.capacity, self.written = _RING.unpack_from(mm, self.header)
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def put(self, data: bytes, replace: bool) -> None:
+        if replace and self.written:
+            self.written -= 1
+        slot = self.written % self.capacity
+        self.mm[
+            self.offset + slot * RECORD.size : self.offset + (slot + 1) * RECORD.size
+        ] = data
+        self.written += 1
+
+    def store_header(self) -> None:
+        _RING.pack_into(self.mm, self.header, self.capacity, self.written)
+
+    def last(self) -> Record | None:
+        if not self.written:
+            return None
+        slot = (self.written - 1) % self.capacity
+        return Record(*RECORD.unpack_from(self.mm, self.offset + slot * RECORD.size))
+
+    def records(self, since: int = 0) -> list[Record]:
+        """Oldest first; records before *since* are skipped."""
+        size = RECORD.size
+        view = memoryview(self.mm)[self.offset : self.offset + self.capacity * size]
+        try:
+            if self.written > self.capacity:  # wrapped: oldest after the newest
+                split = self.written % self.capacity * size
+                chunks = [view[split:], view[:split]]
+            else:
+                chunks = [view[: self.written * size]]
+            return [
+                Record(*fields)
+                for chunk in chunks
+                for fields in RECORD.iter_unpack(chunk)
+                if fields[0] >= since
+            ]
+        finally:
+            view.release()
+
+
+def _create(path: Path, interface: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        header = bytearray(_HEADER_SIZE)
+        _HEADER.pack_into(
+            header, 0, _MAGIC, _VERSION, RECORD.size, interface.encode()[:16]
+        )
+        for i, level in enumerate(LEVELS):
+            _RING.pack_into(header, _HEADER.size + i * _RING.size, CAPACITY[level], 0)
+        fh.write(header)
+        fh.truncate(_file_size())
+        try:  # allocate now: a store to a hole on a full disk is a SIGBUS
+            os.posix_fallocate(fh.fileno(), 0, _file_size())
+        except OSError:
+            pass  # e.g. not supported by the file system; stay sparse
+    os.replace(tmp, path)
+
+
+def _map(path: Path, writable: bool) -> tuple[mmap.mmap, dict[str, _Ring]]:
+    """Map *path* and check its header; ValueError if it is not ours."""
+    with open(path, "r+b" if writable else "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size < _HEADER_SIZE:
+            raise ValueError(f"{path}: truncated history file")
+        mm = mmap.mmap(
+            fh.fileno(),
+            0,
+            access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+        )
+    magic, version, record_size, _ = _HEADER.unpack_from(mm, 0)
+    rings: dict[str, _Ring] = {}
+    offset = _HEADER_SIZE
+    for i, level in enumerate(LEVELS):
+        ring = rings[level] = _Ring(mm, i, offset)
+        offset += ring.capacity * RECORD.size
+    if (magic, version, record_size) != (_MAGIC, _VERSION, RECORD.size) or (
+        offset != size or not all(r.capacity for r in rings.values())
+    ):
+        mm.close()
+        raise ValueError(f"{path}: not a version {_VERSION} history file")
+    return mm, rings
+
+
+# ───────── writer ───────── #
+class _Bucket:
+    __slots__ = ("start", "rx", "tx", "age", "stored")
+
+    def __init__(self, start: int, rx=0, tx=0, age=NEVER, stored=False) -> None:
+        self.start = start
+        self.rx = rx
+        self.tx = tx
+        self.age = age
+        self.stored = stored  # a PARTIAL record of it is (or will be) the last
+
+
+class TunnelHistory:
+    """Appends samples of one tunnel to NAME.ring; not thread-safe."""
+
+    def __init__(self, name: str, directory: Path | None = None) -> None:
+        directory = directory or history_dir()
+        self.name = name
+        self.path = directory / f"{name}.ring"
+        try:
+            self.mm, self.rings = _map(self.path, writable=True)
+        except FileNotFoundError:
+            _create(self.path, name)
+            self.mm, self.rings = _map(self.path, writable=True)
+        except ValueError:  # older format or damaged: start over
+            self.path.replace(self.path.with_suffix(".ring.old"))
+            _create(self.path, name)
+            self.mm, self.rings = _map(self.path, writable=True)
+        self._peers_path = directory / f"{name}.peers"
+        try:
+            keys = self._peers_path.read_text(encoding="ascii").split()
+        except FileNotFoundError:
+            keys = []
+        self._peers = {key: i for i, key in enumerate(keys)}
+        self._new_peers: list[str] = []
+        self._counters: dict[str, tuple[int, int]] = {}
+        self._buckets: dict[str, _Bucket | None] = {}
+        self._pending: dict[str, list[tuple[bytes, bool]]] = {l: [] for l in LEVELS}
+
+    def _peer_index(self, public_key: str) -> int:
+        index = self._peers.get(public_key)
+        if index is None:
+            index = self._peers[public_key] = len(self._peers)
+            self._new_peers.append(public_key)
+        return min(index, ALL_PEERS - 1)  # a server this big shares the last one
+
+    def record(self, now: float, peers: Iterable[tuple[str, int, int, int]]) -> None:
+        """Queue one sample: (public key, rx, tx, latest handshake) per peer."""
+        t = int(now)
+        rx_delta = tx_delta = 0
+        freshest = NEVER
+        raw = self._pending["raw"]
+        for public_key, rx, tx, handshake in peers:
+            age = min(max(t - handshake, 0), NEVER - 1) if handshake else NEVER
+            raw.append(
+                (RECORD.pack(t, self._peer_index(public_key), 0, rx, tx, age), False)
+            )
+            previous = self._counters.get(public_key)
+            if previous is not None:  # counters restart with the interface
+                rx_delta += rx - previous[0] if rx >= previous[0] else rx
+                tx_delta += tx - previous[1] if tx >= previous[1] else tx
+            self._counters[public_key] = (rx, tx)
+            freshest = min(freshest, age)
+        for level in LEVELS[1:]:
+            bucket = self._open_bucket(level, t)
+            bucket.rx += rx_delta
+            bucket.tx += tx_delta
+            bucket.age = freshest
+
+    def _open_bucket(self, level: str, t: int) -> _Bucket:
+        start = _bucket(level, t)
+        if level not in self._buckets:  # first sample: resume a partial bucket
+            last = self.rings[level].last()
+            self._buckets[level] = (
+                _Bucket(start, last.rx, last.tx, last.handshake_age, True)
+                if last is not None and last.flags & PARTIAL and last.time == start
+                else None
+            )
+        bucket = self._buckets[level]
+        if bucket is not None and bucket.start != start:
+            self._queue(level, bucket, 0)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[level] = _Bucket(start)
+        return bucket
+
+    def _queue(self, level: str, bucket: _Bucket, flags: int) -> None:
+        data = RECORD.pack(
+            bucket.start, ALL_PEERS, flags, bucket.rx, bucket.tx, bucket.age
+        )
+        self._pending[level].append((data, bucket.stored))
+        bucket.stored = bool(flags & PARTIAL)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending["raw"])
+
+    def flush(self) -> None:
+        """Write queued records and open buckets to the file, then msync."""
+        for level in LEVELS[1:]:
+            bucket = self._buckets.get(level)
+            if bucket is not None:
+                self._queue(level, bucket, PARTIAL)
+        if self._new_peers:
+            with open(self._peers_path, "a", encoding="ascii") as fh:
+                fh.write("".join(f"{key}\n" for key in self._new_peers))
+            self._new_peers.clear()
+        if not any(self._pending.values()):
+            return
+        for level, queue in self._pending.items():
+            ring = self.rings[level]
+            for data, replace in queue:
+                ring.put(data, replace)
+            ring.store_header()  # after the records it counts
+            queue.clear()
+        self.mm.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.mm.close()
+
+
+# ───────── readers ───────── #
+def read(
+    name: str, level: str = "hour", since: int = 0, directory: Path | None = None
+) -> list[Record]:
+    """Records of one ring, oldest first; [] if the tunnel has no history.
+
+    Only what the writer has flushed is visible (see HistoryRecorder.flush).
+    """
+    path = (directory or history_dir()) / f"{name}.ring"
+    try:
+        mm, rings = _map(path, writable=False)
+    except (FileNotFoundError, ValueError):
+        return []
+    try:
+        return rings[level].records(since)
+    finally:
+        mm.close()
+
+
+def peers(name: str, directory: Path | None = None) -> list[str]:
+    """Public keys by peer index, for the "raw" records."""
+    path = (directory or history_dir()) / f"{name}.peers"
+    try:
+        return path.read_text(encoding="ascii").split()
+    except FileNotFoundError:
+        return []
+
+
+def rename(old: str, new: str, directory: Path | None = None) -> None:
+    """Carry the history of a renamed tunnel over (nothing if it has none)."""
+    directory = directory or history_dir()
+    for suffix in (".ring", ".peers"):
+        try:
+            (directory / f"{old}{suffix}").replace(directory / f"{new}{suffix}")
+        except FileNotFoundError:
+            pass
+
+
+# ───────── recorder ───────── #
+class HistoryRecorder:
+    """Samples every SAMPLE_INTERVAL_S while tunnels are up, on a thread.
+
+    The owner of the StatusMonitor feeds it the active tunnels through
+    set_active(); with none up the thread sleeps and the files are closed.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        interval: float = SAMPLE_INTERVAL_S,
+        flush_interval: float = FLUSH_INTERVAL_S,
+        sample: Callable[[], tuple[str | None, str | None]] | None = None,
+    ) -> None:
+        self.directory = directory or history_dir()
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self._sample = sample or (lambda: _run_command(_DUMP_CMD, use_root=True))
+        self._lock = threading.Lock()
+        self._tunnels: dict[str, TunnelHistory] = {}
+        self._seen: set[str] = set()  # tunnels sampled since the last flush
+        self._active = False
+        self._stopping = False
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name="wg-history", daemon=True
+            )
+            self._thread.start()
+
+    def set_active(self, names: list[str]) -> None:
+        active = bool(names)
+        if active != self._active:
+            self._active = active
+            self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.close()
+
+    def ingest(self, dump: str, now: float) -> None:
+        by_tunnel: dict[str, list[tuple[str, int, int, int]]] = {}
+        for line in dump.splitlines():
+            fields = line.split("\t")
+            if len(fields) != 9:  # interface lines have 5 fields
+                continue
+            iface, pub, _, _, _, hs, rx, tx, _ = fields
+            by_tunnel.setdefault(iface, []).append((pub, int(rx), int(tx), int(hs)))
+        with self._lock:
+            for name, samples in by_tunnel.items():
+                tunnel = self._tunnels.get(name)
+                if tunnel is None:
+                    tunnel = self._tunnels[name] = TunnelHistory(name, self.directory)
+                tunnel.record(now, samples)
+                self._seen.add(name)
+                if tunnel.pending >= _MAX_PENDING:
+                    tunnel.flush()
+
+    def flush(self) -> None:
+        """Write everything queued; tunnels that went away are closed."""
+        with self._lock:
+            for name, tunnel in list(self._tunnels.items()):
+                if name in self._seen:
+                    tunnel.flush()
+                else:
+                    tunnel.close()
+                    del self._tunnels[name]
+            self._seen.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            for tunnel in self._tunnels.values():
+                tunnel.close()
+            self._tunnels.clear()
+            self._seen.clear()
+
+    def _loop(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stopping:
+            if not self._active:
+                self.close()
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            started = time.monotonic()
+            out, err = self._sample()
+            if not err:
+                try:
+                    self.ingest(out or "", time.time())
+                except (OSError, ValueError):
+                    pass  # disk full or odd output: try again next sample
+            if started >= next_flush:
+                self.flush()
+                next_flush = started + self.flush_interval
+            self._wake.wait(max(0.0, self.interval - (time.monotonic() - started)))
+            self._wake.clear()
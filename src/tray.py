@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tray mode: a small status core that outlives the main window.
+
+TrayCore owns the StatusMonitor, the traffic HistoryRecorder and a tray
+icon showing whether a tunnel is up.  The MainWindow is built on demand
+and, when closed, deleted together with its widget tree, model, timers and
+thread pool; only the monitor keeps running, polling (if it has to poll at
+all) at its hidden back-off rate, and the recorder samples while a tunnel
+is up.
+Freed memory is handed back to the system, so the idle process stays small.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import gc
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+from PyQt6.QtCore import QEvent, QObject, QSettings, QTimer
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import QApplication, QMenu, QSystemTrayIcon
+
+from status_monitor import StatusMonitor
+from traffic_history import HistoryRecorder
+from wireguard_core import WireGuard
+
+if TYPE_CHECKING:
+    from gui import MainWindow
+
+_TEARDOWN_RETRY_MS: Final[int] = 1_000  # while operations are still running
+
+
+def release_memory() -> None:
+    """Collect cycles and return free heap pages to the kernel (glibc)."""
+    gc.collect()
+    libc = ctypes.util.find_library("c")
+    if libc is None:
+        return
+    try:
+        ctypes.CDLL(libc).malloc_trim(0)
+    except (OSError, AttributeError):  # not glibc
+        pass
+
+
+def _app_icon() -> QIcon:
+    icon = QIcon.fromTheme("wireguard-ui")
+    if icon.isNull():
+        icon = QIcon(str(Path(__file__).resolve().parent / "icons" / "icon.png"))
+    return icon
+
+
+def available() -> bool:
+    """True if tray mode is on (setting "ui/tray") and a tray exists."""
+    settings = QSettings("wireguard-ui", "wireguard-ui")
+    return (
+        settings.value("ui/tray", True, type=bool)
+        and QSystemTrayIcon.isSystemTrayAvailable()
+    )
+
+
+class TrayCore(QObject):
+    """Tray icon + status monitor; the window comes and goes (module doc)."""
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.settings = QSettings("wireguard-ui", "wireguard-ui")
+        self.monitor = StatusMonitor(WireGuard(), self)
+        self.recorder = HistoryRecorder()
+        self.window: MainWindow | None = None
+
+        icon = _app_icon()
+        self._icons = {
+            True: QIcon.fromTheme("network-vpn", icon),
+            False: QIcon.fromTheme(
+                "network-vpn-disconnected",
+                QIcon(icon.pixmap(64, QIcon.Mode.Disabled)),
+            ),
+        }
+        self.tray = QSystemTrayIcon(self._icons[False], self)
+        self.menu = QMenu()
+        self._state_action = self.menu.addAction("Not connected")
+        self._state_action.setEnabled(False)
+        self.menu.addSeparator()
+        self.menu.addAction("Open WireGuard UI").triggered.connect(self.show_window)
+        keep = self.menu.addAction("Keep running in tray when closed")
+        keep.setCheckable(True)
+        keep.setChecked(self.settings.value("ui/tray", True, type=bool))
+        keep.toggled.connect(lambda on: self.settings.setValue("ui/tray", on))
+        self.menu.addAction("Quit").triggered.connect(QApplication.quit)
+        self.menu.aboutToShow.connect(self.monitor.poke)
+        self.tray.setContextMenu(self.menu)
+        self.tray.activated.connect(self._on_activated)
+
+        self.monitor.interfacesChanged.connect(self._show_state)
+        self.monitor.interfacesChanged.connect(self.recorder.set_active)
+        self.recorder.start()
+        self.monitor.set_hidden(True)
+        self.monitor.start()
+        self._show_state(self.monitor.active)
+        self.tray.show()
+
+    def shutdown(self) -> None:
+        """On quit: write the traffic history that is still queued."""
+        if self.window is not None:
+            self.window.shutdown()
+        self.recorder.stop()
+
+    def _show_state(self, active: list[str]) -> None:
+        text = f"Connected to {', '.join(active)}" if active else "Not connected"
+        self.tray.setIcon(self._icons[bool(active)])
+        self.tray.setToolTip(f"WireGuard: {text}")
+        self._state_action.setText(text)
+
+    def _on_activated(self, reason: QSystemTrayIcon.ActivationReason) -> None:
+        self.monitor.poke()
+        if reason == QSystemTrayIcon.ActivationReason.Trigger:
+            if self.window is not None and self.window.isVisible():
+                self.window.close()
+            else:
+                self.show_window()
+
+    # ───────── window lifecycle ───────── #
+    def show_window(self) -> MainWindow:
+        if self.window is None:
+            # pylint: disable-next=import-outside-toplevel
+            from gui import MainWindow
+
+            self.window = MainWindow(self.monitor, self.recorder)
+            self.window.installEventFilter(self)
+        self.window.show()
+        self.window.raise_()
+        self.window.activateWindow()
+        return self.window
+
+    def eventFilter(self, obj, event) -> bool:  # noqa: N802 (Qt override)
+        if obj is self.window and event.type() == QEvent.Type.Close:
+            if not self.settings.value("ui/tray", True, type=bool):
+                QApplication.quit()
+                return False
+            event.ignore()
+            self.window.hide()
+            self._teardown()
+            return True
+        return False
+
+    def _teardown(self) -> None:
+        window = self.window
+        if window is None or window.isVisible():
+            return  # reopened meanwhile
+        if window.ops.busy:  # let connects etc. report back first
+            QTimer.singleShot(_TEARDOWN_RETRY_MS, self._teardown)
+            return
+        self.window = None
+        window.removeEventFilter(self)
+        window.shutdown()
+        # after the destructor has run, not inside it
+        window.destroyed.connect(lambda: QTimer.singleShot(0, release_memory))
+        window.deleteLater()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tunnel list for the main window: model, delegate and filter.
+
+Rows are plain data painted by TunnelDelegate, so a row costs a few strings
+instead of a widget with its own layout.  set_tunnels(), set_active() and
+set_busy() diff against the current state and only announce the rows that
+actually changed; the view repaints just those, if visible.
+"""
+
+from __future__ import annotations
+
+from typing import Final, Iterable
+
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSize,
+    QSortFilterProxyModel,
+    Qt,
+)
+from PyQt6.QtGui import QPalette
+from PyQt6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+)
+
+from wg_config import ConfigIndex, WgConfig
+
+_ACTIVE_MARKER: Final[str] = " [ACTIVE]"
+_BUSY_MARKERS: Final[dict[str, str]] = {
+    "connect": " [connecting…]",
+    "disconnect": " [disconnecting…]",
+    "reload": " [reloading…]",
+}
+
+
+def describe(config: WgConfig | None, error: str | None) -> str:
+    """Secondary text of a row: endpoint and peer count, or the parse error."""
+    if error:
+        return "invalid config"
+    if config is None:
+        return ""
+    peers = f"{config.peer_count} peer{'s' if config.peer_count != 1 else ''}"
+    return f"{config.endpoint} · {peers}" if config.endpoint else peers
+
+
+class TunnelListModel(QAbstractListModel):
+    """Tunnel names with their details, active flag and pending operation."""
+
+    NameRole = Qt.ItemDataRole.UserRole
+    DetailsRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._names: list[str] = []
+        self._info: list[tuple[str, str | None]] = []  # (details, error) per row
+        self._rows: dict[str, int] = {}
+        self._active: set[str] = set()
+        self._busy: dict[str, str] = {}
+        self._latency: dict[str, str] = {}  # endpoint probe result, e.g. "23 ms"
+
+    # ───────── updates ───────── #
+    def set_tunnels(self, names: list[str], index: ConfigIndex | None = None) -> None:
+        """Make the rows equal *names*, moving as few rows as possible.
+
+        Without *index* (the startup cache) rows that stay keep their details.
+        """
+        if index is None:
+            old = dict(zip(self._names, self._info))
+            info = [old.get(name, ("", None)) for name in names]
+        else:
+            info = [
+                (describe(index.get(n), index.error(n)), index.error(n)) for n in names
+            ]
+        wanted = set(names)
+        kept = [n for n in self._names if n in wanted]
+        if kept != [n for n in names if n in self._rows]:
+            self._reset(names, info)  # reordered: not worth diffing
+            return
+
+        # removals back to front, in contiguous runs
+        row = len(self._names) - 1
+        while row >= 0:
+            if self._names[row] in wanted:
+                row -= 1
+                continue
+            end = row
+            while row >= 0 and self._names[row] not in wanted:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, end)
+            del self._names[row + 1 : end + 1]
+            del self._info[row + 1 : end + 1]
+            self.endRemoveRows()
+
+        # insertions; the rows before *start* already match *names*
+        present = set(self._names)
+        start = 0
+        while start < len(names):
+            if names[start] in present:
+                start += 1
+                continue
+            end = start
+            while end < len(names) and names[end] not in present:
+                end += 1
+            self.beginInsertRows(QModelIndex(), start, end - 1)
+            self._names[start:start] = names[start:end]
+            self._info[start:start] = info[start:end]
+            self.endInsertRows()
+            start = end
+
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._busy = {n: a for n, a in self._busy.items() if n in self._rows}
+        changed = [row for row, new in enumerate(info) if self._info[row] != new]
+        self._info = info
+        self._changed(changed)
+
+    def _reset(self, names: list[str], info: list[tuple[str, str | None]]) -> None:
+        self.beginResetModel()
+        self._names = list(names)
+        self._info = info
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._busy = {n: a for n, a in self._busy.items() if n in self._rows}
+        self.endResetModel()
+
+    def set_active(self, active: Iterable[str]) -> None:
+        active = set(active)
+        flipped = self._active ^ active
+        self._active = active
+        self._changed(self._rows[n] for n in flipped if n in self._rows)
+
+    def set_busy(self, name: str, action: str | None) -> None:
+        if self._busy.get(name) == action or name not in self._rows:
+            return
+        if action is None:
+            del self._busy[name]
+        else:
+            self._busy[name] = action
+        self._changed([self._rows[name]])
+
+    def set_latency(self, latency: dict[str, str]) -> None:
+        """Replace the probe results; only rows whose text differs repaint."""
+        old, self._latency = self._latency, dict(latency)
+        self._changed(
+            self._rows[n]
+            for n in old.keys() | latency.keys()
+            if n in self._rows and old.get(n) != latency.get(n)
+        )
+
+    def _changed(self, rows: Iterable[int]) -> None:
+        """Emit dataChanged once per contiguous run of *rows*."""
+        rows = sorted(rows)
+        i = 0
+        while i < len(rows):
+            j = i
+            while j + 1 < len(rows) and rows[j + 1] == rows[j] + 1:
+                j += 1
+            self.dataChanged.emit(self.index(rows[i]), self.index(rows[j]))
+            i = j + 1
+
+    # ───────── Qt model interface ───────── #
+    def rowCount(self, parent=QModelIndex()):  # noqa: N802 (Qt override)
+        return 0 if parent.isValid() else len(self._names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = name + (_ACTIVE_MARKER if name in self._active else "")
+            busy = self._busy.get(name)
+            return text + _BUSY_MARKERS.get(busy, " […]") if busy else text
+        if role == self.NameRole:
+            return name
+        if role == self.DetailsRole:
+            details = self._info[index.row()][0]
+            latency = self._latency.get(name)
+            return " · ".join(filter(None, (details, latency)))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self._info[index.row()][1]
+        return None
+
+
+class TunnelFilterProxy(QSortFilterProxyModel):
+    """Case-insensitive substring filter on the tunnel name."""
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.setFilterRole(TunnelListModel.NameRole)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+
+class TunnelDelegate(QStyledItemDelegate):
+    """Name on the left, dimmed details on the right, one text line per row."""
+
+    _PADDING: Final[int] = 4
+    _GAP: Final[int] = 12
+
+    def paint(self, painter, option, index) -> None:
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        text, opt.text = opt.text, ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        # background, selection and focus only; the text is drawn below
+        style.drawControl(
+            QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget
+        )
+
+        rect = opt.rect.adjusted(self._PADDING, 0, -self._PADDING, 0)
+        metrics = opt.fontMetrics
+        selected = bool(opt.state & QStyle.StateFlag.State_Selected)
+        painter.save()
+        details = index.data(TunnelListModel.DetailsRole)
+        if details:
+            details = metrics.elidedText(
+                details, Qt.TextElideMode.ElideLeft, rect.width() // 2
+            )
+            painter.setPen(
+                opt.palette.color(QPalette.ColorRole.HighlightedText)
+                if selected
+                else opt.palette.color(
+                    QPalette.ColorGroup.Disabled, QPalette.ColorRole.Text
+                )
+            )
+            painter.drawText(
+                rect,
+                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                details,
+            )
+            rect.setRight(
+                rect.right() - metrics.horizontalAdvance(details) - self._GAP
+            )
+        role = QPalette.ColorRole
+        painter.setPen(
+            opt.palette.color(role.HighlightedText if selected else role.Text)
+        )
+        painter.drawText(
+            rect,
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            metrics.elidedText(text, Qt.TextElideMode.ElideRight, rect.width()),
+        )
+        painter.restore()
+
+    def sizeHint(self, option, index) -> QSize:  # noqa: N802 (Qt override)
+        return QSize(0, option.fontMetrics.height() + 2 * self._PADDING)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""wg-quick .conf model: parser, validation and an mtime-keyed parse cache."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import ipaddress
+import threading
+from typing import Final, Iterable
+
+_KEY_LEN: Final[int] = 32
+
+# key (lowercase) -> (attribute, kind); list-valued kinds and hooks may repeat
+_INTERFACE_KEYS: Final[dict[str, tuple[str, str]]] = {
+    "privatekey": ("private_key", "key"),
+    "listenport": ("listen_port", "port"),
+    "fwmark": ("fwmark", "str"),
+    "address": ("addresses", "addresses"),
+    "dns": ("dns", "list"),
+    "mtu": ("mtu", "mtu"),
+    "table": ("table", "str"),
+    "preup": ("pre_up", "hook"),
+    "postup": ("post_up", "hook"),
+    "predown": ("pre_down", "hook"),
+    "postdown": ("post_down", "hook"),
+    "saveconfig": ("save_config", "bool"),
+}
+_PEER_KEYS: Final[dict[str, tuple[str, str]]] = {
+    "publickey": ("public_key", "key"),
+    "presharedkey": ("preshared_key", "key"),
+    "allowedips": ("allowed_ips", "networks"),
+    "endpoint": ("endpoint", "endpoint"),
+    "persistentkeepalive": ("persistent_keepalive", "keepalive"),
+}
+
+
+class ConfigError(ValueError):
+    """The config text is not a valid wg-quick configuration."""
+
+
+class InterfaceSection:
+    __slots__ = (
+        "private_key",
+        "listen_port",
+        "fwmark",
+        "addresses",
+        "dns",
+        "mtu",
+        "table",
+        "pre_up",
+        "post_up",
+        "pre_down",
+        "post_down",
+        "save_config",
+    )
+
+    def __init__(self) -> None:
+        self.private_key: str | None = None
+        self.listen_port: int | None = None
+        self.fwmark: str | None = None
+        self.addresses: tuple[str, ...] = ()
+        self.dns: tuple[str, ...] = ()
+        self.mtu: int | None = None
+        self.table: str | None = None
+        self.pre_up: tuple[str, ...] = ()
+        self.post_up: tuple[str, ...] = ()
+        self.pre_down: tuple[str, ...] = ()
+        self.post_down: tuple[str, ...] = ()
+        self.save_config: bool = False
+
+
+class Peer:
+    __slots__ = (
+        "public_key",
+        "preshared_key",
+        "allowed_ips",
+        "endpoint",
+        "persistent_keepalive",
+    )
+
+    def __init__(self) -> None:
+        self.public_key: str | None = None
+        self.preshared_key: str | None = None
+        self.allowed_ips: tuple[str, ...] = ()
+        self.endpoint: str | None = None
+        self.persistent_keepalive: int | None = None
+
+
+class WgConfig:
+    __slots__ = ("name", "interface", "peers")
+
+    def __init__(self, name: str, interface: InterfaceSection, peers: list[Peer]):
+        self.name = name
+        self.interface = interface
+        self.peers = tuple(peers)
+
+    @property
+    def endpoint(self) -> str | None:
+        """Endpoint of the first peer that has one."""
+        return next((p.endpoint for p in self.peers if p.endpoint), None)
+
+    @property
+    def peer_count(self) -> int:
+        return len(self.peers)
+
+
+# ───────── value parsers ───────── #
+def _parse_key(value: str) -> str:
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raw = b""
+    if len(raw) != _KEY_LEN:
+        raise ValueError("must be a base64-encoded 32-byte key")
+    return value
+
+
+def _parse_int(value: str, low: int, high: int) -> int:
+    number = int(value)
+    if not low <= number <= high:
+        raise ValueError(f"must be between {low} and {high}")
+    return number
+
+
+def split_endpoint(value: str) -> tuple[str, int]:
+    """Split ``host:port`` / ``[v6]:port`` into host and port."""
+    if value.startswith("["):
+        host, sep, port = value[1:].partition("]:")
+    else:
+        host, sep, port = value.rpartition(":")
+    if not sep or not host or ":" in host and not value.startswith("["):
+        raise ValueError("must be host:port or [IPv6]:port")
+    return host, _parse_int(port, 1, 65535)
+
+
+def join_endpoint(host: str, port: int) -> str:
+    """Inverse of split_endpoint(): brackets IPv6 addresses."""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _parse_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_value(kind: str, value: str):
+    if kind == "key":
+        return _parse_key(value)
+    if kind == "port":
+        return _parse_int(value, 0, 65535)
+    if kind == "mtu":
+        return _parse_int(value, 576, 65535)
+    if kind == "keepalive":
+        return 0 if value == "off" else _parse_int(value, 0, 65535)
+    if kind == "bool":
+        if value.lower() not in ("true", "false"):
+            raise ValueError("must be true or false")
+        return value.lower() == "true"
+    if kind == "endpoint":
+        split_endpoint(value)
+        return value
+    if kind == "addresses":
+        return [str(ipaddress.ip_interface(v)) for v in _parse_list(value)]
+    if kind == "networks":
+        return [
+            str(ipaddress.ip_network(v, strict=False)) for v in _parse_list(value)
+        ]
+    if kind == "list":
+        return _parse_list(value)
+    return value  # "str" and "hook" are taken verbatim
+
+
+def parse_config(text: str, name: str = "") -> WgConfig:
+    """Parse and validate wg-quick config *text*; raise ConfigError on problems."""
+    iface: InterfaceSection | None = None
+    peers: list[Peer] = []
+    section: InterfaceSection | Peer | None = None
+    keys: dict[str, tuple[str, str]] = {}
+
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            header = line[1:-1].strip().lower()
+            if header == "interface":
+                if iface is not None:
+                    raise ConfigError(f"line {lineno}: duplicate [Interface]")
+                section = iface = InterfaceSection()
+                keys = _INTERFACE_KEYS
+            elif header == "peer":
+                section = Peer()
+                peers.append(section)
+                keys = _PEER_KEYS
+            else:
+                raise ConfigError(f"line {lineno}: unknown section {line}")
+            continue
+        key, sep, value = line.partition("=")
+        key, value = key.strip(), value.strip()
+        if section is None or not sep:
+            raise ConfigError(f"line {lineno}: expected 'key = value' in a section")
+        spec = keys.get(key.lower())
+        if spec is None:
+            raise ConfigError(f"line {lineno}: unknown key {key!r}")
+        attr, kind = spec
+        try:
+            parsed = _parse_value(kind, value)
+        except ValueError as exc:
+            raise ConfigError(f"line {lineno}: {key} {exc}") from None
+        if isinstance(parsed, list) or kind == "hook":
+            parsed = getattr(section, attr) + tuple(
+                parsed if isinstance(parsed, list) else [parsed]
+            )
+        setattr(section, attr, parsed)
+
+    if iface is None:
+        raise ConfigError("missing [Interface] section")
+    seen: set[str] = set()
+    for index, peer in enumerate(peers, 1):
+        if peer.public_key is None:
+            raise ConfigError(f"peer #{index} has no PublicKey")
+        if peer.public_key in seen:
+            raise ConfigError(f"peer #{index} repeats PublicKey {peer.public_key}")
+        seen.add(peer.public_key)
+    return WgConfig(name, iface, peers)
+
+
+def with_endpoints(text: str, endpoints: dict[str, str]) -> str:
+    """Replace the Endpoint of the peers in *endpoints* (PublicKey -> value).
+
+    Every other line of *text* is kept verbatim, comments and hooks included.
+    """
+    lines = text.splitlines(keepends=True)
+    peers: list[tuple[str | None, int | None]] = []  # (PublicKey, Endpoint line)
+    in_peer = False
+    for lineno, raw in enumerate(lines):
+        line = raw.split("#", 1)[0].strip()
+        if line.startswith("[") and line.endswith("]"):
+            in_peer = line[1:-1].strip().lower() == "peer"
+            if in_peer:
+                peers.append((None, None))
+            continue
+        key, _, value = line.partition("=")
+        key = key.strip().lower()
+        if in_peer and key == "publickey":
+            peers[-1] = (value.strip(), peers[-1][1])
+        elif in_peer and key == "endpoint":
+            peers[-1] = (peers[-1][0], lineno)
+    for public_key, lineno in peers:
+        if public_key in endpoints and lineno is not None:
+            lines[lineno] = f"Endpoint = {endpoints[public_key]}\n"
+    return "".join(lines)
+
+
+# ───────── parse cache ───────── #
+StatKey = tuple[int, int, int]  # (inode, mtime_ns, size)
+
+
+class _Entry:
+    __slots__ = ("key", "config", "error")
+
+    def __init__(self, key: StatKey, config: WgConfig | None, error: str | None):
+        self.key = key
+        self.config = config
+        self.error = error
+
+
+class ConfigIndex:
+    """Parsed configs keyed by (inode, mtime, size) so only changed files are re-read.
+
+    Thread-safe: scans may run on worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+
+    def stale(self, stats: dict[str, StatKey]) -> list[str]:
+        """Return the names whose file changed since they were parsed."""
+        with self._lock:
+            known = {e.key for e in self._entries.values()}
+            # a rename keeps (inode, mtime, size), so the old parse is reused
+            return [
+                name for name, key in stats.items() if tuple(key) not in known
+            ]
+
+    def update(self, stats: dict[str, StatKey], texts: dict[str, str | None]) -> None:
+        """Replace the index with *stats*, parsing *texts* for changed files."""
+        with self._lock:
+            by_key = {e.key: e for e in self._entries.values()}
+            entries: dict[str, _Entry] = {}
+            for name, key in stats.items():
+                key = tuple(key)  # type: ignore[assignment]
+                if name in texts:
+                    entries[name] = self._parse(name, key, texts[name])  # type: ignore[arg-type]
+                    continue
+                entry = self._entries.get(name)
+                if entry is None or entry.key != key:
+                    entry = by_key.get(key)  # type: ignore[arg-type]
+                if entry is None:
+                    continue  # not read yet: the next scan picks it up
+                if entry.config is not None and entry.config.name != name:
+                    entry = _Entry(
+                        entry.key,
+                        WgConfig(name, entry.config.interface, list(entry.config.peers)),
+                        None,
+                    )
+                entries[name] = entry
+            self._entries = entries
+
+    def invalidate(self, names: Iterable[str] | None = None) -> None:
+        with self._lock:
+            if names is None:
+                self._entries.clear()
+            for name in names or ():
+                self._entries.pop(name, None)
+
+    def get(self, name: str) -> WgConfig | None:
+        entry = self._entries.get(name)
+        return entry.config if entry else None
+
+    def error(self, name: str) -> str | None:
+        entry = self._entries.get(name)
+        return entry.error if entry else None
+
+    def names(self) -> list[str]:
+        return sorted(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _parse(name: str, key: StatKey, text: str | None) -> _Entry:
+        if text is None:
+            return _Entry(key, None, "unreadable")
+        try:
+            return _Entry(key, parse_config(text, name), None)
+        except ConfigError as exc:
+            return _Entry(key, None, str(exc))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command-line client for the shared daemon (see wg_daemon.py).
+
+    wg_ctl.py list | status | up NAME [--native] | down NAME [--native]
+    wg_ctl.py show NAME    `wg show NAME`, streamed as the daemon reads it
+    wg_ctl.py watch        print status/config events as JSON lines
+    wg_ctl.py telemetry    print per-peer rates as JSON lines
+    wg_ctl.py provision SERVER --count N --endpoint HOST:PORT --out DIR
+                           mint N peers of SERVER: client configs in DIR,
+                           [Peer] sections added with --add-to-server
+
+Needs membership in the daemon's group (or root); never prompts via pkexec.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from wireguard_core import DAEMON_SOCKET_PATH, WireGuard, _connect_daemon
+
+
+def _print_json(obj: Any) -> None:
+    print(json.dumps(obj, ensure_ascii=False), flush=True)
+
+
+def _echo(fd: str, text: str) -> None:
+    """Pass helper output through to our own stdout/stderr."""
+    out = sys.stderr if fd == "stderr" else sys.stdout
+    out.write(text)
+    out.flush()
+
+
+def _follow(wg: WireGuard, topics: list[str], handle) -> None:
+    """Subscribe to *topics* and pass events to *handle* until Ctrl-C."""
+    events: queue.Queue[dict[str, Any]] = queue.Queue()
+    snapshot = wg.subscribe(topics, events.put)
+    if "status" in topics:
+        _print_json({"event": "status", **snapshot})
+    try:
+        while True:
+            handle(events.get())
+    except KeyboardInterrupt:
+        pass
+
+
+def _telemetry_printer():
+    """Turn raw dumps into {"interface", "peer", "rx_bps", "tx_bps", ...}."""
+    last: dict[tuple[str, str], tuple[float, int, int]] = {}
+
+    def handle(event: dict[str, Any]) -> None:
+        now = float(event.get("time", 0))
+        for line in (event.get("dump") or "").splitlines():
+            fields = line.split("\t")
+            if len(fields) != 9:  # interface lines have 5 fields
+                continue
+            iface, pub, _, endpoint, _, hs, rx, tx, _ = fields
+            prev = last.get((iface, pub))
+            last[(iface, pub)] = (now, int(rx), int(tx))
+            if prev is None or now <= prev[0]:
+                continue
+            dt = now - prev[0]
+            _print_json(
+                {
+                    "interface": iface,
+                    "peer": pub,
+                    "endpoint": endpoint,
+                    "rx_bps": max(int(rx) - prev[1], 0) / dt,
+                    "tx_bps": max(int(tx) - prev[2], 0) / dt,
+                    "handshake": int(hs),
+                }
+            )
+
+    return handle
+
+
+def _provision(wg: WireGuard, args: argparse.Namespace) -> None:
+    # pylint: disable-next=import-outside-toplevel
+    import provisioning
+
+    start = time.perf_counter()
+    options = {
+        "subnets": args.subnet,
+        "allowed_ips": [a.strip() for a in args.allowed_ips.split(",") if a.strip()],
+        "dns": [d.strip() for d in args.dns.split(",") if d.strip()],
+        "keepalive": args.keepalive,
+        "psk": not args.no_psk,
+    }
+    if args.template is not None:
+        options["template"] = args.template.read_text(encoding="utf-8")
+    names = [f"{args.prefix}{i}" for i in range(1, args.count + 1)]
+    peers = wg.provision_peers(args.server, names, args.endpoint, **options)
+    written = provisioning.write_clients(peers, args.out)
+    if args.add_to_server:
+        wg.add_peers(args.server, peers)
+    print(
+        f"{len(written)} client config(s) in {args.out}"
+        + (f", peers added to {args.server}" if args.add_to_server else "")
+        + f" ({(time.perf_counter() - start) * 1000:.0f} ms)"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="wireguard-ui-ctl", description=__doc__)
+    parser.add_argument("--socket", type=Path, default=DAEMON_SOCKET_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="configured tunnels")
+    sub.add_parser("status", help="active tunnels")
+    for name in ("up", "down"):
+        cmd = sub.add_parser(name, help=f"bring a tunnel {name}")
+        cmd.add_argument("name")
+        cmd.add_argument("--native", action="store_true", help="native engine")
+    cmd = sub.add_parser("show", help="wg show for one tunnel")
+    cmd.add_argument("name")
+    sub.add_parser("watch", help="follow status and config changes")
+    sub.add_parser("telemetry", help="follow per-peer traffic")
+    cmd = sub.add_parser("provision", help="generate peers for a server tunnel")
+    cmd.add_argument("server")
+    cmd.add_argument("--count", type=int, required=True)
+    cmd.add_argument("--prefix", default="peer", help="client names PREFIX1…PREFIXN")
+    cmd.add_argument("--endpoint", required=True, help="HOST:PORT of the server")
+    cmd.add_argument(
+        "--subnet", action="append", help="allocate from (default: server Address)"
+    )
+    cmd.add_argument("--allowed-ips", default="0.0.0.0/0, ::/0")
+    cmd.add_argument("--dns", default="")
+    cmd.add_argument("--keepalive", type=int)
+    cmd.add_argument("--no-psk", action="store_true", help="no preshared keys")
+    cmd.add_argument("--template", type=Path, help="client config template")
+    cmd.add_argument("--out", type=Path, required=True, help="client config dir")
+    cmd.add_argument(
+        "--add-to-server", action="store_true", help="append the peers to SERVER"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if not _connect_daemon(args.socket):
+            print(f"daemon not running at {args.socket}", file=sys.stderr)
+            return 2
+    except PermissionError as exc:
+        print(f"daemon refused: {exc}", file=sys.stderr)
+        return 2
+
+    wg = WireGuard()
+    try:
+        if args.command == "list":
+            print("\n".join(wg.list_configs()))
+        elif args.command == "status":
+            print("\n".join(wg.active_interfaces()))
+        elif args.command in ("up", "down"):
+            engine = "native" if args.native else "wg-quick"
+            action = wg.connect if args.command == "up" else wg.disconnect
+            used = action(args.name, engine=engine, on_output=_echo)
+            print(f"{args.name}: {args.command} ({used})")
+        elif args.command == "show":
+            show = wg.stream_command(["wg", "show", args.name])
+            while True:
+                try:
+                    _echo(*next(show))
+                except StopIteration as done:
+                    return done.value
+        elif args.command == "provision":
+            _provision(wg, args)
+        elif args.command == "watch":
+            _follow(wg, ["status", "configs"], _print_json)
+        else:
+            _follow(wg, ["telemetry"], _telemetry_printer())
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(f"{args.command}: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Shared root daemon: one privileged context for every GUI and script.
+
+    wireguard_core.py --daemon [--socket PATH] [--group NAME]
+
+Listens on a Unix socket (default /run/wireguard-ui.sock) and speaks the
+root-helper protocol v3, so clients use the same ops as with a private
+pkexec'd helper.  Peers are authorised by SO_PEERCRED: root and members of
+--group (default "wireguard-ui").  Other users get an error hello and are
+disconnected.
+
+Membership is a privilege: members bring tunnels up and down and install
+configs as root.  They get no command line of their own, though: "run"
+only takes `wg show` (see core._op_run), every other op takes tunnel names
+rather than paths, and configs they install may not carry PreUp/PostUp/
+PreDown/PostDown hooks, which wg-quick would run as root.
+
+On top of the helper ops the daemon serves
+
+    status                  active interface names (cached)
+    subscribe {topics}      push {"event": topic, ...} lines to this client
+    unsubscribe {topics}
+
+with the topics
+
+    status      {"active": [...]}, on every link change
+    configs     {"names": [...]}, config files changed in /etc/wireguard
+    telemetry   {"time": t, "dump": "..."}, `wg show all dump` once per
+                second, sampled only while someone is subscribed
+
+Status comes from rtnetlink (`wg show interfaces` every 3 s if netlink is
+unavailable) and is computed once for all clients.
+"""
+
+from __future__ import annotations
+
+import argparse
+import grp
+import json
+import os
+import pwd
+import queue
+import re
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Final
+
+import rtnetlink
+import wireguard_core as core
+
+DEFAULT_GROUP: Final[str] = "wireguard-ui"
+TOPICS: Final[frozenset[str]] = frozenset({"status", "configs", "telemetry"})
+_WORKERS: Final[int] = 8
+_SEND_QUEUE: Final[int] = 256  # lines; a client this far behind is dropped
+_POLL_INTERVAL_S: Final[float] = 3.0
+_TELEMETRY_INTERVAL_S: Final[float] = 1.0
+# a hook line as wg-quick reads it: the key is what precedes "=" or "#"
+_HOOK_LINE: Final[re.Pattern[str]] = re.compile(
+    r"^\s*(pre|post)(up|down)\s*(=|#|$)", re.IGNORECASE | re.MULTILINE
+)
+# ops after which the status is re-read instead of waiting for netlink
+_MUTATING_OPS: Final[tuple[str, ...]] = (
+    "connect",
+    "disconnect",
+    "reload",
+)
+_PEERCRED: Final[struct.Struct] = struct.Struct("3i")  # pid, uid, gid
+
+
+class _Client:
+    """One connection; replies and events leave through a bounded queue."""
+
+    def __init__(self, sock: socket.socket, uid: int) -> None:
+        self.sock = sock
+        self.uid = uid
+        self.topics: set[str] = set()
+        self._queue: queue.Queue[str | None] = queue.Queue(_SEND_QUEUE)
+        self._closed = threading.Event()
+        threading.Thread(
+            target=self._writer, name=f"wg-daemon-send-{uid}", daemon=True
+        ).start()
+
+    def send(self, line: str) -> None:
+        if self._closed.is_set():
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.close()  # not reading: do not let it stall the others
+
+    def close(self, drain: bool = False) -> None:
+        """Stop sending; with *drain*, what is already queued still goes out."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if not drain:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the writer is still busy; the shutdown makes it fail
+
+    def _writer(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            try:
+                self.sock.sendall(line.encode() + b"\n")
+            except OSError:
+                self.close()
+                break
+        self.sock.close()
+
+
+class Hub:
+    """Daemon-wide state: clients, the active interface set, event sources."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: set[_Client] = set()
+        self._links: dict[int, str] = {}
+        self.active: list[str] = []
+        self._telemetry_wanted = threading.Event()
+
+    # ───────── clients ───────── #
+    def add(self, client: _Client) -> None:
+        with self._lock:
+            self._clients.add(client)
+
+    def remove(self, client: _Client) -> None:
+        with self._lock:
+            self._clients.discard(client)
+            self._update_wanted()
+
+    def subscribe(self, client: _Client, topics: list[str]) -> dict[str, Any]:
+        unknown = set(topics) - TOPICS
+        if unknown:
+            raise ValueError(f"Unknown topics: {', '.join(sorted(unknown))}")
+        with self._lock:
+            client.topics.update(topics)
+            self._update_wanted()
+            return {"active": list(self.active)}
+
+    def unsubscribe(self, client: _Client, topics: list[str]) -> None:
+        with self._lock:
+            client.topics.difference_update(topics)
+            self._update_wanted()
+
+    def _update_wanted(self) -> None:
+        if any("telemetry" in c.topics for c in self._clients):
+            self._telemetry_wanted.set()
+        else:
+            self._telemetry_wanted.clear()
+
+    def broadcast(self, topic: str, **payload: Any) -> None:
+        line = json.dumps({"event": topic, **payload}, ensure_ascii=False)
+        with self._lock:
+            targets = [c for c in self._clients if topic in c.topics]
+        for client in targets:
+            client.send(line)
+
+    # ───────── status ───────── #
+    def refresh(self) -> None:
+        """Re-read the whole interface set (after a mutation or ENOBUFS)."""
+        try:
+            links = rtnetlink.dump_wireguard_links()
+        except OSError:
+            out, _ = core._run_command(["wg", "show", "interfaces"])
+            self._set_active(out.split() if out else [])
+            return
+        with self._lock:
+            self._links = links
+        self._set_active(links.values())
+
+    def _set_active(self, names) -> None:
+        active = sorted(set(names))
+        with self._lock:
+            if active == self.active:
+                return
+            self.active = active
+        self.broadcast("status", active=active)
+
+    def _status_loop(self) -> None:
+        try:
+            sock = rtnetlink.open_link_events()
+        except OSError:
+            while True:
+                self.refresh()
+                time.sleep(_POLL_INTERVAL_S)
+        self.refresh()
+        while True:
+            select.select([sock], [], [])
+            changed = False
+            while True:
+                try:
+                    buf = sock.recv(64 * 1024)
+                except BlockingIOError:
+                    break
+                except OSError:  # ENOBUFS: events were dropped, resync
+                    self.refresh()
+                    break
+                with self._lock:
+                    changed |= rtnetlink.apply_link_events(self._links, buf)
+                    links = list(self._links.values())
+            if changed:
+                self._set_active(links)
+
+    # ───────── configs and telemetry ───────── #
+    def _config_loop(self) -> None:
+        try:
+            fd = core._inotify_open(core._CONFIG_DIR)
+        except OSError as exc:
+            print(f"wg-daemon: not watching configs: {exc}", file=sys.stderr)
+            return
+        while True:
+            select.select([fd], [], [])
+            names = core._inotify_read(fd)
+            if names:
+                self.broadcast("configs", names=names)
+
+    def _telemetry_loop(self) -> None:
+        while True:
+            self._telemetry_wanted.wait()
+            started = time.monotonic()
+            proc = subprocess.run(
+                ["wg", "show", "all", "dump"],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            if proc.returncode == 0:
+                self.broadcast("telemetry", time=time.time(), dump=proc.stdout)
+            time.sleep(
+                max(0.0, _TELEMETRY_INTERVAL_S - (time.monotonic() - started))
+            )
+
+    def start(self) -> None:
+        for target in (self._status_loop, self._config_loop, self._telemetry_loop):
+            threading.Thread(
+                target=target, name=f"wg-daemon{target.__name__}", daemon=True
+            ).start()
+
+
+# ───────── per-client ops ───────── #
+def _refuse_hooks(name: Any, content: Any) -> None:
+    if isinstance(content, str) and _HOOK_LINE.search(content):
+        raise PermissionError(
+            f"{name}: configs with PreUp/PostUp/PreDown/PostDown may only be "
+            "installed by root."
+        )
+
+
+def _client_atomic_install(name: str, content: str, overwrite: bool = False) -> None:
+    _refuse_hooks(name, content)
+    core._op_atomic_install(name, content, overwrite)
+
+
+def _client_install_configs(
+    configs: dict[str, str], overwrite: bool = False
+) -> list[str]:
+    if isinstance(configs, dict):
+        for name, content in configs.items():
+            _refuse_hooks(name, content)
+    return core._op_install_configs(configs, overwrite)
+
+
+def _then(op: Callable[..., Any], after: Callable[[], None]) -> Callable[..., Any]:
+    def wrapped(**args: Any) -> Any:
+        try:
+            return op(**args)
+        finally:
+            after()
+
+    return wrapped
+
+
+def _client_ops(hub: Hub, client: _Client) -> dict[str, Callable[..., Any]]:
+    ops = dict(core._HELPER_OPS)
+    # a 30 s long-poll per client would tie up the pool; "configs" replaces it
+    del ops["watch_configs"]
+    if client.uid != 0:
+        ops["atomic_install"] = _client_atomic_install
+        ops["install_configs"] = _client_install_configs
+    for name in _MUTATING_OPS:
+        ops[name] = _then(ops[name], hub.refresh)
+    ops["status"] = lambda: list(hub.active)
+    ops["subscribe"] = lambda topics: hub.subscribe(client, topics)
+    ops["unsubscribe"] = lambda topics: hub.unsubscribe(client, topics)
+    return ops
+
+
+# ───────── connections ───────── #
+def _authorized(uid: int, gid: int | None) -> bool:
+    """Root, or a member (primary or supplementary) of group *gid*."""
+    if uid == 0:
+        return True
+    if gid is None:
+        return False
+    try:
+        user = pwd.getpwuid(uid)
+    except KeyError:
+        return False
+    return gid in os.getgrouplist(user.pw_name, user.pw_gid)
+
+
+def _handle(conn: socket.socket, hub: Hub, pool: Executor, gid: int | None) -> None:
+    _, uid, _ = _PEERCRED.unpack(
+        conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+    )
+    client = _Client(conn, uid)
+    if not _authorized(uid, gid):
+        client.send(
+            json.dumps(
+                {"v": core._PROTOCOL_VERSION, "error": "Permission denied."}
+            )
+        )
+        client.close(drain=True)
+        return
+    client.send(
+        json.dumps(
+            {"v": core._PROTOCOL_VERSION, "workers": _WORKERS, "daemon": True}
+        )
+    )
+    hub.add(client)
+    try:
+        with conn.makefile("r", encoding="utf-8", errors="replace") as lines:
+            core._serve_stream(
+                lines, client.send, _client_ops(hub, client), pool, scope=client
+            )
+    except OSError:
+        pass
+    finally:
+        hub.remove(client)
+        client.close()
+
+
+def serve(path: Path, group: str) -> None:
+    try:
+        gid: int | None = grp.getgrnam(group).gr_gid
+    except KeyError:
+        print(f"wg-daemon: no group {group!r}, only root may connect", file=sys.stderr)
+        gid = None
+    hub = Hub()
+    hub.start()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+    path.unlink(missing_ok=True)  # stale socket of a previous run
+    listener.bind(str(path))
+    os.chmod(path, 0o666)  # access is decided by peer credentials
+    listener.listen(16)
+    # SIGTERM (systemctl stop) unwinds through the finally below
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        with ThreadPoolExecutor(_WORKERS, thread_name_prefix="wg-daemon") as pool:
+            while True:
+                conn, _ = listener.accept()
+                threading.Thread(
+                    target=_handle,
+                    args=(conn, hub, pool, gid),
+                    name="wg-daemon-client",
+                    daemon=True,
+                ).start()
+    finally:
+        listener.close()
+        path.unlink(missing_ok=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="wireguard_core.py --daemon")
+    parser.add_argument("--socket", type=Path, default=core.DAEMON_SOCKET_PATH)
+    parser.add_argument("--group", default=DEFAULT_GROUP)
+    args = parser.parse_args(argv)
+    if os.geteuid() != 0:
+        sys.exit("wg-daemon: must run as root")
+    serve(args.socket, args.group)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,90 +4,1144 @@
 
 from __future__ import annotations
 
+import codecs
+import ctypes
+import ctypes.util
+import ipaddress
+import itertools
 import json
+import os
+import queue
 import re
+import select
+import selectors
+import socket
+import stat
+import struct
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Final
+from types import ModuleType
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Final,
+    Generator,
+    Iterable,
+    Mapping,
+    TextIO,
+)
+
+import metrics
+from wg_config import (
+    ConfigError,
+    ConfigIndex,
+    WgConfig,
+    join_endpoint,
+    parse_config,
+    split_endpoint,
+    with_endpoints,
+)
+
+if TYPE_CHECKING:
+    from bulk_import import ImportReport
+    from provisioning import ProvisionedPeer
 
 # ───────── root-process helpers ───────── #
 _ROOT_HELPER: subprocess.Popen | None = None
+_HELPER_OUT: TextIO | None = None  # request stream: helper stdin or daemon socket
+_DAEMON_SOCKET: socket.socket | None = None
+DAEMON_SOCKET_PATH: Final[Path] = Path(
+    os.environ.get("WIREGUARD_UI_SOCKET", "/run/wireguard-ui.sock")
+)
 _VALID_WG_NAME: Final[re.Pattern[str]] = re.compile(r"^[A-Za-z0-9_.-]+$")
+# what `wg show NAME FIELD` may ask for through the "run" op
+_SHOW_FIELDS: Final[frozenset[str]] = frozenset(
+    {
+        "dump",
+        "endpoints",
+        "peers",
+        "public-key",
+        "listen-port",
+        "fwmark",
+        "allowed-ips",
+        "latest-handshakes",
+        "persistent-keepalive",
+        "transfer",
+    }
+)
+# Overridable for the benchmark suite.  pkexec clears the environment, so a
+# real root helper always works on /etc/wireguard.
+_CONFIG_DIR: Final[Path] = Path(
+    os.environ.get("WIREGUARD_UI_CONFIG_DIR", "/etc/wireguard")
+)
+# copies of the configs running tunnels were brought up with, for "reload"
+_APPLIED_DIR: Final[Path] = Path(
+    os.environ.get("WIREGUARD_UI_STATE_DIR", "/run/wireguard-ui")
+)
+
+# Helper protocol v3: one JSON object per line in both directions.
+#   hello   (helper → client): {"v": 3, "workers": N}
+#   request (client → helper): {"v": 3, "id": 17, "op": "stat", "args": {...}}
+#   reply   (helper → client): {"id": 17, "result": ...}
+#                           or {"id": 17, "error": "...", "exc": "FileNotFoundError"}
+# A request with "trace": true gets "spans": {"queue": s, "spawn": s, "exec": s}
+# in its reply (see metrics.py); untraced requests are not timed at all.
+# A request with "stream": true has the output of its process forwarded
+# while it runs, before the reply:
+#   chunk   (helper → client): {"id": 17, "chunk": "...", "fd": "stderr"}
+# and the reply then carries only the tail of stderr, not the output.
+# Requests are executed concurrently by a bounded pool inside the helper and
+# replies may arrive out of order; the client matches them by "id".  The
+# shared daemon (wg_daemon.py) speaks the same protocol over a Unix socket
+# and may also push {"event": topic, ...} lines to subscribed clients.
+# "op" is one of _HELPER_OPS; the file operations on /etc/wireguard run
+# in-process.  "run" only takes `wg show` (see _op_run); other commands are
+# built by the ops themselves.
+_PROTOCOL_VERSION: Final[int] = 3
+_HELPER_WORKERS: Final[int] = 8  # a profile switch runs one op per tunnel
+_HELPER_LOCK = threading.Lock()  # guards helper stdin, _PENDING and _HELPER_ERROR
+_PENDING: dict[int, Future] = {}
+# output callbacks of streamed requests, (fd name, text); reader thread
+_STREAMS: dict[int, Callable[[str, str], None]] = {}
+_REQUEST_IDS = itertools.count(1)
+_HELPER_ERROR: str | None = None
+_HELPER_READY = threading.Event()  # helper said hello, i.e. polkit auth is done
+_CANCEL_POLL_S: Final[float] = 0.1
+_DAEMON_HELLO_TIMEOUT_S: Final[float] = 5.0
+# called from the reader thread with every daemon event
+_EVENT_LISTENERS: list[Callable[[dict[str, Any]], None]] = []
+
+
+class OperationCancelled(Exception):
+    """A privileged command was cancelled before it finished."""
 
 
 def _start_root_helper() -> None:
     """Launch this file in root-helper mode via pkexec."""
-    global _ROOT_HELPER
-    if _ROOT_HELPER is not None:
-        return
-    exepath = str(Path(__file__).resolve())
-    _ROOT_HELPER = subprocess.Popen(
-        ["pkexec", sys.executable, exepath, "--root-helper"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        text=True,
-        bufsize=1,
-    )
+    global _ROOT_HELPER, _HELPER_OUT
+    with _HELPER_LOCK:
+        if _HELPER_OUT is not None:  # already running, or using the daemon
+            return
+        exepath = str(Path(__file__).resolve())
+        _ROOT_HELPER = subprocess.Popen(
+            ["pkexec", sys.executable, exepath, "--root-helper"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        assert _ROOT_HELPER.stdout is not None
+        _HELPER_OUT = _ROOT_HELPER.stdin
+        _start_reader(_ROOT_HELPER.stdout)
 
 
-def _root_helper_main() -> None:  # launched via pkexec
-    def _reply(**payload: str | int | None) -> None:
-        print(json.dumps(payload, ensure_ascii=False), flush=True)
+def _connect_daemon(path: Path = DAEMON_SOCKET_PATH) -> bool:
+    """Use the shared daemon at *path* instead of a private pkexec helper.
 
-    for line in sys.stdin:
-        if not line:
-            break
+    Returns False if it is not running; raises PermissionError if it
+    refuses this user.  Must be called before the first helper request.
+    """
+    global _DAEMON_SOCKET, _HELPER_OUT
+    with _HELPER_LOCK:
+        if _HELPER_OUT is not None:
+            return _DAEMON_SOCKET is not None
+        sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC
+        )
         try:
-            cmd = json.loads(line)
-            if not isinstance(cmd, list) or not all(
-                isinstance(x, str) for x in cmd
-            ):
-                _reply(error="Invalid request format")
+            sock.settimeout(_DAEMON_HELLO_TIMEOUT_S)
+            sock.connect(str(path))
+            reader = sock.makefile("r", encoding="utf-8")
+            hello = json.loads(reader.readline() or "{}")
+            sock.settimeout(None)
+        except (OSError, ValueError):
+            sock.close()
+            return False
+        if not isinstance(hello, dict) or hello.get("v") != _PROTOCOL_VERSION:
+            sock.close()
+            return False
+        if hello.get("error"):
+            sock.close()
+            raise PermissionError(str(hello["error"]))
+        _DAEMON_SOCKET = sock
+        _HELPER_OUT = sock.makefile("w", encoding="utf-8", newline="\n")
+        _start_reader(reader)
+    _HELPER_READY.set()
+    return True
+
+
+def _using_daemon() -> bool:
+    return _DAEMON_SOCKET is not None
+
+
+def _start_reader(stream: TextIO) -> None:
+    threading.Thread(
+        target=_helper_reader,
+        args=(stream,),
+        name="wg-root-helper-reader",
+        daemon=True,
+    ).start()
+
+
+def _fail_pending(message: str) -> None:
+    """Mark the helper as unusable and fail every in-flight request."""
+    global _HELPER_ERROR
+    with _HELPER_LOCK:
+        if _HELPER_ERROR is None:
+            _HELPER_ERROR = message
+        pending = list(_PENDING.values())
+        _PENDING.clear()
+        _STREAMS.clear()
+    for fut in pending:
+        if not fut.done():
+            fut.set_exception(ConnectionError(message))
+
+
+def _helper_reader(stream: TextIO) -> None:
+    """Dispatch helper replies to the waiting futures by request id."""
+    for line in stream:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(msg, dict):
+            continue
+        req_id = msg.get("id")
+        if req_id is None:
+            if "event" in msg:
+                for listener in list(_EVENT_LISTENERS):
+                    try:
+                        listener(msg)
+                    except Exception:  # pylint: disable=broad-except
+                        pass  # a broken listener must not stop the replies
                 continue
-            proc = subprocess.run(
-                cmd, capture_output=True, text=True, check=False
+            if "v" in msg and msg["v"] != _PROTOCOL_VERSION:
+                _fail_pending(
+                    f"Root helper speaks protocol v{msg['v']}, "
+                    f"expected v{_PROTOCOL_VERSION}."
+                )
+            _HELPER_READY.set()
+            continue
+        if "chunk" in msg:
+            with _HELPER_LOCK:
+                on_chunk = _STREAMS.get(req_id)
+            if on_chunk is not None:
+                try:
+                    on_chunk(str(msg.get("fd", "stdout")), str(msg["chunk"]))
+                except Exception:  # pylint: disable=broad-except
+                    pass
+            continue
+        with _HELPER_LOCK:
+            fut = _PENDING.pop(req_id, None)
+            _STREAMS.pop(req_id, None)
+        if fut is not None and not fut.done():
+            fut.set_result(msg)
+    _fail_pending("Root process exited unexpectedly.")
+    _HELPER_READY.set()  # wake waiters; the error is in _HELPER_ERROR
+
+
+def _helper_send(
+    payload: dict[str, Any], on_chunk: Callable[[str, str], None] | None = None
+) -> tuple[int, Future]:
+    """Write one request to the root helper; return its id and reply future.
+
+    With *on_chunk* the request is streamed: the reader thread calls it
+    with (fd name, text) for each chunk of output before the reply.
+    """
+    _start_root_helper()
+    fut: Future = Future()
+    with _HELPER_LOCK:
+        if _HELPER_ERROR is not None:
+            raise ConnectionError(_HELPER_ERROR)
+        out = _HELPER_OUT
+        if out is None:
+            raise ConnectionError("Failed to start root process.")
+        req_id = next(_REQUEST_IDS)
+        _PENDING[req_id] = fut
+        if on_chunk is not None:
+            _STREAMS[req_id] = on_chunk
+            payload = {**payload, "stream": True}
+        try:
+            out.write(
+                json.dumps(
+                    {"v": _PROTOCOL_VERSION, "id": req_id, **payload},
+                    ensure_ascii=False,
+                )
+                + "\n"
             )
+            out.flush()
+        except Exception:
+            _PENDING.pop(req_id, None)
+            _STREAMS.pop(req_id, None)
+            raise
+    return req_id, fut
+
+
+def _helper_request(
+    payload: dict[str, Any],
+    cancel: threading.Event | None = None,
+    on_chunk: Callable[[str, str], None] | None = None,
+) -> dict[str, Any]:
+    """Send one request to the root helper and wait for its reply.
+
+    Safe to call from several threads at once: each caller gets its own
+    request id, so a slow command does not hold up the others.  Setting
+    *cancel* asks the helper to terminate the request's process.
+    """
+    req_id, fut = _helper_send(payload, on_chunk)
+    while cancel is not None:
+        try:
+            return fut.result(timeout=_CANCEL_POLL_S)
+        except FutureTimeoutError:  # not the builtin before Python 3.11
+            if cancel.is_set():
+                _helper_send({"op": "cancel", "args": {"target": req_id}})
+                cancel = None
+    return fut.result()
+
+
+# exceptions the helper may report by name; anything else becomes RuntimeError
+_HELPER_EXCEPTIONS: Final[dict[str, type[Exception]]] = {
+    exc.__name__: exc
+    for exc in (
+        FileNotFoundError,
+        FileExistsError,
+        PermissionError,
+        IsADirectoryError,
+        ValueError,
+        NotImplementedError,
+        OperationCancelled,
+    )
+}
+
+
+def _unwrap(reply: dict[str, Any]) -> Any:
+    if reply.get("error") is not None:
+        exc_type = _HELPER_EXCEPTIONS.get(reply.get("exc", ""), RuntimeError)
+        raise exc_type(str(reply["error"]))
+    return reply.get("result")
+
+
+def _helper_call(
+    op: str,
+    *,
+    cancel: threading.Event | None = None,
+    on_output: Callable[[str, str], None] | None = None,
+    **args: Any,
+) -> Any:
+    """Run *op* in the root helper and return its result or raise its error.
+
+    *on_output* streams the request: it is called on the reader thread
+    with ("stdout" or "stderr", text) as the helper's process writes.
+    """
+    if metrics.ENABLED:
+        reply = _traced_request(op, args, cancel, on_output)
+    else:
+        reply = _helper_request({"op": op, "args": args}, cancel, on_output)
+    return _unwrap(reply)
+
+
+def _helper_stream(
+    op: str, *, cancel: threading.Event | None = None, **args: Any
+) -> Generator[tuple[str, str], None, Any]:
+    """Streamed _helper_call as a generator of (fd name, text) chunks.
+
+    The op's result is the generator's return value.  Closing the
+    generator early cancels the request.
+    """
+    chunks: queue.SimpleQueue[tuple[str, str] | None] = queue.SimpleQueue()
+    req_id, fut = _helper_send(
+        {"op": op, "args": args}, lambda fd, text: chunks.put((fd, text))
+    )
+    # the reader queues every chunk before it resolves the reply
+    fut.add_done_callback(lambda _fut: chunks.put(None))
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=_CANCEL_POLL_S)
+            except queue.Empty:
+                if cancel is not None and cancel.is_set():
+                    _helper_send({"op": "cancel", "args": {"target": req_id}})
+                    cancel = None
+                continue
+            if item is None:
+                break
+            yield item
+    finally:
+        if not fut.done():
+            try:
+                _helper_send({"op": "cancel", "args": {"target": req_id}})
+            except OSError:
+                pass
+    return _unwrap(fut.result())
+
+
+def _traced_request(
+    op: str,
+    args: dict[str, Any],
+    cancel: threading.Event | None,
+    on_chunk: Callable[[str, str], None] | None = None,
+) -> dict[str, Any]:
+    """_helper_request plus per-phase timing into metrics.REGISTRY."""
+    kind = metrics.command_kind(args.get("cmd") or []) if op == "run" else f"op {op}"
+    start = time.perf_counter()
+    try:
+        reply = _helper_request(
+            {"op": op, "args": args, "trace": True}, cancel, on_chunk
+        )
+    except Exception:
+        metrics.REGISTRY.error(kind, "ipc")
+        raise
+    total = time.perf_counter() - start
+    spans = reply.get("spans")
+    if not isinstance(spans, dict):
+        spans = {}
+    spans = {k: float(v) for k, v in spans.items() if k in metrics.PHASES}
+    spans["ipc"] = max(0.0, total - sum(spans.values()))
+    spans["total"] = total
+    metrics.REGISTRY.observe(kind, spans)
+    if reply.get("error") is not None:
+        metrics.REGISTRY.error(
+            kind,
+            "cancelled" if reply.get("exc") == "OperationCancelled" else "error",
+        )
+    elif op == "run" and (reply.get("result") or {}).get("returncode"):
+        metrics.REGISTRY.error(kind, "exit")
+    return reply
+
+
+# ───────── privileged operations (executed inside the helper) ───────── #
+def _config_file(name: Any) -> Path:
+    """Map a tunnel name to its file, rejecting anything outside _CONFIG_DIR."""
+    if not isinstance(name, str) or not _VALID_WG_NAME.fullmatch(name):
+        raise ValueError(f"Invalid config name: {name!r}")
+    return _CONFIG_DIR / f"{name}.conf"
+
+
+# .key of the request being served, (client scope, request id) since daemon
+# clients number their requests independently; .spans is a dict while traced
+# and .stream the chunk sender, (fd name, text), while streamed
+_HELPER_CONTEXT = threading.local()
+_RUNNING_LOCK = threading.Lock()
+_RUNNING: dict[tuple[object, int], subprocess.Popen] = {}
+_CANCELLED: set[tuple[object, int]] = set()
+_CHUNK_BYTES: Final[int] = 64 * 1024
+_STDERR_TAIL: Final[int] = 64 * 1024  # kept for error messages when streaming
+
+
+def _pump(proc: subprocess.Popen, emit: Callable[[str, str], None]) -> str:
+    """Forward *proc*'s output to *emit* as it arrives; return stderr's tail."""
+    streams = {
+        proc.stdout.fileno(): "stdout",  # type: ignore[union-attr]
+        proc.stderr.fileno(): "stderr",  # type: ignore[union-attr]
+    }
+    decoders = {
+        fd: codecs.getincrementaldecoder("utf-8")("replace") for fd in streams
+    }
+    tail = ""
+    with selectors.DefaultSelector() as sel:
+        for fd in streams:
+            sel.register(fd, selectors.EVENT_READ)
+        while streams:
+            for key, _ in sel.select():
+                data = os.read(key.fd, _CHUNK_BYTES)
+                text = decoders[key.fd].decode(data, final=not data)
+                name = streams[key.fd]
+                if not data:
+                    sel.unregister(key.fd)
+                    del streams[key.fd]
+                if not text:
+                    continue
+                emit(name, text)
+                if name == "stderr":
+                    tail = (tail + text)[-_STDERR_TAIL:]
+    proc.wait()
+    return tail
+
+
+def _feed(pipe: IO[bytes], data: bytes) -> None:
+    try:
+        with pipe:
+            pipe.write(data)
+    except BrokenPipeError:  # exited without reading it all; its code says why
+        pass
+
+
+def _spawn(
+    cmd: list[str], stdin: str | None = None, capture: bool = False
+) -> dict[str, Any]:
+    """Run *cmd* as built by the ops below; streamed and cancellable.
+
+    *stdin* is written to the command; with *capture* its output is
+    returned even while the request is streamed (for output the op parses).
+    """
+    if not isinstance(cmd, list) or not all(isinstance(x, str) for x in cmd):
+        raise ValueError("Invalid command")
+    key = getattr(_HELPER_CONTEXT, "key", None)
+    with _RUNNING_LOCK:
+        if key in _CANCELLED:
+            _CANCELLED.discard(key)
+            raise OperationCancelled("Operation cancelled.")
+        spans = getattr(_HELPER_CONTEXT, "spans", None)
+        emit = None if capture else getattr(_HELPER_CONTEXT, "stream", None)
+        if spans is not None:
+            spawned = time.perf_counter()
+        # stdin is the request pipe: a child reading it would eat requests
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL if stdin is None else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=emit is None,
+        )
+        if spans is not None:
+            spans["spawn"] = time.perf_counter() - spawned
+        _RUNNING[key] = proc
+    try:
+        if emit is None:
+            stdout, stderr = proc.communicate(stdin)
+        else:
+            if stdin is not None:  # from a thread: _pump must drain meanwhile
+                threading.Thread(
+                    target=_feed, args=(proc.stdin, stdin.encode()), daemon=True
+                ).start()
+            with proc.stdout, proc.stderr:  # type: ignore[union-attr]
+                stdout, stderr = "", _pump(proc, emit)
+    finally:
+        with _RUNNING_LOCK:
+            _RUNNING.pop(key, None)
+            cancelled = key in _CANCELLED
+            _CANCELLED.discard(key)
+    if cancelled:
+        raise OperationCancelled("Operation cancelled.")
+    return {"stdout": stdout, "stderr": stderr, "returncode": proc.returncode}
+
+
+def _op_run(cmd: list[str]) -> dict[str, Any]:
+    """Run `wg show [interfaces | all | NAME [FIELD]]`, nothing else.
+
+    The other commands the helper runs as root are built by its own ops
+    from validated names; a client never chooses their arguments.
+    """
+    if (
+        not isinstance(cmd, list)
+        or cmd[:2] != ["wg", "show"]
+        or len(cmd) > 4
+        or not all(isinstance(x, str) for x in cmd)
+        or (len(cmd) > 2 and not _VALID_WG_NAME.fullmatch(cmd[2]))
+        or (len(cmd) == 4 and (cmd[2] == "interfaces" or cmd[3] not in _SHOW_FIELDS))
+    ):
+        raise PermissionError("Only `wg show` may be run as root.")
+    return _spawn(cmd)
+
+
+def _op_cancel(target: int) -> bool:
+    """Terminate the process of request *target* (wg-quick cleans up on TERM)."""
+    key = (getattr(_HELPER_CONTEXT, "key", (None, 0))[0], target)
+    with _RUNNING_LOCK:
+        _CANCELLED.add(key)
+        proc = _RUNNING.get(key)
+    if proc is None:
+        return False
+    proc.terminate()
+    return True
+
+
+def _op_list_configs() -> list[str]:
+    names = []
+    with os.scandir(_CONFIG_DIR) as it:
+        for entry in it:
+            stem = entry.name.removesuffix(".conf")
+            if (
+                stem != entry.name
+                and _VALID_WG_NAME.fullmatch(stem)
+                and entry.is_file(follow_symlinks=False)
+            ):
+                names.append(stem)
+    return names
+
+
+def _op_stat(name: str) -> dict[str, int] | None:
+    try:
+        st = os.stat(_config_file(name), follow_symlinks=False)
+    except FileNotFoundError:
+        return None
+    return {
+        "ino": st.st_ino,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "mode": st.st_mode,
+    }
+
+
+def _op_read_config(name: str) -> str:
+    return _config_file(name).read_text(encoding="utf-8")
+
+
+def _native_engine() -> ModuleType:
+    """native_engine, starting its commands through _spawn like wg-quick's."""
+    import native_engine  # pylint: disable=import-outside-toplevel
+
+    native_engine.spawn = _spawn
+    return native_engine
+
+
+def _native_down(name: str) -> None:
+    _native_engine().down(name, parse_config(_op_read_config(name), name))
+
+
+def _wg_quick(action: str, name: str, config: Path | None = None) -> None:
+    """Run wg-quick on *name*, or on the file *config* named after it."""
+    _config_file(name)  # validate: wg-quick would also accept a path
+    result = _spawn(["wg-quick", action, str(config) if config else name])
+    if result["returncode"] != 0:
+        raise RuntimeError(
+            result["stderr"].strip() or f"Код выхода: {result['returncode']}"
+        )
+
+
+def _applied_file(name: str) -> Path:
+    return _APPLIED_DIR / f"{name}.conf"
+
+
+def _remember_applied(name: str, text: str) -> bool:
+    """Keep the config *name* is running with; best effort."""
+    try:
+        _APPLIED_DIR.mkdir(mode=0o700, exist_ok=True)
+        tmp = _applied_file(name).with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, _applied_file(name))
+    except OSError:
+        return False
+    return True
+
+
+def _forget_applied(name: str) -> None:
+    try:
+        _applied_file(name).unlink()
+    except OSError:
+        pass
+
+
+def _pinned(cfg: WgConfig, endpoints: Any) -> dict[str, str]:
+    """PublicKey -> address for the peers whose Endpoint the client resolved.
+
+    *endpoints* maps an Endpoint as written in the config ("host:port") to
+    "address:port".  Entries that match no peer (the config changed since
+    the client read it) are ignored; the port must stay the config's.
+    """
+    if not isinstance(endpoints, dict):
+        raise ValueError("Invalid endpoints")
+    pinned = {}
+    for peer in cfg.peers:
+        value = endpoints.get(peer.endpoint) if peer.endpoint else None
+        if value is None or peer.public_key is None:
+            continue
+        host, port = split_endpoint(str(value))
+        ipaddress.ip_address(host)  # ValueError for anything but an address
+        if port != split_endpoint(peer.endpoint)[1]:  # type: ignore[arg-type]
+            raise ValueError(f"{value} does not match Endpoint {peer.endpoint}")
+        pinned[peer.public_key] = join_endpoint(host, port)
+    return pinned
+
+
+def _op_connect(
+    name: str, engine: str = "wg-quick", endpoints: dict[str, str] | None = None
+) -> str:
+    """Bring *name* up; return the engine that actually did it.
+
+    The native engine falls back to wg-quick for configs it cannot
+    handle (hooks, SaveConfig).  *endpoints* (see _pinned) replace the
+    hostnames of those peers, so nothing is resolved on the way up.
+    """
+    if engine not in ("wg-quick", "native"):
+        raise ValueError(f"Unknown engine: {engine!r}")
+    text = _op_read_config(name)
+    cfg = parse_config(text, name)
+    if endpoints:
+        text = with_endpoints(text, _pinned(cfg, endpoints))
+        cfg = parse_config(text, name)
+    used = "wg-quick"
+    if engine == "native":
+        native_engine = _native_engine()
+        try:
+            native_engine.up(name, cfg)
+            used = "native"
+        except NotImplementedError:
+            pass
+    if used == "native":
+        _remember_applied(name, text)
+    elif (
+        endpoints
+        and not cfg.interface.save_config  # would save back to the copy
+        and _remember_applied(name, text)
+    ):
+        _wg_quick("up", name, _applied_file(name))
+    else:
+        _wg_quick("up", name)
+        _remember_applied(name, text)
+    return used
+
+
+def _op_disconnect(name: str, engine: str = "wg-quick") -> str:
+    if engine not in ("wg-quick", "native"):
+        raise ValueError(f"Unknown engine: {engine!r}")
+    used = "wg-quick"
+    if engine == "native":
+        try:
+            _native_down(name)
+            used = "native"
+        except NotImplementedError:
+            pass
+    if used == "wg-quick":
+        _wg_quick("down", name)
+    _forget_applied(name)
+    return used
+
+
+def _op_reload(
+    name: str, engine: str = "wg-quick", endpoints: dict[str, str] | None = None
+) -> dict[str, Any]:
+    """Apply the edited config of running tunnel *name*.
+
+    Peer changes go in place (native_engine.reload); interface-level ones
+    restart the tunnel, tearing it down with the config it was brought up
+    with.  The reply has "mode" ("synced", "restarted" or "gone" if the
+    config was deleted), "restart" reasons and a "summary".  *endpoints*
+    as for _op_connect.
+    """
+    native_engine = _native_engine()
+    try:
+        text = _op_read_config(name)
+    except FileNotFoundError:
+        return {"mode": "gone", "restart": [], "summary": ""}
+    new = parse_config(text, name)
+    if endpoints:
+        text = with_endpoints(text, _pinned(new, endpoints))
+        new = parse_config(text, name)
+    try:
+        applied = parse_config(_applied_file(name).read_text(encoding="utf-8"), name)
+    except (OSError, ConfigError):
+        applied = None
+    result = native_engine.reload(name, new, applied)
+    if not result["restart"]:
+        _remember_applied(name, text)
+        return {"mode": "synced", **result}
+    if applied is None:
+        _op_disconnect(name, engine)
+    else:
+        try:
+            if engine == "native":
+                native_engine.down(name, applied)
+            else:
+                _wg_quick("down", name, _applied_file(name))
+        except NotImplementedError:  # hooks: the native engine cannot run them
+            _wg_quick("down", name, _applied_file(name))
+        _forget_applied(name)
+    used = _op_connect(name, engine, endpoints)
+    return {"mode": "restarted", "engine": used, "summary": "", **result}
+
+
+def _op_refresh_endpoints(name: str, addresses: dict[str, list[str]]) -> dict:
+    """Move peers of running tunnel *name* whose endpoint host changed address.
+
+    *addresses* maps Endpoint hostnames to their current addresses.  A peer
+    whose endpoint is still one of them is left alone (it may have roamed
+    there); the others are pointed at the first.  Returns PublicKey -> the
+    endpoint that was set.
+    """
+    if not isinstance(addresses, dict):
+        raise ValueError("Invalid addresses")
+    hosts = {}
+    for peer in parse_config(_op_read_config(name), name).peers:
+        if peer.endpoint and peer.public_key:
+            host, port = split_endpoint(peer.endpoint)
+            if addresses.get(host):
+                hosts[peer.public_key] = (host, port)
+    if not hosts:
+        return {}
+    shown = _spawn(["wg", "show", name, "endpoints"])
+    if shown["returncode"] != 0:
+        raise RuntimeError(shown["stderr"].strip() or f"{name} is not running")
+    live = dict(line.split("\t", 1) for line in shown["stdout"].splitlines())
+    moved = {}
+    for key, (host, port) in hosts.items():
+        if key not in live:
+            continue
+        wanted = [str(ipaddress.ip_address(a)) for a in addresses[host]]
+        current = live[key].strip()
+        if current != "(none)" and split_endpoint(current)[0] in wanted:
+            continue
+        endpoint = join_endpoint(wanted[0], port)
+        result = _spawn(["wg", "set", name, "peer", key, "endpoint", endpoint])
+        if result["returncode"] != 0:
+            raise RuntimeError(result["stderr"].strip())
+        moved[key] = endpoint
+    return moved
+
+
+def _op_status() -> list[str]:
+    """Names of the WireGuard interfaces that are up."""
+    import rtnetlink  # pylint: disable=import-outside-toplevel
+
+    return sorted(set(rtnetlink.dump_wireguard_links().values()))
+
+
+def _op_stat_configs() -> dict[str, tuple[int, int, int]]:
+    """(inode, mtime_ns, size) of every config, in one round trip."""
+    stats = {}
+    with os.scandir(_CONFIG_DIR) as it:
+        for entry in it:
+            stem = entry.name.removesuffix(".conf")
+            if stem == entry.name or not _VALID_WG_NAME.fullmatch(stem):
+                continue
+            st = entry.stat(follow_symlinks=False)
+            if stat.S_ISREG(st.st_mode):
+                stats[stem] = (st.st_ino, st.st_mtime_ns, st.st_size)
+    return stats
+
+
+def _op_read_configs(names: list[str]) -> dict[str, str | None]:
+    """Read several configs at once; unreadable ones map to None."""
+    texts: dict[str, str | None] = {}
+    for name in names:
+        try:
+            texts[name] = _op_read_config(name)
+        except (OSError, UnicodeDecodeError):
+            texts[name] = None
+    return texts
+
+
+def _write_temp(name: str, content: Any, sync: bool = True) -> Path:
+    """Write *content* to a fresh temp file next to *name*'s config."""
+    if not isinstance(content, str):
+        raise ValueError("Invalid config content")
+    tmp = _CONFIG_DIR / f".{name}.conf.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(content)
+            if sync:
+                fh.flush()
+                os.fsync(fh.fileno())
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp
+
+
+def _sync_dir(path: Path, whole_fs: bool = False) -> None:
+    """fsync the directory entry list; with *whole_fs*, syncfs(2) its filesystem."""
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        if whole_fs:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            if libc.syncfs(fd) != 0:
+                os.sync()
+        else:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _op_atomic_install(name: str, content: str, overwrite: bool = False) -> None:
+    """Write *content* to a temp file, fsync it and move it into place."""
+    dest = _config_file(name)
+    tmp = _write_temp(name, content)
+    try:
+        if overwrite:
+            os.replace(tmp, dest)
+        else:
+            os.link(tmp, dest)  # fails with FileExistsError instead of clobbering
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _op_install_configs(configs: dict[str, str], overwrite: bool = False) -> list[str]:
+    """Install several configs all-or-nothing; return their names.
+
+    All temp files are written first and flushed with one syncfs() instead
+    of an fsync per file.  If any config cannot be put in place, the ones
+    already installed are removed (or, when overwriting, restored).
+    """
+    if not isinstance(configs, dict):
+        raise ValueError("Invalid config set")
+    dests = {name: _config_file(name) for name in configs}
+    temps: dict[str, Path] = {}
+    backups: dict[str, Path] = {}
+    installed: list[str] = []
+    try:
+        for name, content in configs.items():
+            temps[name] = _write_temp(name, content, sync=False)
+        _sync_dir(_CONFIG_DIR, whole_fs=True)
+        for name, dest in dests.items():
+            if overwrite:
+                backup = temps[name].with_suffix(".bak")
+                try:
+                    os.link(dest, backup)
+                    backups[name] = backup
+                except FileNotFoundError:
+                    pass
+                os.replace(temps[name], dest)
+            else:
+                os.link(temps[name], dest)
+            installed.append(name)
+    except BaseException:
+        for name in reversed(installed):
+            if name in backups:
+                os.replace(backups.pop(name), dests[name])
+            else:
+                dests[name].unlink(missing_ok=True)
+        raise
+    finally:
+        for path in (*temps.values(), *backups.values()):
+            path.unlink(missing_ok=True)
+        if temps:
+            _sync_dir(_CONFIG_DIR)
+    return installed
+
+
+def _op_rename(old: str, new: str) -> None:
+    src, dest = _config_file(old), _config_file(new)
+    os.link(src, dest)  # refuses to overwrite an existing config
+    os.unlink(src)
+
+
+def _op_delete(name: str) -> None:
+    os.unlink(_config_file(name))
+
+
+# ───────── inotify on the config directory ───────── #
+_IN_MODIFY: Final[int] = 0x002
+_IN_ATTRIB: Final[int] = 0x004
+_IN_CLOSE_WRITE: Final[int] = 0x008
+_IN_MOVED_FROM: Final[int] = 0x040
+_IN_MOVED_TO: Final[int] = 0x080
+_IN_CREATE: Final[int] = 0x100
+_IN_DELETE: Final[int] = 0x200
+_IN_NONBLOCK: Final[int] = os.O_NONBLOCK
+_IN_CLOEXEC: Final[int] = os.O_CLOEXEC
+_IN_CONFIG_MASK: Final[int] = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_INOTIFY_EVENT: Final[struct.Struct] = struct.Struct("iIII")
+
+
+def _inotify_open(path: Path) -> int:
+    """Return a non-blocking inotify fd watching *path* for config changes."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    if libc.inotify_add_watch(fd, os.fsencode(path), _IN_CONFIG_MASK) < 0:
+        err = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(err, os.strerror(err), str(path))
+    return fd
+
+
+def _inotify_read(fd: int) -> list[str]:
+    """Drain pending events from *fd* and return the affected tunnel names."""
+    names: list[str] = []
+    while True:
+        try:
+            buf = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            break
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(buf):
+            _, _, _, length = _INOTIFY_EVENT.unpack_from(buf, offset)
+            offset += _INOTIFY_EVENT.size
+            raw = buf[offset : offset + length].split(b"\0", 1)[0]
+            offset += length
+            stem = os.fsdecode(raw).removesuffix(".conf")
+            if stem not in names and _VALID_WG_NAME.fullmatch(stem):
+                names.append(stem)
+    return names
+
+
+_WATCH_LOCK = threading.Lock()
+_WATCH_FD: int | None = None
+
+
+def _op_watch_configs(timeout: float = 30.0) -> list[str]:
+    """Long-poll: block until a config changes or *timeout* expires."""
+    global _WATCH_FD
+    with _WATCH_LOCK:
+        if _WATCH_FD is None:
+            _WATCH_FD = _inotify_open(_CONFIG_DIR)
+        ready, _, _ = select.select([_WATCH_FD], [], [], max(0.0, float(timeout)))
+        return _inotify_read(_WATCH_FD) if ready else []
+
+
+_HELPER_OPS: Final[dict[str, Callable[..., Any]]] = {
+    "run": _op_run,
+    "list_configs": _op_list_configs,
+    "stat": _op_stat,
+    "read_config": _op_read_config,
+    "stat_configs": _op_stat_configs,
+    "read_configs": _op_read_configs,
+    "atomic_install": _op_atomic_install,
+    "install_configs": _op_install_configs,
+    "rename": _op_rename,
+    "delete": _op_delete,
+    "watch_configs": _op_watch_configs,
+    "cancel": _op_cancel,
+    "connect": _op_connect,
+    "disconnect": _op_disconnect,
+    "reload": _op_reload,
+    "refresh_endpoints": _op_refresh_endpoints,
+    "status": _op_status,
+}
+
+
+def _serve_stream(
+    lines: Iterable[str],
+    write: Callable[[str], None],
+    ops: Mapping[str, Callable[..., Any]],
+    pool: Executor,
+    scope: object = None,
+) -> None:
+    """Answer protocol-v3 requests read from *lines* until EOF.
+
+    Replies go through *write* (one JSON line, no newline) and may be sent
+    from pool threads.  *scope* tells the requests of one daemon client apart
+    from another's, for "cancel".
+    """
+
+    def _reply(**payload: Any) -> None:
+        write(json.dumps(payload, ensure_ascii=False))
+
+    def _serve(
+        req_id: int,
+        op: Callable[..., Any],
+        args: dict,
+        received: float | None,
+        stream: bool = False,
+    ) -> None:
+        _HELPER_CONTEXT.key = (scope, req_id)
+        _HELPER_CONTEXT.stream = (
+            (lambda fd, text: _reply(id=req_id, chunk=text, fd=fd)) if stream else None
+        )
+        if received is None:
+            _HELPER_CONTEXT.spans = None
+            try:
+                _reply(id=req_id, result=op(**args))
+            except Exception as exc:  # pylint: disable=broad-except
+                _reply(id=req_id, error=str(exc), exc=type(exc).__name__)
+            return
+        start = time.perf_counter()
+        spans = _HELPER_CONTEXT.spans = {"queue": start - received}
+        try:
+            result = op(**args)
+        except Exception as exc:  # pylint: disable=broad-except
+            reply = {"error": str(exc), "exc": type(exc).__name__}
+        else:
+            reply = {"result": result}
+        spans["exec"] = time.perf_counter() - start - spans.get("spawn", 0.0)
+        _reply(id=req_id, spans=spans, **reply)
+
+    for line in lines:
+        try:
+            req = json.loads(line)
+        except ValueError:
+            _reply(error="Invalid request format")
+            continue
+        if not isinstance(req, dict) or not isinstance(req.get("id"), int):
+            _reply(error="Invalid request format")
+            continue
+        req_id = req["id"]
+        if req.get("v") != _PROTOCOL_VERSION:
             _reply(
-                stdout=proc.stdout,
-                stderr=proc.stderr,
-                returncode=proc.returncode,
+                id=req_id,
+                error=f"Unsupported protocol version: {req.get('v')}",
             )
-        except Exception as exc:  # pylint: disable=broad-except
-            _reply(error=str(exc))
+            continue
+        op = ops.get(req.get("op"))
+        args = req.get("args", {})
+        if op is None or not isinstance(args, dict):
+            _reply(id=req_id, error="Invalid request format")
+            continue
+        received = time.perf_counter() if req.get("trace") else None
+        stream = bool(req.get("stream"))
+        if op is _op_cancel:  # must not queue behind the request it cancels
+            _serve(req_id, op, args, received)
+        else:
+            pool.submit(_serve, req_id, op, args, received, stream)
+
+
+def _root_helper_main() -> None:  # launched via pkexec
+    out_lock = threading.Lock()
+
+    def _write(line: str) -> None:
+        with out_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    _write(json.dumps({"v": _PROTOCOL_VERSION, "workers": _HELPER_WORKERS}))
+    with ThreadPoolExecutor(
+        max_workers=_HELPER_WORKERS, thread_name_prefix="wg-helper"
+    ) as pool:
+        _serve_stream(sys.stdin, _write, _HELPER_OPS, pool)
     sys.exit(0)
 
 
 # ───────── тонкая обёртка вокруг subprocess ───────── #
 def _run_command(
-    cmd: list[str], *, use_root: bool = False
+    cmd: list[str],
+    *,
+    use_root: bool = False,
+    cancel: threading.Event | None = None,
 ) -> tuple[str | None, str | None]:
-    """Execute *cmd*. Delegate to helper when use_root=True."""
+    """Execute *cmd*. Delegate to helper when use_root=True.
+
+    Raises OperationCancelled if *cancel* is set while the helper runs *cmd*.
+    """
     if use_root:
-        _start_root_helper()
-        helper = _ROOT_HELPER
-        if helper is None or helper.stdin is None or helper.stdout is None:
-            return None, "Failed to start root process."
-        try:
-            json.dump(cmd, helper.stdin)
-            helper.stdin.write("\n")
-            helper.stdin.flush()
-            line = helper.stdout.readline()
-            if not line:
-                return None, "Root process exited unexpectedly."
-            result = json.loads(line)
-            if result.get("error") is not None:
-                return None, str(result["error"])
-            if result.get("returncode", 1) != 0:
-                return (
-                    None,
-                    result.get("stderr")
-                    or f"Код выхода: {result.get('returncode')}",
-                )
-            return result.get("stdout", "").strip(), None
+        try:
+            result = _helper_call("run", cmd=cmd, cancel=cancel)
+        except OperationCancelled:
+            raise
+        except (OSError, ValueError, RuntimeError) as exc:
+            return None, str(exc)
         except Exception as exc:  # pylint: disable=broad-except
             return None, f"IPC error: {exc}"
+        if result.get("returncode", 1) != 0:
+            return (
+                None,
+                result.get("stderr")
+                or f"Код выхода: {result.get('returncode')}",
+            )
+        return result.get("stdout", "").strip(), None
+
+    if not metrics.ENABLED:
+        return _run_local(cmd)
+    kind = metrics.command_kind(cmd)
+    start = time.perf_counter()
+    out, err = _run_local(cmd)
+    elapsed = time.perf_counter() - start
+    metrics.REGISTRY.observe(kind, {"exec": elapsed, "total": elapsed})
+    if err:
+        metrics.REGISTRY.error(kind, "exit")
+    return out, err
 
+
+def _run_local(cmd: list[str]) -> tuple[str | None, str | None]:
     try:
         proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
         if proc.returncode != 0:
@@ -102,83 +1156,455 @@ def _run_command(
         return None, f"Unknown error: {exc}"
 
 
+# ───────── cache of read-only queries ───────── #
+_QUERY_TTL_S: Final[dict[str, float]] = {
+    "list_configs": 10.0,  # config kinds are also dropped on inotify events
+    "stat_configs": 10.0,
+    "exists": 10.0,
+    "interfaces": 2.0,  # below StatusMonitor's shortest poll interval
+    "show": 1.0,  # counters and handshakes move on
+}
+_CONFIG_KINDS: Final[tuple[str, ...]] = ("list_configs", "stat_configs", "exists")
+_INTERFACE_KINDS: Final[tuple[str, ...]] = ("interfaces", "show")
+
+
+class QueryCache:
+    """Results of idempotent privileged queries, each kept for its TTL.
+
+    Keys are (kind, name); name is None for whole-directory or all-interface
+    queries.  WireGuard methods that change configs or interfaces drop the
+    affected kinds, and so do config/interface events (StatusMonitor).  A
+    fetch that raced with such an invalidation is returned but not stored,
+    so a stale answer never outlives the mutation that made it stale.
+    Hit and miss counters are kept per kind, see stats().
+    """
+
+    def __init__(self, ttl: dict[str, float] | None = None) -> None:
+        self.ttl = dict(_QUERY_TTL_S if ttl is None else ttl)
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str | None], tuple[float, Any]] = {}
+        self._generation = 0  # bumped by every invalidation
+        self.hits: dict[str, int] = dict.fromkeys(self.ttl, 0)
+        self.misses: dict[str, int] = dict.fromkeys(self.ttl, 0)
+
+    def get(
+        self,
+        kind: str,
+        name: str | None,
+        fetch: Callable[[], Any],
+        refresh: bool = False,
+    ) -> Any:
+        """The cached value of (kind, name), else (or with *refresh*) fetch()."""
+        key = (kind, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not refresh and entry is not None and entry[0] > time.monotonic():
+                self.hits[kind] += 1
+                return entry[1]
+            self.misses[kind] += 1
+            generation = self._generation
+        value = fetch()  # exceptions are not cached
+        self.put(kind, name, value, generation)
+        return value
+
+    @property
+    def generation(self) -> int:
+        """Pass to put() to store only if nothing was invalidated since."""
+        with self._lock:
+            return self._generation
+
+    def put(
+        self, kind: str, name: str | None, value: Any, generation: int | None = None
+    ) -> None:
+        with self._lock:
+            if generation is None or generation == self._generation:
+                expires = time.monotonic() + self.ttl[kind]
+                self._entries[(kind, name)] = (expires, value)
+
+    def invalidate(
+        self, kinds: Iterable[str], names: Iterable[str] | None = None
+    ) -> None:
+        """Drop *kinds* for *names* plus their name-less entries (the lists);
+        names=None drops every entry of those kinds."""
+        kinds = set(kinds)
+        names = None if names is None else {*names, None}
+        with self._lock:
+            self._generation += 1
+            for key in [
+                k
+                for k in self._entries
+                if k[0] in kinds and (names is None or k[1] in names)
+            ]:
+                del self._entries[key]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+                for kind in self.ttl
+            }
+
+
+_QUERY_CACHE = QueryCache()
+
+
 # ───────── основной класс ───────── #
 class WireGuard:
     """Инкапсулирует работу с WireGuard."""
 
     VALID_WG_NAME = _VALID_WG_NAME
 
+    def __init__(self) -> None:
+        self.index = ConfigIndex()
+        self.cache = _QUERY_CACHE  # shared: there is one helper per process
+
     def list_configs(self) -> list[str]:
-        cmd = [
-            "find",
-            "/etc/wireguard",
-            "-maxdepth",
-            "1",
-            "-type",
-            "f",
-            "-name",
-            "*.conf",
-            "-printf",
-            "%f\n",
-        ]
-        out, err = _run_command(cmd, use_root=True)
-        if err:
-            raise RuntimeError(err)
-        return (
-            [
-                f.removesuffix(".conf")
-                for f in out.splitlines()
-                if self.VALID_WG_NAME.fullmatch(f.removesuffix(".conf"))
-            ]
-            if out
-            else []
-        )
+        def fetch() -> tuple[str, ...]:
+            return tuple(sorted(_helper_call("list_configs")))
+
+        return list(self.cache.get("list_configs", None, fetch))
+
+    def scan_configs(self, refresh: bool = False) -> ConfigIndex:
+        """Refresh the parsed-config index; only changed files are re-read.
+
+        Within the cache TTL and without a config change in between, this
+        costs no helper round trip at all.
+        """
+
+        def fetch() -> dict[str, tuple[int, int, int]]:
+            generation = self.cache.generation
+            stats = _helper_call("stat_configs")
+            for name in stats:  # answers config_exists() for these, too
+                self.cache.put("exists", name, True, generation)
+            return stats
+
+        stats = self.cache.get("stat_configs", None, fetch, refresh)
+        stale = self.index.stale(stats)
+        texts = _helper_call("read_configs", names=stale) if stale else {}
+        self.index.update(stats, texts)
+        return self.index
+
+    def active_interfaces(self, refresh: bool = False) -> list[str]:
+        """Names of the running WireGuard interfaces.
+
+        Cached for a moment; *refresh* asks again, e.g. before acting on
+        the answer.
+        """
+
+        def fetch() -> tuple[str, ...]:
+            if _using_daemon():  # the daemon keeps this current for everyone
+                return tuple(_helper_call("status"))
+            out, _ = _run_command(["wg", "show", "interfaces"])
+            return tuple(out.split()) if out else ()
+
+        return list(self.cache.get("interfaces", None, fetch, refresh))
+
+    def invalidate_configs(self, names: Iterable[str] | None = None) -> None:
+        """Forget cached config queries about *names* (None: all configs)."""
+        self.cache.invalidate(_CONFIG_KINDS, names)
+
+    def invalidate_interfaces(self, names: Iterable[str] | None = None) -> None:
+        """Forget the interface list and `wg show` of *names* (None: all)."""
+        self.cache.invalidate(_INTERFACE_KINDS, names)
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        """Hit and miss counts per query kind since the process started."""
+        return self.cache.stats()
 
-    def active_interfaces(self) -> list[str]:
-        out, _ = _run_command(["wg", "show", "interfaces"])
-        return out.split() if out else []
+    def subscribe(
+        self, topics: list[str], listener: Callable[[dict[str, Any]], None]
+    ) -> dict[str, Any]:
+        """Daemon only: have *listener* called with every pushed event.
+
+        Topics are "status", "configs" and "telemetry" (see wg_daemon.py);
+        the listener runs on the reader thread and gets all topics this
+        connection subscribed to.  Returns the current status snapshot.
+        """
+        if not _using_daemon():
+            raise NotImplementedError("Events need the shared daemon.")
+        _EVENT_LISTENERS.append(listener)
+        try:
+            return _helper_call("subscribe", topics=topics)
+        except Exception:
+            _EVENT_LISTENERS.remove(listener)
+            raise
+
+    def unsubscribe(
+        self, topics: list[str], listener: Callable[[dict[str, Any]], None]
+    ) -> None:
+        if listener in _EVENT_LISTENERS:
+            _EVENT_LISTENERS.remove(listener)
+        _helper_call("unsubscribe", topics=topics)
 
     # действия
-    def connect(self, name: str) -> None:
-        _, err = _run_command(["wg-quick", "up", name], use_root=True)
-        if err:
-            raise RuntimeError(err)
+    ENGINES = ("wg-quick", "native")
+
+    def connect(
+        self,
+        name: str,
+        cancel: threading.Event | None = None,
+        engine: str = "wg-quick",
+        on_output: Callable[[str, str], None] | None = None,
+        endpoints: dict[str, str] | None = None,
+    ) -> str:
+        """Bring *name* up; return the engine that actually did it.
+
+        The native engine falls back to wg-quick for configs it cannot
+        handle (hooks, SaveConfig); the helper decides in one round trip.
+        *on_output* gets wg-quick's output live, see _helper_call.
+        *endpoints* are pre-resolved Endpoints, "host:port" ->
+        "address:port" (EndpointResolver.pinned()).
+        """
+        try:
+            return _helper_call(
+                "connect",
+                name=name,
+                engine=engine,
+                endpoints=endpoints,
+                cancel=cancel,
+                on_output=on_output,
+            )
+        finally:  # also after a failure or cancel: wg-quick may be halfway
+            self.invalidate_interfaces([name])
+
+    def disconnect(
+        self,
+        name: str,
+        cancel: threading.Event | None = None,
+        engine: str = "wg-quick",
+        on_output: Callable[[str, str], None] | None = None,
+    ) -> str:
+        try:
+            return _helper_call(
+                "disconnect",
+                name=name,
+                engine=engine,
+                cancel=cancel,
+                on_output=on_output,
+            )
+        finally:
+            self.invalidate_interfaces([name])
+
+    def reload(
+        self,
+        name: str,
+        engine: str = "wg-quick",
+        on_output: Callable[[str, str], None] | None = None,
+        endpoints: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """Apply the edited config of running tunnel *name*.
+
+        Peers, keys, endpoints and AllowedIPs change in place without
+        dropping established sessions; interface-level edits (Address,
+        MTU, DNS, ...) restart the tunnel.  See _op_reload for the reply.
+        """
+        try:
+            return _helper_call(
+                "reload",
+                name=name,
+                engine=engine,
+                endpoints=endpoints,
+                on_output=on_output,
+            )
+        finally:
+            self.invalidate_interfaces([name])
 
-    def disconnect(self, name: str) -> None:
-        _, err = _run_command(["wg-quick", "down", name], use_root=True)
-        if err:
-            raise RuntimeError(err)
+    def refresh_endpoints(
+        self, name: str, addresses: dict[str, list[str]]
+    ) -> dict[str, str]:
+        """Point peers of running *name* at their hosts' new addresses.
+
+        See _op_refresh_endpoints; established sessions survive the move.
+        """
+        try:
+            return _helper_call("refresh_endpoints", name=name, addresses=addresses)
+        finally:
+            self.invalidate_interfaces([name])
+
+    def stream_command(
+        self, cmd: list[str], cancel: threading.Event | None = None
+    ) -> Generator[tuple[str, str], None, int]:
+        """Run *cmd* as root, yielding ("stdout"/"stderr", text) as it writes.
+
+        Nothing is buffered on either side, so this suits large outputs
+        such as `wg show` with thousands of peers.  Returns the exit code.
+        """
+        result = yield from _helper_stream("run", cmd=cmd, cancel=cancel)
+        return result["returncode"]
 
     def load_config(self, file_path: str) -> None:
         src = Path(file_path)
-        dest = Path("/etc/wireguard") / src.name
         if not self.VALID_WG_NAME.fullmatch(src.stem):
             raise ValueError("Invalid file name.")
-        _, exists_err = _run_command(["test", "-e", str(dest)], use_root=True)
-        if exists_err is None:
-            raise FileExistsError("File already exists.")
-        _, err = _run_command(
-            ["install", "-m", "600", str(src), str(dest)], use_root=True
+        content = src.read_text(encoding="utf-8")
+        parse_config(content, src.stem)  # ConfigError: nothing gets installed
+        try:
+            _helper_call("atomic_install", name=src.stem, content=content)
+        except FileExistsError:
+            raise FileExistsError("File already exists.") from None
+        finally:
+            self.invalidate_configs([src.stem])
+
+    def save_config(self, name: str, content: str) -> None:
+        """Replace the config *name* with *content* (the GUI's editor)."""
+        parse_config(content, name)  # ConfigError: nothing gets installed
+        try:
+            _helper_call("atomic_install", name=name, content=content, overwrite=True)
+        finally:
+            self.invalidate_configs([name])
+
+    def check_import(self, source: str | Path) -> ImportReport:
+        """Validate every config in a directory, .zip or tar bundle."""
+        # pylint: disable-next=import-outside-toplevel
+        import bulk_import
+
+        items = bulk_import.collect(Path(source))
+        # what is installed right now decides: never a cached listing
+        return bulk_import.check(items, self.scan_configs(refresh=True))
+
+    def install_import(
+        self, report: ImportReport, overwrite: bool = False
+    ) -> list[str]:
+        """Install what *report* accepted in one privileged transaction."""
+        configs = {c.name: c.text for c in report.installable(overwrite)}
+        if not configs:
+            return []
+        try:
+            return _helper_call(
+                "install_configs", configs=configs, overwrite=overwrite
+            )
+        finally:
+            self.invalidate_configs(configs)
+
+    def provision_peers(
+        self, server: str, names: list[str], endpoint: str, **options: Any
+    ) -> list[ProvisionedPeer]:
+        """Mint keys, addresses and client configs for new peers of *server*.
+
+        Everything runs in-process (no `wg genkey` per key); *options* are
+        those of provisioning.provision().  Nothing is installed yet: see
+        add_peers() and install_provisioned().
+        """
+        # pylint: disable-next=import-outside-toplevel
+        import provisioning
+
+        bad = next((n for n in names if not self.VALID_WG_NAME.fullmatch(n)), None)
+        if bad is not None:
+            raise ValueError(f"Invalid name: {bad}")
+        config = parse_config(self.read_config(server), server)
+        return provisioning.provision(config, names, endpoint, **options)
+
+    def add_peers(self, server: str, peers: list[ProvisionedPeer]) -> None:
+        """Append *peers* to *server*'s config in one validated atomic write.
+
+        A connected *server* picks them up through reload() (the GUI does
+        that on its own when the file changes).
+        """
+        # pylint: disable-next=import-outside-toplevel
+        import provisioning
+
+        text = self.read_config(server)
+        taken = {
+            ipaddress.ip_interface(a).ip
+            for a in provisioning.used_addresses(parse_config(text, server))
+        }
+        for peer in peers:
+            clash = [a for a in peer.addresses if ipaddress.ip_interface(a).ip in taken]
+            if clash:
+                raise ValueError(f"{peer.name}: {clash[0]} was taken meanwhile.")
+        text = text.rstrip("\n") + "\n\n" + provisioning.server_peers(peers)
+        parse_config(text, server)  # ConfigError: nothing gets installed
+        try:
+            _helper_call("atomic_install", name=server, content=text, overwrite=True)
+        finally:
+            self.invalidate_configs([server])
+
+    def install_provisioned(
+        self, peers: list[ProvisionedPeer], overwrite: bool = False
+    ) -> list[str]:
+        """Install the client configs of *peers* as local tunnels, all or none."""
+        configs = {}
+        for peer in peers:
+            parse_config(peer.config, peer.name)
+            configs[peer.name] = peer.config
+        if not configs:
+            return []
+        try:
+            return _helper_call(
+                "install_configs", configs=configs, overwrite=overwrite
+            )
+        finally:
+            self.invalidate_configs(configs)
+
+    def config_path(self, name: str) -> Path:
+        return _config_file(name)
+
+    def config_exists(self, name: str) -> bool:
+        return self.cache.get(
+            "exists", name, lambda: _helper_call("stat", name=name) is not None
         )
-        if err:
-            raise RuntimeError(err)
+
+    def read_config(self, name: str) -> str:
+        return _helper_call("read_config", name=name)
+
+    def rename_config(self, old: str, new: str) -> None:
+        if not self.VALID_WG_NAME.fullmatch(new):
+            raise ValueError("Invalid name.")
+        try:
+            _helper_call("rename", old=old, new=new)
+        finally:
+            self.invalidate_configs([old, new])
+
+    def delete_config(self, name: str) -> None:
+        try:
+            _helper_call("delete", name=name)
+        finally:
+            self.invalidate_configs([name])
+
+    def watch_configs(self, timeout: float = 30.0) -> list[str]:
+        """Block until a config in /etc/wireguard changes; return the names."""
+        names = _helper_call("watch_configs", timeout=timeout)
+        if names:
+            self.invalidate_configs(names)
+        return names
 
     def tunnel_info(self, name: str) -> str:
-        out, err = _run_command(["wg", "show", name], use_root=True)
-        return err or out or "Failed to get information."
+        def fetch() -> str:
+            out, err = _run_command(["wg", "show", name], use_root=True)
+            if err is not None:
+                raise RuntimeError(err)  # errors are not cached
+            return out or ""
+
+        try:
+            return self.cache.get("show", name, fetch) or "Failed to get information."
+        except RuntimeError as exc:
+            return str(exc)
 
 
 # export internal utilities needed by GUI
 __all__ = [
     "WireGuard",
+    "OperationCancelled",
     "_start_root_helper",
+    "_connect_daemon",
+    "_using_daemon",
     "_root_helper_main",
+    "_serve_stream",
     "_run_command",
+    "_QUERY_CACHE",
+    "_helper_call",
+    "_inotify_open",
+    "_inotify_read",
+    "_CONFIG_DIR",
 ]
 
 # entry point for pkexec
 if __name__ == "__main__":
     if "--root-helper" in sys.argv:
         _root_helper_main()
+    elif "--daemon" in sys.argv:
+        import wg_daemon  # pylint: disable=import-outside-toplevel
+
+        wg_daemon.main([a for a in sys.argv[1:] if a != "--daemon"])
     else:
         print("wireguard_core: library; run main.py", file=sys.stderr)
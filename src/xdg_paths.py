@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-user XDG base directories for wireguard-ui (created on demand)."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+APP_NAME = "wireguard-ui"
+
+
+def _base(env: str, default: str) -> Path:
+    return Path(os.environ.get(env) or os.path.expanduser(default)) / APP_NAME
+
+
+def cache_dir() -> Path:
+    """$XDG_CACHE_HOME/wireguard-ui: disposable, rebuildable data."""
+    return _base("XDG_CACHE_HOME", "~/.cache")
+
+
+def config_dir() -> Path:
+    """$XDG_CONFIG_HOME/wireguard-ui: user settings."""
+    return _base("XDG_CONFIG_HOME", "~/.config")
+
+
+def data_dir() -> Path:
+    """$XDG_DATA_HOME/wireguard-ui: persistent user data."""
+    return _base("XDG_DATA_HOME", "~/.local/share")